@@ -1,55 +1,465 @@
-from transformers import AutoModelForCausalLM, AutoTokenizer
+import gc
+import hashlib
+import queue
+import threading
+import time
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional, Sequence, Tuple
+
+from app.config.settings import settings
+from app.core.exceptions import ServiceBusyError
 
 # 설치명령어 pip install torch==2.5.1+cu121 torchvision==0.20.1+cu121 torchaudio==2.5.1+cu121 --index-url https://download.pytorch.org/whl/cu121
-import torch
-
-# 디바이스 확인
-device = "cuda" if torch.cuda.is_available() else "cpu"
-print("CUDA available:", torch.cuda.is_available())
-if device == "cuda":
-    free_mem, total_mem = torch.cuda.mem_get_info()
-    print(f"GPU memory: {free_mem / 1024**3:.2f} GB free / {total_mem / 1024**3:.2f} GB total")
-
-# Zephyr 모델로 변경
-model_name = "HuggingFaceH4/zephyr-7b-alpha"
-tokenizer = AutoTokenizer.from_pretrained(model_name)
-model = AutoModelForCausalLM.from_pretrained(
-    model_name,
-    torch_dtype=torch.float16,
-    device_map="auto"
+# torch/transformers 는 모델을 로드할 때 import 한다 (import 시 블로킹 방지)
+
+# 모델 상태
+UNLOADED = "unloaded"
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+
+class ModelManager:
+    """
+    로컬 채팅 모델 관리자
+
+    모델은 백그라운드 스레드에서 로드하므로 서버는 바로 요청을 받을 수 있고,
+    준비 상태(state)를 /chat 과 /health 에서 확인한다.
+    일정 시간 사용하지 않으면 모델을 내려 메모리를 반환하고,
+    다음 요청 때 다시 로드한다.
+    """
+
+    def __init__(
+        self,
+        model_name: str,
+        quantize_cpu: bool = True,
+        idle_unload_seconds: float = 0
+    ):
+        self.model_name = model_name
+        self.quantize_cpu = quantize_cpu
+        self.idle_unload_seconds = idle_unload_seconds
+        self.state = UNLOADED
+        self.error: Optional[str] = None
+        self.device: Optional[str] = None
+        self.model = None
+        self.tokenizer = None
+        self.load_seconds: Optional[float] = None
+        self.last_used = time.monotonic()
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._watcher: Optional[threading.Thread] = None
+
+    def start_loading(self) -> bool:
+        """
+        백그라운드 로드 시작 (이미 로드 중이거나 준비되었으면 False)
+        """
+        with self._lock:
+            if self.state in (LOADING, READY):
+                return False
+            self.state = LOADING
+            self.error = None
+        threading.Thread(target=self._load, name="llm-loader", daemon=True).start()
+        self._start_watcher()
+        return True
+
+    def _load(self):
+        started = time.monotonic()
+        try:
+            import torch
+            from transformers import AutoModelForCausalLM, AutoTokenizer
+
+            # 디바이스 확인
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+            print("CUDA available:", torch.cuda.is_available())
+            if device == "cuda":
+                free_mem, total_mem = torch.cuda.mem_get_info()
+                print(f"GPU memory: {free_mem / 1024**3:.2f} GB free / {total_mem / 1024**3:.2f} GB total")
+
+            tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+            if device == "cuda":
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    torch_dtype=torch.float16,
+                    device_map="auto"
+                )
+            else:
+                model = AutoModelForCausalLM.from_pretrained(
+                    self.model_name,
+                    torch_dtype=torch.float32,
+                    low_cpu_mem_usage=True
+                )
+                if self.quantize_cpu:
+                    # CPU 에서는 Linear 레이어를 int8 로 동적 양자화 (메모리 약 1/4)
+                    model = torch.quantization.quantize_dynamic(
+                        model, {torch.nn.Linear}, dtype=torch.qint8
+                    )
+            model.eval()
+
+            with self._lock:
+                self.model = model
+                self.tokenizer = tokenizer
+                self.device = device
+                self.state = READY
+                self.load_seconds = time.monotonic() - started
+                self.last_used = time.monotonic()
+            print(f"✅ 로컬 채팅 모델 준비 완료 ({self.load_seconds:.1f}s, {device})")
+        except Exception as e:
+            with self._lock:
+                self.state = FAILED
+                self.error = str(e)
+            print(f"로컬 채팅 모델 로드 실패: {e}")
+
+    def is_ready(self) -> bool:
+        return self.state == READY
+
+    @contextmanager
+    def use(self) -> Iterator[Tuple[Any, Any]]:
+        """
+        준비된 (model, tokenizer) 를 사용 (사용 중에는 유휴 해제하지 않음)
+
+        준비되지 않았으면 로드를 시작하고 ServiceBusyError(503) 를 발생시킨다.
+        """
+        with self._lock:
+            ready = self.state == READY
+            if ready:
+                self._in_use += 1
+                model, tokenizer = self.model, self.tokenizer
+        if not ready:
+            self.start_loading()
+            raise ServiceBusyError(detail="AI 선생님이 준비 중이에요. 잠시 후 다시 시도해주세요.", retry_after=10)
+        try:
+            yield model, tokenizer
+        finally:
+            with self._lock:
+                self._in_use -= 1
+                self.last_used = time.monotonic()
+
+    def unload(self) -> bool:
+        """
+        모델을 메모리에서 내림 (사용 중이면 False)
+        """
+        with self._lock:
+            if self.state != READY or self._in_use:
+                return False
+            self.model = None
+            self.tokenizer = None
+            self.state = UNLOADED
+        gc.collect()
+        try:
+            import torch
+            if torch.cuda.is_available():
+                torch.cuda.empty_cache()
+        except ImportError:
+            pass
+        print("💤 유휴 상태로 로컬 채팅 모델을 해제했습니다.")
+        return True
+
+    def _start_watcher(self):
+        if self.idle_unload_seconds <= 0 or self._watcher is not None:
+            return
+        self._watcher = threading.Thread(target=self._watch_idle, name="llm-idle", daemon=True)
+        self._watcher.start()
+
+    def _watch_idle(self):
+        interval = min(60.0, self.idle_unload_seconds / 2)
+        while not self._stop.wait(interval):
+            if self.state == READY and time.monotonic() - self.last_used >= self.idle_unload_seconds:
+                self.unload()
+
+    def status(self) -> dict:
+        return {
+            "model": self.model_name,
+            "state": self.state,
+            "device": self.device,
+            "in_use": self._in_use,
+            "load_seconds": self.load_seconds,
+            "idle_seconds": round(time.monotonic() - self.last_used, 1),
+            "error": self.error,
+        }
+
+    def shutdown(self):
+        self._stop.set()
+        self.unload()
+
+# Zephyr 모델 (프로세스당 하나)
+model_manager = ModelManager(
+    settings.LOCAL_LLM_MODEL_NAME,
+    quantize_cpu=settings.LOCAL_LLM_QUANTIZE_CPU,
+    idle_unload_seconds=settings.LOCAL_LLM_IDLE_UNLOAD_SECONDS
 )
 
-# 응답 생성 함수
-def generate_response(user_input: str) -> str:
+class GenerationRequest:
+    """
+    배치 대기열에 들어가는 생성 요청 하나
+    """
+
+    def __init__(self, messages: List[dict], max_new_tokens: int, stop: Sequence[str] = ()):
+        self.messages = messages
+        self.max_new_tokens = max_new_tokens
+        self.stop = tuple(stop)
+        self.future: Future = Future()
+
+class _BatchStoppingCriteria:
+    """
+    요청별 종료 조건 (EOS, 요청별 최대 토큰 수, 중단 문자열)
+
+    모든 요청이 끝나면 배치 생성을 멈춘다.
+    """
+
+    def __init__(self, tokenizer, requests: List[GenerationRequest], prompt_length: int):
+        self.tokenizer = tokenizer
+        self.requests = requests
+        self.prompt_length = prompt_length
+        self.done = [False] * len(requests)
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        generated = input_ids.shape[1] - self.prompt_length
+        for row, request in enumerate(self.requests):
+            if self.done[row]:
+                continue
+            if generated >= request.max_new_tokens or input_ids[row, -1].item() == self.tokenizer.eos_token_id:
+                self.done[row] = True
+            elif request.stop:
+                text = self.tokenizer.decode(input_ids[row, self.prompt_length:], skip_special_tokens=True)
+                self.done[row] = any(stop in text for stop in request.stop)
+        return all(self.done)
+
+class BatchScheduler:
+    """
+    로컬 모델 배치 추론 스케줄러
+
+    요청을 대기열에 모았다가 최대 max_batch_size 개, 또는 첫 요청 후
+    max_wait_ms 가 지나면 한 번의 generate 로 함께 처리한다.
+    프롬프트는 왼쪽 패딩으로 길이를 맞추고, 결과는 요청별 종료 조건에 맞춰 잘라서
+    각 호출자에게 돌려준다.
+    """
+
+    def __init__(self, manager: ModelManager, max_batch_size: int, max_wait_ms: float, max_queue: int):
+        self.manager = manager
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max_wait_ms / 1000
+        self._queue: "queue.Queue[GenerationRequest]" = queue.Queue(maxsize=max_queue)
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self.batches = 0
+        self.requests = 0
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="llm-batcher", daemon=True)
+                self._thread.start()
+
+    def submit(self, messages: List[dict], max_new_tokens: int, stop: Sequence[str] = ()) -> Future:
+        """
+        생성 요청을 대기열에 추가 (모델이 준비되지 않았거나 대기열이 가득 차면 503)
+        """
+        if not self.manager.is_ready():
+            self.manager.start_loading()
+            raise ServiceBusyError(detail="AI 선생님이 준비 중이에요. 잠시 후 다시 시도해주세요.", retry_after=10)
+        self._ensure_started()
+        request = GenerationRequest(messages, max_new_tokens, stop)
+        try:
+            self._queue.put_nowait(request)
+        except queue.Full:
+            raise ServiceBusyError()
+        return request.future
+
+    def _next_batch(self) -> List[GenerationRequest]:
+        try:
+            batch = [self._queue.get(timeout=1.0)]
+        except queue.Empty:
+            return []
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stop.is_set():
+            batch = self._next_batch()
+            # 대기 중 취소된 요청은 제외
+            batch = [request for request in batch if request.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                replies = self._generate(batch)
+            except Exception as e:
+                print(f"배치 생성 오류: {e}")
+                for request in batch:
+                    request.future.set_exception(e)
+                continue
+            for request, reply in zip(batch, replies):
+                request.future.set_result(reply)
+
+    def _generate(self, batch: List[GenerationRequest]) -> List[str]:
+        from transformers import StoppingCriteriaList
+
+        with self.manager.use() as (model, tokenizer):
+            # Chat 템플릿 적용 후 왼쪽 패딩 (생성이 모든 행에서 같은 위치부터 이어지도록)
+            prompts = [
+                tokenizer.apply_chat_template(request.messages, tokenize=False, add_generation_prompt=True)
+                for request in batch
+            ]
+            tokenizer.padding_side = "left"
+            if tokenizer.pad_token is None:
+                tokenizer.pad_token = tokenizer.eos_token
+            inputs = tokenizer(prompts, return_tensors="pt", padding=True).to(model.device)
+            prompt_length = inputs["input_ids"].shape[1]
+
+            stopping = _BatchStoppingCriteria(tokenizer, batch, prompt_length)
+            outputs = model.generate(
+                **inputs,
+                max_new_tokens=max(request.max_new_tokens for request in batch),
+                temperature=0.7,
+                top_p=0.9,
+                do_sample=True,
+                pad_token_id=tokenizer.pad_token_id,
+                stopping_criteria=StoppingCriteriaList([stopping])
+            )
+
+            replies = []
+            for row, request in enumerate(batch):
+                new_tokens = outputs[row, prompt_length:prompt_length + request.max_new_tokens]
+                reply = tokenizer.decode(new_tokens, skip_special_tokens=True)
+                for stop in request.stop:
+                    reply = reply.split(stop)[0]
+                replies.append(reply.strip())
+
+        self.batches += 1
+        self.requests += len(batch)
+        return replies
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "batches": self.batches,
+            "requests": self.requests,
+            "avg_batch_size": round(self.requests / self.batches, 2) if self.batches else 0.0,
+        }
+
+    def shutdown(self):
+        self._stop.set()
+
+# 동시 채팅 요청을 묶어서 처리하는 스케줄러
+batch_scheduler = BatchScheduler(
+    model_manager,
+    max_batch_size=settings.LOCAL_LLM_MAX_BATCH_SIZE,
+    max_wait_ms=settings.LOCAL_LLM_MAX_BATCH_WAIT_MS,
+    max_queue=settings.LOCAL_LLM_MAX_QUEUE
+)
+
+SYSTEM_PROMPT = "You are a helpful and friendly AI assistant."
+# 프롬프트 버전 (프롬프트가 바뀌면 캐시된 응답을 사용하지 않음)
+PROMPT_VERSION = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+def _build_messages(user_input: str, history: Optional[List[dict]] = None) -> List[dict]:
     # Zephyr는 ChatML 포맷을 사용
-    messages = [
-        {"role": "system", "content": "You are a helpful and friendly AI assistant."},
+    return [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        *(history or []),
         {"role": "user", "content": user_input},
     ]
 
-    # Chat 템플릿 적용
-    prompt = tokenizer.apply_chat_template(messages, tokenize=False, add_generation_prompt=True)
-    inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
-
-    # 응답 생성
-    outputs = model.generate(
-        **inputs,
-        max_new_tokens=100,
-        temperature=0.7,
-        top_p=0.9,
-        do_sample=True,
-        pad_token_id=tokenizer.eos_token_id
-    )
+# 응답 생성 함수
+def generate_response(
+    user_input: str,
+    history: Optional[List[dict]] = None,
+    stop: Sequence[str] = ()
+) -> str:
+    messages = _build_messages(user_input, history)
 
-    # 전체 응답 디코딩 후, assistant 답변만 추출
-    decoded = tokenizer.decode(outputs[0], skip_special_tokens=True)
-    reply = decoded.split(messages[-1]["content"])[-1].strip()
+    # 배치 스케줄러에서 다른 요청과 함께 생성
+    future = batch_scheduler.submit(messages, settings.LOCAL_LLM_MAX_NEW_TOKENS, stop)
+    try:
+        reply = future.result(timeout=settings.LOCAL_LLM_REQUEST_TIMEOUT)
+    except FutureTimeoutError:
+        future.cancel()
+        raise ServiceBusyError()
 
     print("✅ Response ready.")
     return reply
 
+class _CancelCriteria:
+    """
+    취소 이벤트가 설정되면 생성을 멈추는 종료 조건
+    """
+
+    def __init__(self, cancel: threading.Event):
+        self.cancel = cancel
+
+    def __call__(self, input_ids, scores, **kwargs) -> bool:
+        return self.cancel.is_set()
+
+def stream_response(
+    user_input: str,
+    cancel: Optional[threading.Event] = None,
+    history: Optional[List[dict]] = None
+) -> Iterator[str]:
+    """
+    생성되는 대로 응답 텍스트 조각을 반환
+
+    생성은 별도 스레드에서 실행하고 TextIteratorStreamer 로 조각을 받는다.
+    cancel 이 설정되거나 반복이 중단되면 생성도 멈춘다.
+    """
+    from transformers import StoppingCriteriaList, TextIteratorStreamer
+
+    cancel = cancel or threading.Event()
+    with model_manager.use() as (model, tokenizer):
+        prompt = tokenizer.apply_chat_template(
+            _build_messages(user_input, history), tokenize=False, add_generation_prompt=True
+        )
+        inputs = tokenizer(prompt, return_tensors="pt").to(model.device)
+        streamer = TextIteratorStreamer(
+            tokenizer,
+            skip_prompt=True,
+            skip_special_tokens=True,
+            timeout=settings.LOCAL_LLM_REQUEST_TIMEOUT
+        )
+        generation = threading.Thread(
+            target=model.generate,
+            kwargs=dict(
+                **inputs,
+                streamer=streamer,
+                max_new_tokens=settings.LOCAL_LLM_MAX_NEW_TOKENS,
+                temperature=0.7,
+                top_p=0.9,
+                do_sample=True,
+                pad_token_id=tokenizer.eos_token_id,
+                stopping_criteria=StoppingCriteriaList([_CancelCriteria(cancel)])
+            ),
+            name="llm-stream",
+            daemon=True
+        )
+        generation.start()
+        try:
+            for text in streamer:
+                if cancel.is_set():
+                    break
+                if text:
+                    yield text
+        finally:
+            cancel.set()
+            generation.join()
+
 # 테스트
 if __name__ == "__main__":
+    model_manager.start_loading()
+    while not model_manager.is_ready():
+        if model_manager.state == FAILED:
+            raise SystemExit(model_manager.error)
+        time.sleep(1)
+
     while True:
         user_text = input("👤 User: ")
         if user_text.lower() in ["exit", "quit"]:
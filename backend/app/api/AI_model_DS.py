@@ -1,7 +1,16 @@
-from typing import Optional
+from typing import Iterator, List, Optional
 import os
-import requests
+import time
 import json
+import hashlib
+import random
+import asyncio
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.config.settings import settings
+from app.core.circuit_breaker import CircuitBreaker
 
 # 환경 변수에서 API 키를 가져오거나 직접 설정
 DEEPSEEK_API_KEY = os.environ.get("DEEPSEEK_API_KEY", "sk-c9d6142f97294961bcfceb7a5e0da3c9")
@@ -40,47 +49,297 @@ TEACHER_PROMPT = """너는 영어를 가르치는 초등학생 1학년 선생님
 # 항상 아이들의 호기심을 존중하고 배움의 즐거움을 느낄 수 있도록 도와주세요!
 
 
+# 프롬프트 버전 (프롬프트가 바뀌면 캐시된 응답을 사용하지 않음)
+PROMPT_VERSION = hashlib.sha256(TEACHER_PROMPT.encode("utf-8")).hexdigest()[:12]
+
+# 응답 생성에 실패했을 때의 기본 응답
+FALLBACK_REPLY = "죄송해요, 지금은 대답하기 어려워요. 다시 물어봐 주세요. 😊"
+
+class UpstreamError(Exception):
+    """재시도 후에도 응답을 받지 못한 경우"""
+
+# 재시도할 HTTP 상태 코드 (요청 과다, 일시적 서버 오류)
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
 class EnglishTeacher:
-    def __init__(self, api_key: str, system_prompt: str):
+    """
+    DeepSeek API 선생님 클라이언트
+
+    HTTP 연결은 세션(동기)과 httpx.AsyncClient(비동기)로 재사용하고,
+    연결/읽기 타임아웃, 지터를 준 지수 백오프 재시도, 회로 차단기를 적용한다.
+    프로세스당 하나를 만들어 공유한다.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        system_prompt: str,
+        api_url: Optional[str] = None,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        max_retries: Optional[int] = None,
+        backoff_base: Optional[float] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None
+    ):
         self.api_key = api_key
         self.system_prompt = system_prompt
-        self.api_url = "https://api.deepseek.com/v1/chat/completions"
+        self.api_url = api_url or settings.DEEPSEEK_API_URL
         self.headers = {
             "Content-Type": "application/json",
             "Authorization": f"Bearer {api_key}"
         }
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else settings.DEEPSEEK_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else settings.DEEPSEEK_READ_TIMEOUT
+        )
+        self.max_retries = max_retries if max_retries is not None else settings.DEEPSEEK_MAX_RETRIES
+        self.backoff_base = backoff_base if backoff_base is not None else settings.DEEPSEEK_BACKOFF_BASE
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            "DeepSeek",
+            failure_threshold=settings.DEEPSEEK_CIRCUIT_FAILURES,
+            reset_seconds=settings.DEEPSEEK_CIRCUIT_RESET_SECONDS
+        )
+
+        # keep-alive 연결 풀 (재시도는 직접 처리)
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=settings.DEEPSEEK_POOL_SIZE,
+            max_retries=0
+        )
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self._async_client = None
+        
+    def _build_payload(self, user_input: str, history: Optional[List[dict]] = None) -> dict:
+        return {
+            "model": "deepseek-chat",  # Deepseek의 적절한 모델명으로 대체하세요 (deepseek-chat, deepseek-coder 등)
+            "messages": [
+                {"role": "system", "content": self.system_prompt},
+                # 이전 대화 (서버에 저장된 최근 턴과 요약)
+                *(history or []),
+                {"role": "user", "content": user_input}
+            ],
+            "temperature": 0.7,  # 창의성과 일관성의 균형을 위한 온도 설정
+            "max_tokens": 150,  # 응답 길이 제한
+        }
+
+    def _backoff(self, attempt: int) -> float:
+        """
+        재시도 대기 시간 (full jitter 지수 백오프)
+        """
+        return random.uniform(0, self.backoff_base * (2 ** attempt))
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+            return True
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code in RETRY_STATUS_CODES
+        return False
+
+    @staticmethod
+    def _is_retryable_async(error: Exception) -> bool:
+        import httpx
+        if isinstance(error, httpx.TransportError):
+            return True
+        if isinstance(error, httpx.HTTPStatusError):
+            return error.response.status_code in RETRY_STATUS_CODES
+        return False
+
+    def complete(self, user_input: str, history: Optional[List[dict]] = None) -> str:
+        """
+        응답 생성 (실패 시 예외 발생)
+
+        Raises:
+            CircuitOpenError: 회로 차단 중
+            UpstreamError: 재시도 후에도 실패
+        """
+        self.circuit_breaker.check()
+        payload = self._build_payload(user_input, history)
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                time.sleep(self._backoff(attempt - 1))
+            try:
+                response = self.session.post(self.api_url, json=payload, timeout=self.timeout)
+                response.raise_for_status()  # HTTP 오류 발생 시 예외 발생
+                content = response.json()["choices"][0]["message"]["content"]
+            except Exception as e:
+                last_error = e
+                if self._is_retryable(e):
+                    continue
+                break
+            self.circuit_breaker.record_success()
+            return content
+
+        self._record_error(self._is_retryable(last_error))
+        raise UpstreamError(str(last_error)) from last_error
+
+    async def complete_async(self, user_input: str, history: Optional[List[dict]] = None) -> str:
+        """
+        complete 의 비동기 버전 (이벤트 루프를 막지 않음)
+        """
+        import httpx
+
+        self.circuit_breaker.check()
+        payload = self._build_payload(user_input, history)
+        client = self._get_async_client()
+
+        last_error: Optional[Exception] = None
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                await asyncio.sleep(self._backoff(attempt - 1))
+            try:
+                response = await client.post(self.api_url, json=payload)
+                response.raise_for_status()
+                content = response.json()["choices"][0]["message"]["content"]
+            except Exception as e:
+                last_error = e
+                if self._is_retryable_async(e):
+                    continue
+                break
+            self.circuit_breaker.record_success()
+            return content
+
+        self._record_error(self._is_retryable_async(last_error))
+        raise UpstreamError(str(last_error)) from last_error
+
+    def _record_error(self, provider_failed: bool):
+        """
+        서비스 장애(연결 실패, 5xx 등)만 회로 차단기 실패로 기록
+
+        4xx 나 응답 형식 오류는 서비스가 응답한 것이므로 정상으로 본다.
+        """
+        if provider_failed:
+            self.circuit_breaker.record_failure()
+        else:
+            self.circuit_breaker.record_success()
+
+    def _get_async_client(self):
+        if self._async_client is None:
+            import httpx
+            connect_timeout, read_timeout = self.timeout
+            self._async_client = httpx.AsyncClient(
+                headers=self.headers,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.DEEPSEEK_POOL_SIZE,
+                    max_keepalive_connections=settings.DEEPSEEK_POOL_SIZE
+                )
+            )
+        return self._async_client
         
-    def generate_response(self, user_input: str) -> str:
-        """사용자 입력에 대한 응답을 생성합니다."""
+    def generate_response(self, user_input: str, history: Optional[List[dict]] = None) -> str:
+        """사용자 입력에 대한 응답을 생성합니다. (실패 시 기본 응답)"""
         try:
-            payload = {
-                "model": "deepseek-chat",  # Deepseek의 적절한 모델명으로 대체하세요 (deepseek-chat, deepseek-coder 등)
-                "messages": [
-                    {"role": "system", "content": self.system_prompt},
-                    {"role": "user", "content": user_input}
-                ],
-                "temperature": 0.7,  # 창의성과 일관성의 균형을 위한 온도 설정
-                "max_tokens": 150,  # 응답 길이 제한
-            }
-            
-            response = requests.post(self.api_url, headers=self.headers, json=payload)
-            response.raise_for_status()  # HTTP 오류 발생 시 예외 발생
-            response_data = response.json()
-            
-            return response_data["choices"][0]["message"]["content"]
+            return self.complete(user_input, history)
         except Exception as e:
             print(f"Error generating response: {e}")
-            return "죄송해요, 지금은 대답하기 어려워요. 다시 물어봐 주세요. 😊"
+            return FALLBACK_REPLY
+
+    async def generate_response_async(self, user_input: str, history: Optional[List[dict]] = None) -> str:
+        """generate_response 의 비동기 버전"""
+        try:
+            return await self.complete_async(user_input, history)
+        except Exception as e:
+            print(f"Error generating response: {e}")
+            return FALLBACK_REPLY
+    
+    def stream_response(
+        self,
+        user_input: str,
+        cancel: Optional[threading.Event] = None,
+        history: Optional[List[dict]] = None
+    ) -> Iterator[str]:
+        """
+        스트리밍 모드로 응답을 생성하여 텍스트 조각을 받는 대로 반환합니다.
+        
+        cancel 이 설정되거나 반복이 중단되면 연결을 닫습니다.
+        """
+        payload = self._build_payload(user_input, history)
+        payload["stream"] = True
+        
+        streamed = False
+        admitted = False  # 회로 차단기를 통과했는지
+        finished = False  # 응답을 끝까지 받았는지
+        recorded = False  # 회로 차단기에 결과를 기록했는지
+        try:
+            self.circuit_breaker.check()
+            admitted = True
+            with self.session.post(self.api_url, json=payload, stream=True, timeout=self.timeout) as response:
+                response.raise_for_status()
+                # 서버 전송 이벤트: "data: {...}" 줄 단위, 마지막은 "data: [DONE]"
+                for line in response.iter_lines(decode_unicode=True):
+                    if cancel is not None and cancel.is_set():
+                        break
+                    if not line or not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        finished = True
+                        break
+                    content = json.loads(data)["choices"][0].get("delta", {}).get("content")
+                    if content:
+                        streamed = True
+                        yield content
+                else:
+                    finished = True
+        except Exception as e:
+            print(f"Error streaming response: {e}")
+            if admitted:
+                self._record_error(self._is_retryable(e))
+                recorded = True
+            # 아직 아무것도 보내지 않았으면 기본 응답으로 대체
+            if not streamed:
+                yield FALLBACK_REPLY
+        finally:
+            # 클라이언트 취소/연결 끊김(GeneratorExit 포함)은 제공자 장애가 아니므로
+            # 실패로 세지 않고 시험 요청 자리만 반환 (전송/API 오류는 위 except 에서 기록)
+            if admitted and not recorded:
+                if finished:
+                    self.circuit_breaker.record_success()
+                else:
+                    self.circuit_breaker.release_trial()
+
+    def close(self):
+        self.session.close()
+        if self._async_client is not None:
+            client, self._async_client = self._async_client, None
+            try:
+                asyncio.get_running_loop().create_task(client.aclose())
+            except RuntimeError:
+                asyncio.run(client.aclose())
+
+# 프로세스 전체에서 공유하는 선생님 클라이언트 (연결 재사용)
+teacher = EnglishTeacher(DEEPSEEK_API_KEY, TEACHER_PROMPT)
 
 # 메인 함수 - lessons.py에서 호출될 함수
-def generate_response(text: str) -> str:
+def generate_response(text: str, history: Optional[List[dict]] = None) -> str:
     """
     사용자 입력을 받아 AI 응답을 생성합니다.
     lessons.py의 chat 함수에서 호출됩니다.
     """
-    teacher = EnglishTeacher(DEEPSEEK_API_KEY, TEACHER_PROMPT)
-    response = teacher.generate_response(text)
-    return response
+    return teacher.generate_response(text, history)
+
+async def generate_response_async(text: str, history: Optional[List[dict]] = None) -> str:
+    """
+    generate_response 의 비동기 버전
+    """
+    return await teacher.generate_response_async(text, history)
+
+def stream_response(
+    text: str,
+    cancel: Optional[threading.Event] = None,
+    history: Optional[List[dict]] = None
+) -> Iterator[str]:
+    """
+    사용자 입력에 대한 AI 응답을 생성되는 대로 반환합니다.
+    lessons.py의 chat/stream 엔드포인트에서 호출됩니다.
+    """
+    return teacher.stream_response(text, cancel, history)
 
 # 모듈이 직접 실행될 때 테스트용 코드
 if __name__ == "__main__":
@@ -91,8 +350,6 @@ if __name__ == "__main__":
         "I don't understand homework"
     ]
     
-    teacher = EnglishTeacher(DEEPSEEK_API_KEY, TEACHER_PROMPT)
-    
     for input_text in test_inputs:
         print(f"\n사용자: {input_text}")
         response = teacher.generate_response(input_text)
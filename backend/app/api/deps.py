@@ -1,4 +1,4 @@
-from typing import Generator
+from typing import Generator, Optional
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from sqlalchemy.orm import Session
@@ -8,8 +8,11 @@ from app.db.session import SessionLocal
 from app.core.security import decode_token
 from app.db.models import User
 from app.config.settings import settings
+from app.services.user_cache import user_cache
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/auth/login")
+# 로그인하지 않아도 사용할 수 있는 엔드포인트용 (토큰이 없으면 None)
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl=f"/api/auth/login", auto_error=False)
 
 def get_db() -> Generator:
     """
@@ -21,11 +24,13 @@ def get_db() -> Generator:
     finally:
         db.close()
 
-async def get_current_user(
+def get_current_user(
     db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)
 ) -> User:
     """
     현재 인증된 사용자 가져오기
+
+    캐시에 없으면 DB 를 조회하므로 일반 함수로 두어 스레드 풀에서 실행되게 한다.
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -33,18 +38,50 @@ async def get_current_user(
         headers={"WWW-Authenticate": "Bearer"},
     )
     
+    user = get_user_from_token(db, token)
+    if user is None:
+        raise credentials_exception
+    
+    return user
+
+def get_current_user_optional(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[User]:
+    """
+    로그인한 경우 현재 사용자, 아니면 None
+    """
+    if not token:
+        return None
+    return get_user_from_token(db, token)
+
+def get_user_from_token(db: Session, token: str) -> Optional[User]:
+    """
+    토큰으로 활성 사용자 조회 (유효하지 않으면 None)
+
+    WebSocket 처럼 Authorization 헤더를 쓸 수 없는 경우에도 사용
+    """
+    # 최근에 검증한 토큰이면 DB 조회 없이 반환
+    user = user_cache.get(db, token)
+    if user is not None:
+        return user
+
     # 토큰 디코딩
     payload = decode_token(token)
     if payload is None:
-        raise credentials_exception
+        return None
     
+    # 리프레시 토큰은 API 인증에 사용할 수 없음
+    if payload.get("type") == "refresh":
+        return None
+
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
+        return None
     
     # 사용자 조회
     user = db.query(User).filter(User.id == int(user_id)).first()
     if user is None or not user.is_active:
-        raise credentials_exception
-    
-    return user
\ No newline at end of file
+        return None
+
+    user_cache.put(token, user, payload.get("exp"))
+    return user
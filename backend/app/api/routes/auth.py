@@ -1,29 +1,33 @@
-from datetime import datetime
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, oauth2_scheme
 from app.core.security import (
-    verify_password,
-    get_password_hash,
-    create_access_token,
-    create_refresh_token,
-    decode_token
+    verify_and_update_password_async,
+    dummy_verify_password_async,
+    get_password_hash_async,
 )
-from app.db.models import User, RefreshToken
+from app.db.models import User
 from app.schemas.auth import UserCreate, Token, UserProfile, RefreshTokenRequest
-from passlib.context import CryptContext
+from app.services.user_cache import user_cache
+from app.services.auth_service import create_user_tokens, rotate_refresh_token, revoke_user_tokens
 
 router = APIRouter()
 
+def get_user_by_email(db: Session, email: str):
+    return db.query(User).filter(User.email == email).first()
+
 @router.post("/register", response_model=UserProfile)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: Session = Depends(get_db)):
     """
     새 사용자 등록
+
+    비밀번호 해싱은 전용 프로세스 풀에서, DB 작업은 스레드 풀에서 실행한다.
     """
     # 이메일 중복 확인
-    user = db.query(User).filter(User.email == user_in.email).first()
+    user = await run_in_threadpool(get_user_by_email, db, user_in.email)
     if user:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -31,38 +35,41 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
         )
     
     # 비밀번호 해싱 및 사용자 생성
-    hashed_password = get_password_hash(user_in.password)
+    hashed_password = await get_password_hash_async(user_in.password)
     db_user = User(
         name=user_in.name,
         email=user_in.email,
         hashed_password=hashed_password
     )
-    
-    db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
-    
+
+    def save_user():
+        db.add(db_user)
+        db.commit()
+        db.refresh(db_user)
+
+    await run_in_threadpool(save_user)
     return db_user
 
 @router.post("/login", response_model=Token)
-def login(
+async def login(
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db)
 ):
     """
     OAuth2 호환 토큰 로그인
-    """
-    # 해쉬변환용 ( 필요에 따라서 암호화된 데이터를 직접 컬럼에 저장해서 사용하도록 할것)
-    pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-    hashed = pwd_context.hash("1234")
-    print(hashed);
 
-    
+    비밀번호 확인은 전용 프로세스 풀에서 실행하며, 풀이 가득 차면 429 를 반환한다.
+    """
     print("========================= backend login =========================")
     # 사용자 확인
-    user = db.query(User).filter(User.email == form_data.username).first()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = await run_in_threadpool(get_user_by_email, db, form_data.username)
+
+    # 없는 이메일도 같은 경로로 해시를 확인하여 응답 시간으로 가입 여부가 드러나지 않도록 함
+    if user:
+        valid, new_hash = await verify_and_update_password_async(form_data.password, user.hashed_password)
+    else:
+        valid, new_hash = await dummy_verify_password_async(form_data.password)
+    if not valid:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="이메일 또는 비밀번호가 잘못되었습니다.",
@@ -77,18 +84,16 @@ def login(
         )
     
     print("user.is_active ->" , user.is_active);
-    # 토큰 생성
-    access_token = create_access_token(user.id)
-    refresh_token_str, expires_at = create_refresh_token(user.id)
-    
-    # 리프레시 토큰 저장
-    db_refresh_token = RefreshToken(
-        user_id=user.id,
-        token=refresh_token_str,
-        expires_at=expires_at
-    )
-    db.add(db_refresh_token)
-    db.commit()
+    # 토큰 생성 (새 토큰 패밀리 시작, DB 저장 없음)
+    access_token, refresh_token_str = create_user_tokens(user.id)
+
+    # 해시 설정(rounds 등)이 바뀌었으면 새 설정으로 다시 저장
+    if new_hash:
+        def save_hash():
+            user.hashed_password = new_hash
+            db.commit()
+
+        await run_in_threadpool(save_hash)
     
     # 사용자 정보를 포함하여 반환 (수정된 부분)
     # 민감한 정보를 제외한 사용자 정보만 반환
@@ -113,47 +118,33 @@ def refresh_token(
 ):
     """
     리프레시 토큰으로 새 액세스 토큰 발급
+
+    사용한 리프레시 토큰은 폐기되고 같은 패밀리의 새 리프레시 토큰이 발급된다.
     """
-    # 리프레시 토큰 확인
-    db_token = db.query(RefreshToken).filter(
-        RefreshToken.token == token_data.refresh_token,
-        RefreshToken.expires_at > datetime.utcnow()
-    ).first()
-    
-    if not db_token:
+    tokens = rotate_refresh_token(db, token_data.refresh_token)
+    if tokens is None:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="리프레시 토큰이 유효하지 않거나 만료되었습니다."
         )
     
-    # 새 토큰 생성
-    new_access_token = create_access_token(db_token.user_id)
-    new_refresh_token_str, expires_at = create_refresh_token(db_token.user_id)
-    
-    # 기존 토큰 삭제 및 새 토큰 저장
-    db.delete(db_token)
-    db_refresh_token = RefreshToken(
-        user_id=db_token.user_id,
-        token=new_refresh_token_str,
-        expires_at=expires_at
-    )
-    db.add(db_refresh_token)
-    db.commit()
-    
+    new_access_token, new_refresh_token_str = tokens
     return {"token": new_access_token, "refresh_token": new_refresh_token_str}
 
 @router.post("/logout")
 def logout(
-    token: str = Depends(OAuth2PasswordRequestForm),
+    token: str = Depends(oauth2_scheme),
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
     """
-    로그아웃 및 리프레시 토큰 삭제
+    로그아웃 및 리프레시 토큰 폐기
     """
-    # 사용자의 모든 리프레시 토큰 삭제
-    db.query(RefreshToken).filter(RefreshToken.user_id == current_user.id).delete()
-    db.commit()
+    # 사용자의 모든 리프레시 토큰 폐기
+    revoke_user_tokens(db, current_user.id)
+
+    # 캐시된 인증 정보 삭제 (다음 요청부터 다시 DB 에서 확인)
+    user_cache.invalidate_user(current_user.id)
     
     return {"detail": "로그아웃 되었습니다."}
 
@@ -1,16 +1,23 @@
 from typing import List
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response
+import json
+import base64
+import asyncio
+import functools
+import threading
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, Response, Request
+from fastapi import WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import iterate_in_threadpool, run_in_threadpool
 from sqlalchemy.orm import Session
 from app.api.tts import text_to_speech
 from app.api.tts import text_to_speech_with_pydub
-from app.api.AI_model_DS import  generate_response
+from app.api.AI_model_DS import FALLBACK_REPLY
+from app.config.settings import settings
+from app.core.exceptions import ServiceBusyError
 from pydantic import BaseModel
 from typing import Optional
-from google.cloud import texttospeech
-import os
-import tempfile
 
-from app.api.deps import get_db, get_current_user
+from app.api.deps import get_db, get_current_user, get_current_user_optional, get_user_from_token
 from app.db.models import Lesson, UserProgress, User
 from app.schemas.lesson import (
     LessonSummary, 
@@ -19,8 +26,27 @@ from app.schemas.lesson import (
     UserProgressResponse,
     SpeechEvaluationResponse
 )
-from app.services.speech_service import evaluate_speech
-from app.services.tts_service import get_tts_audio
+from app.services.speech_service import (
+    evaluate_speech_async,
+    stream_speech_to_text,
+    score_speech
+)
+from app.services.audio_io import load_upload
+from app.services.scoring_service import expected_line_index
+from app.services.conversation_service import conversation_store
+from app.services.response_cache import chat_response_cache
+from app.services.llm_router import llm_router
+from app.services.tts_service import (
+    audio_cache,
+    get_tts_cache_key,
+    get_tts_audio,
+    get_emotion_tts_audio,
+    get_emotion_tts_bytes,
+    stream_emotion_tts,
+    submit_synthesis,
+    SentenceSegmenter,
+    to_audio_url
+)
 
 router = APIRouter()
 
@@ -70,13 +96,17 @@ def get_lesson_by_id(
         db.add(user_progress)
         db.commit()
     
+    # 평가에 쓰일 학생 대사 채점 자료를 미리 준비
+    expected_line_index.build(lesson.dialogues)
+    
     return lesson
 
 @router.get("/tts/{lesson_id}/{dialogue_id}")
 def get_lesson_audio(
-    lesson_id: str,
-    dialogue_id: str,
+    lesson_id: int,
+    dialogue_id: int,
     speed: float = 1.0,  # 속도 조절 파라미터
+    emotion: Optional[str] = None,  # 감정 음성 (VOICE_SETTINGS 키)
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -97,16 +127,35 @@ def get_lesson_audio(
             detail="대화를 찾을 수 없습니다."
         )
     
-    # TTS 생성 (speed 파라미터 전달)
+    # 감정 음성 요청 (사전 렌더링된 파일이 있으면 그대로 사용)
+    if emotion:
+        try:
+            file_path = get_emotion_tts_audio(dialogue.teacher_line, emotion=emotion, speed=speed)
+        except Exception as e:
+            print(f"TTS 오류: {e}")
+            file_path = None
+        return {"audio_url": to_audio_url(file_path) if file_path else None}
+    
+    # TTS 생성 (speed 파라미터 전달, 캐시 적중 시 합성하지 않음)
     audio_path = get_tts_audio(dialogue.teacher_line, speed=speed)
     
+    # 기본 속도 오디오 경로는 대화에 기록해 둠
+    # (기록한 경로가 캐시 삭제로 사라지지 않도록 pin 한 뒤 고정 경로를 기록)
+    if audio_path and speed == 1.0:
+        pinned_path = audio_cache.pin(get_tts_cache_key(dialogue.teacher_line))
+        if pinned_path is not None:
+            audio_path = to_audio_url(pinned_path)
+            if dialogue.audio_file != audio_path:
+                dialogue.audio_file = audio_path
+                db.commit()
+    
     return {"audio_url": audio_path}
 
 @router.post("/{lesson_id}/evaluate", response_model=SpeechEvaluationResponse)
 async def evaluate_user_speech(
-    lesson_id: str,
+    lesson_id: int,
     audio: UploadFile = File(...),
-    dialogue_id: str = Form(...),
+    dialogue_id: int = Form(...),
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user)
 ):
@@ -128,24 +177,112 @@ async def evaluate_user_speech(
             detail="대화를 찾을 수 없습니다."
         )
     
-    # 임시 파일로 오디오 저장
-    with tempfile.NamedTemporaryFile(delete=False, suffix=".wav") as temp_file:
-        temp_file_path = temp_file.name
-        content = await audio.read()
-        temp_file.write(content)
+    # 업로드 오디오를 메모리 버퍼로 한 번만 읽음
+    audio_source = await load_upload(audio)
+    
+    # 음성 평가 서비스 호출 (이벤트 루프를 막지 않는 비동기 버전)
+    evaluation_result = await evaluate_speech_async(
+        audio_source, 
+        expected_line_index.get(dialogue.id, dialogue.student_line)
+    )
+    
+    return evaluation_result
+
+@router.websocket("/{lesson_id}/evaluate/stream")
+async def evaluate_user_speech_stream(
+    websocket: WebSocket,
+    lesson_id: int,
+    dialogue_id: int,
+    token: str,
+    db: Session = Depends(get_db)
+):
+    """
+    말하는 동안 음성을 받아 실시간으로 평가하는 WebSocket 엔드포인트
+
+    - 연결: /{lesson_id}/evaluate/stream?dialogue_id=...&token=...
+    - 클라이언트 -> 서버: LINEAR16(16kHz, mono) 오디오 조각(binary), 녹음 종료 시 "end"(text)
+    - 서버 -> 클라이언트: {"type": "interim" | "final", "transcript": ...}
+      최종 결과가 나오면 {"type": "result", ...평가 결과} 를 보내고 연결 종료
+    """
+    await websocket.accept()
+    
+    # WebSocket 은 Authorization 헤더를 쓸 수 없으므로 쿼리 토큰으로 인증
+    # 캐시에 없으면 DB 를 조회하므로 이벤트 루프 밖에서 실행
+    user = await run_in_threadpool(get_user_from_token, db, token)
+    if user is None:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    lesson = db.query(Lesson).filter(Lesson.id == lesson_id).first()
+    dialogue = next((d for d in lesson.dialogues if d.id == dialogue_id), None) if lesson else None
+    if not dialogue:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # 받은 오디오 조각을 인식기로 넘기기 위한 큐 (None 은 녹음 종료)
+    audio_queue: asyncio.Queue = asyncio.Queue()
+    
+    async def receive_audio():
+        try:
+            while True:
+                message = await websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes"):
+                    await audio_queue.put(message["bytes"])
+                elif message.get("text") == "end":
+                    break
+        finally:
+            await audio_queue.put(None)
+    
+    # 인식기로 넘긴 오디오 (유창성 분석용)
+    received_chunks = []
     
+    async def audio_chunks():
+        while True:
+            chunk = await audio_queue.get()
+            if chunk is None:
+                return
+            received_chunks.append(chunk)
+            yield chunk
+    
+    receiver = asyncio.create_task(receive_audio())
+    final_transcripts = []
     try:
-        # 음성 평가 서비스 호출
-        evaluation_result = evaluate_speech(
-            temp_file_path, 
-            dialogue.student_line
-        )
+        async for transcript, is_final in stream_speech_to_text(audio_chunks()):
+            if is_final:
+                final_transcripts.append(transcript)
+            await websocket.send_json({
+                "type": "final" if is_final else "interim",
+                "transcript": transcript
+            })
         
-        return evaluation_result
+        # 최종 결과가 나오면 바로 평가
+        recognized_text = " ".join(final_transcripts)
+        loop = asyncio.get_running_loop()
+        # 받은 오디오는 헤더 없는 LINEAR16 이므로 raw_pcm=True 로 유창성 분석
+        evaluation_result = await loop.run_in_executor(
+            None,
+            functools.partial(
+                score_speech,
+                recognized_text,
+                expected_line_index.get(dialogue.id, dialogue.student_line),
+                b"".join(received_chunks),
+                raw_pcm=True
+            )
+        )
+        await websocket.send_json({"type": "result", **evaluation_result.dict()})
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    except HTTPException as e:
+        # 동시 요청 제한 초과 등
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER, reason=str(e.detail))
+    except Exception as e:
+        print(f"스트리밍 STT 오류: {e}")
+        await websocket.close(code=status.WS_1011_INTERNAL_ERROR)
     finally:
-        # 임시 파일 삭제
-        if os.path.exists(temp_file_path):
-            os.unlink(temp_file_path)
+        receiver.cancel()
 
 @router.post("/{lesson_id}/progress", response_model=UserProgressResponse)
 def save_user_progress(
@@ -233,112 +370,17 @@ class TextRequest(BaseModel):
     text: str
     emotion: Optional[str] = "friendly"
     useSSML: Optional[bool] = False
-
-# Google Cloud TTS 클라이언트 초기화
-try:
-    # 환경변수가 설정되어 있으면 자동으로 인증
-    # 인증을 위해서는 Google Cloud Platform 에 접속하여 키를 발급받고
-    # 해당 키 파일을 cmd로 등록한다.
-    # window용 set GOOGLE_APPLICATION_CREDENTIALS=D:\conversation_v2\backend\app\api\routes\ssml-key.json
-    # Linux/macOS용 export GOOGLE_APPLICATION_CREDENTIALS="D:\conversation_v2\backend\app\api\routes\ssml-key.json"
-    # PowerShell용 $env:GOOGLE_APPLICATION_CREDENTIALS = "D:\conversation_v2\backend\app\api\routes\ssml-key.json"
-    client = texttospeech.TextToSpeechClient()
-    print("Google Cloud 인증 성공 (환경변수)")
-except Exception as e:
-    print(f"환경변수 인증 실패: {e}")
-    client = None
-
-# 감정별 음성 설정
-VOICE_SETTINGS = {
-    "happy": {
-        "name": "en-US-Neural2-F",
-        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
-        "pitch": 2.0,
-        "speaking_rate": 1.1
-    },
-    "excited": {
-        "name": "en-US-Neural2-F", 
-        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
-        "pitch": 4.0,
-        "speaking_rate": 1.2
-    },
-    "calm": {
-        "name": "en-US-Neural2-D",
-        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
-        "pitch": 0.0,
-        "speaking_rate": 0.9
-    },
-    "friendly": {
-        "name": "en-US-Neural2-F",
-        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
-        "pitch": 1.0,
-        "speaking_rate": 1.0
-    },
-    "sad": {
-        "name": "en-US-Neural2-D",
-        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
-        "pitch": -2.0,
-        "speaking_rate": 0.8
-    },
-    "angry": {
-        "name": "en-US-Neural2-D",
-        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
-        "pitch": 1.0,
-        "speaking_rate": 1.1
-    },
-    "surprised": {
-        "name": "en-US-Neural2-F",
-        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
-        "pitch": 3.0,
-        "speaking_rate": 1.3
-    },
-    "encouraging": {
-        "name": "en-US-Neural2-F",
-        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
-        "pitch": 1.0,
-        "speaking_rate": 1.0
-    }
-}
+    stream: Optional[bool] = False  # 문장 단위 스트리밍 응답 여부
 
 def text_to_speech_with_emotion(text: str, emotion: str = "friendly", use_ssml: bool = False):
     """
     감정이 포함된 TTS 생성 함수
     """
     try:
-        # 감정 설정 가져오기 (기본값: friendly)
-        voice_config = VOICE_SETTINGS.get(emotion, VOICE_SETTINGS["friendly"])
-        
         print(f"TTS 요청 - 텍스트: {text}, 감정: {emotion}, SSML 사용: {use_ssml}")
         
-        # 음성 설정
-        voice = texttospeech.VoiceSelectionParams(
-            language_code="en-US",
-            name=voice_config["name"],
-            ssml_gender=voice_config["ssml_gender"]
-        )
-        
-        # 오디오 설정
-        audio_config = texttospeech.AudioConfig(
-            audio_encoding=texttospeech.AudioEncoding.MP3,
-            pitch=voice_config["pitch"],
-            speaking_rate=voice_config["speaking_rate"],
-            effects_profile_id=["telephony-class-application"]
-        )
-        
-        # 입력 텍스트 설정 (SSML 또는 일반 텍스트)
-        if use_ssml:
-            synthesis_input = texttospeech.SynthesisInput(ssml=text)
-        else:
-            synthesis_input = texttospeech.SynthesisInput(text=text)
-        
-        # TTS 요청
-        response = client.synthesize_speech(
-            input=synthesis_input,
-            voice=voice,
-            audio_config=audio_config
-        )
-        
-        return response.audio_content
+        # 같은 텍스트/감정 조합은 캐시된 오디오를 재사용
+        return get_emotion_tts_bytes(text, emotion=emotion, use_ssml=use_ssml)
         
     except Exception as e:
         print(f"TTS 생성 오류: {e}")
@@ -355,6 +397,16 @@ def tts(req: TextRequest):
     print(f"감정: {req.emotion}")
     print(f"SSML 사용: {req.useSSML}")
     
+    # 스트리밍 모드: 문장별로 합성되는 대로 전송 (chunked)
+    if req.stream:
+        return StreamingResponse(
+            stream_emotion_tts(req.text, emotion=req.emotion, use_ssml=req.useSSML),
+            media_type="audio/mpeg",
+            headers={
+                "Content-Disposition": "attachment; filename=tts_output.mp3"
+            }
+        )
+    
     # 감정이 포함된 TTS 생성
     audio_data = text_to_speech_with_emotion(
         text=req.text,
@@ -390,12 +442,244 @@ def original_tts_function(text: str):
 
 
 
+def generate_chat_reply(text: str, history: Optional[List[dict]] = None) -> str:
+    """
+    라우터로 가장 빠른 정상 백엔드에서 응답 생성 (모두 실패하면 기본 응답)
+    """
+    try:
+        return llm_router.complete(text, history)
+    except ServiceBusyError:
+        # 사용할 수 있는 백엔드가 없음 (로컬 모델 로딩 중 등)
+        raise
+    except Exception as e:
+        print(f"채팅 응답 생성 실패: {e}")
+        return FALLBACK_REPLY
+
+class ChatRequest(TextRequest):
+    lesson_id: Optional[str] = None  # 레슨별로 대화 기록을 따로 유지
+
+def get_chat_history(user: Optional[User], lesson_id: Optional[str]) -> Optional[List[dict]]:
+    """
+    로그인한 사용자의 이전 대화 (토큰 예산 안의 최근 턴과 요약)
+    """
+    if user is None:
+        return None
+    session = conversation_store.get(user.id, lesson_id)
+    return session.context(settings.CHAT_CONTEXT_TOKEN_BUDGET)
+
+def save_chat_turn(user: Optional[User], lesson_id: Optional[str], text: str, reply: str):
+    """
+    대화 기록에 이번 턴 저장 (기본 응답은 저장하지 않음)
+    """
+    if user is None or not reply or reply == FALLBACK_REPLY:
+        return
+    session = conversation_store.get(user.id, lesson_id)
+    session.append("user", text)
+    session.append("assistant", reply)
+
+def get_cached_reply(text: str, history: Optional[List[dict]]) -> Optional[str]:
+    """
+    이전 대화가 없는 질문이면 캐시된 응답 조회 (대화 중에는 맥락에 따라 답이 달라지므로 사용 안 함)
+    """
+    if history:
+        return None
+    return chat_response_cache.get(text, llm_router.prompt_version())
+
+def cache_reply(text: str, history: Optional[List[dict]], reply: str):
+    if history or not reply or reply == FALLBACK_REPLY:
+        return
+    chat_response_cache.put(text, llm_router.prompt_version(), reply)
+
 @router.post("/chat")
-def chat(req: TextRequest):
+def chat(req: ChatRequest, current_user: Optional[User] = Depends(get_current_user_optional)):
     print("👉 Received request:", req)
     print("📥 Input text:", req.text)
 
-    reply = generate_response(req.text)
+    history = get_chat_history(current_user, req.lesson_id)
+    reply = get_cached_reply(req.text, history)
+    if reply is None:
+        reply = generate_chat_reply(req.text, history)
+        cache_reply(req.text, history, reply)
     print("📤 Generated reply:", reply)
 
-    return {"reply": reply}
\ No newline at end of file
+    save_chat_turn(current_user, req.lesson_id, req.text, reply)
+    return {"reply": reply}
+
+@router.delete("/chat/history", status_code=status.HTTP_204_NO_CONTENT)
+def clear_chat_history(lesson_id: Optional[str] = None, current_user: User = Depends(get_current_user)):
+    """
+    서버에 저장된 대화 기록 삭제 (새 대화 시작)
+    """
+    conversation_store.clear(current_user.id, lesson_id)
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+def get_chat_streamer():
+    """
+    스트리밍에 사용할 백엔드의 응답 생성 함수
+
+    스트리밍 시작 전에 백엔드를 고른다 (응답 시작 후에는 상태 코드를 바꿀 수 없음).
+    """
+    return llm_router.select_stream().stream
+
+def to_sse(data: dict, event: Optional[str] = None) -> str:
+    """
+    서버 전송 이벤트(SSE) 메시지 형식으로 변환
+    """
+    message = f"event: {event}\n" if event else ""
+    return message + f"data: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(
+    req: ChatRequest,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    AI 응답을 생성되는 대로 서버 전송 이벤트(SSE)로 전송
+
+    data: {"token": "..."} 메시지를 보내고, 끝나면 event: done 에 전체 응답을 담아 보낸다.
+    클라이언트 연결이 끊기면 생성을 중단한다.
+    """
+    history = get_chat_history(current_user, req.lesson_id)
+    cached_reply = get_cached_reply(req.text, history)
+    streamer = get_chat_streamer() if cached_reply is None else None
+    cancel = threading.Event()
+
+    async def event_stream():
+        if cached_reply is not None:
+            # 캐시된 응답은 한 번에 전송
+            save_chat_turn(current_user, req.lesson_id, req.text, cached_reply)
+            yield to_sse({"token": cached_reply})
+            yield to_sse({"reply": cached_reply}, event="done")
+            return
+
+        tokens = []
+        try:
+            async for token in iterate_in_threadpool(streamer(req.text, cancel, history)):
+                if await request.is_disconnected():
+                    return
+                tokens.append(token)
+                yield to_sse({"token": token})
+            reply = "".join(tokens)
+            cache_reply(req.text, history, reply)
+            save_chat_turn(current_user, req.lesson_id, req.text, reply)
+            yield to_sse({"reply": reply}, event="done")
+        except Exception as e:
+            print(f"채팅 스트리밍 오류: {e}")
+            yield to_sse({"detail": "응답 생성 중 오류가 발생했습니다."}, event="error")
+        finally:
+            # 연결 종료 시 생성 스레드/HTTP 스트림 정리
+            cancel.set()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+@router.post("/chat/speak")
+async def chat_speak(
+    req: ChatRequest,
+    request: Request,
+    current_user: Optional[User] = Depends(get_current_user_optional)
+):
+    """
+    AI 응답 텍스트와 음성을 하나의 서버 전송 이벤트(SSE) 스트림으로 전송
+
+    생성되는 토큰은 data: {"token": "..."} 로 바로 보내고, 문장이 완성될 때마다
+    생성과 동시에 음성을 합성하여 event: audio 에 {"index", "text", "audio"(base64 MP3)} 로
+    문장 순서대로 보낸다. 모든 음성을 보낸 뒤 event: done 에 전체 응답을 담아 보낸다.
+    첫 음성은 전체 응답이 아니라 첫 문장이 생성/합성되는 시간만큼만 기다리면 된다.
+    """
+    history = get_chat_history(current_user, req.lesson_id)
+    cached_reply = get_cached_reply(req.text, history)
+    streamer = get_chat_streamer() if cached_reply is None else None
+    emotion = req.emotion or "friendly"
+    cancel = threading.Event()
+
+    async def token_source():
+        if cached_reply is not None:
+            yield cached_reply
+            return
+        async for token in iterate_in_threadpool(streamer(req.text, cancel, history)):
+            yield token
+
+    async def event_stream():
+        events: asyncio.Queue = asyncio.Queue()
+        sentences: asyncio.Queue = asyncio.Queue()
+        reply = None
+
+        def speak(sentence: str):
+            future = asyncio.wrap_future(submit_synthesis(text_to_speech_with_emotion, sentence, emotion))
+            sentences.put_nowait((sentence, future))
+
+        async def generate():
+            nonlocal reply
+            tokens = []
+            segmenter = SentenceSegmenter()
+            try:
+                async for token in token_source():
+                    tokens.append(token)
+                    await events.put(to_sse({"token": token}))
+                    # 완성된 문장은 생성이 끝나기를 기다리지 않고 바로 합성 시작
+                    for sentence in segmenter.feed(token):
+                        speak(sentence)
+                for sentence in segmenter.flush():
+                    speak(sentence)
+                reply = "".join(tokens)
+                if cached_reply is None:
+                    cache_reply(req.text, history, reply)
+                save_chat_turn(current_user, req.lesson_id, req.text, reply)
+            except Exception as e:
+                print(f"채팅 음성 스트리밍 오류: {e}")
+                await events.put(to_sse({"detail": "응답 생성 중 오류가 발생했습니다."}, event="error"))
+            finally:
+                sentences.put_nowait(None)
+
+        async def send_audio():
+            index = 0
+            while True:
+                item = await sentences.get()
+                if item is None:
+                    return
+                sentence, future = item
+                try:
+                    audio_content = await future
+                except Exception as e:
+                    print(f"TTS 스트리밍 오류 ({sentence}): {e}")
+                    audio_content = None
+                if audio_content:
+                    await events.put(to_sse({
+                        "index": index,
+                        "text": sentence,
+                        "audio": base64.b64encode(audio_content).decode("ascii")
+                    }, event="audio"))
+                index += 1
+
+        async def run():
+            await asyncio.gather(generate(), send_audio())
+            if reply is not None:
+                await events.put(to_sse({"reply": reply}, event="done"))
+            await events.put(None)
+
+        task = asyncio.create_task(run())
+        try:
+            while True:
+                message = await events.get()
+                if message is None or await request.is_disconnected():
+                    break
+                yield message
+        finally:
+            # 연결 종료 시 생성 스레드/HTTP 스트림과 남은 합성 요청 정리
+            cancel.set()
+            task.cancel()
+            while not sentences.empty():
+                item = sentences.get_nowait()
+                if item is not None:
+                    item[1].cancel()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,7 +1,15 @@
 import speech_recognition as sr
+from app.config.settings import settings
+from app.services.audio_io import AudioSource, as_file, read_audio
+from app.services.stt_backends import get_stt_backend
 
-def speech_to_text(audio_file):
+def speech_to_text(audio_file: AudioSource):
+    # 로컬 STT 백엔드를 사용하는 경우 원격 인식기를 거치지 않음
+    if settings.STT_BACKEND != "google":
+        return get_stt_backend().recognize(read_audio(audio_file))
+    
     recognizer = sr.Recognizer()
-    with sr.AudioFile(audio_file) as source:
+    # 파일 경로뿐 아니라 메모리 버퍼/파일 객체도 임시 파일 없이 처리
+    with sr.AudioFile(as_file(audio_file)) as source:
         audio = recognizer.record(source)
     return recognizer.recognize_google(audio)
\ No newline at end of file
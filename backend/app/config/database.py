@@ -1,17 +1,4 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+# 엔진/세션/Base 는 app.db.session 에서 한 번만 생성 (기존 import 경로 호환용)
+from app.db.session import Base, SessionLocal, create_db_engine, engine
 
-from app.config.settings import settings
-
-# 데이터베이스 엔진 생성
-engine = create_engine(
-    settings.DATABASE_URL, connect_args={"check_same_thread": False}
-    if settings.DATABASE_URL.startswith("sqlite") else {}
-)
-
-# 세션 팩토리 생성
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-# SQLAlchemy 모델의 기본 클래스
-Base = declarative_base()
\ No newline at end of file
+__all__ = ["Base", "SessionLocal", "create_db_engine", "engine"]
@@ -9,12 +9,28 @@ class Settings(BaseSettings):
     
     # 데이터베이스 설정
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./app.db")
+    DB_POOL_SIZE: int = 10  # 상시 유지하는 연결 수 (워커 스레드 수에 맞춰 조정)
+    DB_MAX_OVERFLOW: int = 20  # 부하 시 추가로 여는 연결 수
+    DB_POOL_TIMEOUT: float = 10.0  # 연결을 기다리는 최대 시간 (초)
+    DB_POOL_RECYCLE: int = 1800  # 이 시간(초)보다 오래된 연결은 다시 연결
+    DB_POOL_PRE_PING: bool = True  # 사용 전 연결 상태 확인
+    SQLITE_BUSY_TIMEOUT_MS: int = 5000
     
     # JWT 설정
     SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-for-jwt")
     ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24  # 24시간
     REFRESH_TOKEN_EXPIRE_DAYS: int = 7  # 7일
+    AUTH_USER_CACHE_TTL_SECONDS: float = 60.0  # 인증된 사용자 캐시 유지 시간 (0 이면 사용 안 함)
+    AUTH_USER_CACHE_MAX_ENTRIES: int = 10000
+    REVOCATION_SWEEP_SECONDS: float = 600.0  # 만료된 폐기 항목 정리 주기
+    REVOCATION_SWEEP_BATCH: int = 1000  # 한 번에 삭제하는 행 수
+
+    # 비밀번호 해싱 설정
+    BCRYPT_ROUNDS: int = 12  # 바꾸면 기존 해시는 다음 로그인 때 새 설정으로 다시 저장
+    PASSWORD_HASH_WORKERS: int = os.cpu_count() or 2  # 해싱 전용 프로세스 수
+    PASSWORD_HASH_MAX_WAITING: int = 64  # 대기 가능한 해싱 요청 수 (초과 시 429)
+    PASSWORD_HASH_TIMEOUT_SECONDS: float = 5.0
     
     # CORS 설정
     CORS_ORIGINS: List[str] = [
@@ -30,6 +46,69 @@ class Settings(BaseSettings):
     
     # Google Cloud 설정 (TTS 용)
     GOOGLE_APPLICATION_CREDENTIALS: str = os.getenv("GOOGLE_APPLICATION_CREDENTIALS", "")
+    GOOGLE_CLIENT_POOL_SIZE: int = 2  # TTS/STT 별 gRPC 채널(클라이언트) 수
+    GOOGLE_HEALTH_CACHE_SECONDS: float = 5.0  # /health 채널 상태 확인 결과 재사용 시간
+
+    # STT 백엔드 설정
+    STT_BACKEND: str = "google"  # google | vosk (오프라인)
+    STT_LOCAL_MODEL_PATH: str = "models/vosk-model-small-en-us-0.15"
+    STT_LOCAL_WORKERS: int = 2  # 로컬 모델 디코딩 워커 수
+
+    # 음성 평가(STT) 동시 요청 제한
+    STT_MAX_CONCURRENCY: int = 16  # 동시에 처리하는 STT 요청 수
+    STT_MAX_WAITING: int = 64  # 대기 가능한 요청 수 (초과 시 503)
+    STT_TIMEOUT_SECONDS: float = 30.0
+
+    # 채팅 설정
+    CHAT_BACKEND: str = "deepseek"  # 기본 백엔드: deepseek | deepseek_sdk | local (로컬 Zephyr 모델)
+    CHAT_FALLBACK_BACKENDS: List[str] = []  # 기본 백엔드가 느리거나 실패할 때 사용할 백엔드 (예: ["deepseek_sdk", "local"])
+    CHAT_HEDGE_ENABLED: bool = True  # p95 안에 응답이 없으면 다음 원격 백엔드로 중복 요청
+    CHAT_HEDGE_MIN_SAMPLES: int = 20  # p95 계산에 필요한 최소 기록 수
+    CHAT_HEDGE_DEFAULT_DELAY: float = 3.0  # 기록이 부족할 때 hedge 대기 시간 (초)
+    CHAT_ROUTER_FAILURES: int = 3  # 연속 실패 시 해당 백엔드 제외 (자체 차단기가 없는 deepseek_sdk, local)
+    CHAT_ROUTER_RESET_SECONDS: float = 30.0
+    CHAT_ROUTER_WORKERS: int = 32
+    DEEPSEEK_API_URL: str = "https://api.deepseek.com/v1/chat/completions"
+    DEEPSEEK_CONNECT_TIMEOUT: float = 3.0
+    DEEPSEEK_READ_TIMEOUT: float = 30.0
+    DEEPSEEK_MAX_RETRIES: int = 2  # 연결 오류, 429, 5xx 인 경우 재시도 횟수
+    DEEPSEEK_BACKOFF_BASE: float = 0.3  # 재시도 대기 시간 기준 (초, 지수 증가 + 지터)
+    DEEPSEEK_POOL_SIZE: int = 20  # keep-alive 연결 수
+    DEEPSEEK_CIRCUIT_FAILURES: int = 5  # 연속 실패 시 회로 차단
+    DEEPSEEK_CIRCUIT_RESET_SECONDS: float = 30.0  # 차단 후 다시 시도하기까지 시간
+    LOCAL_LLM_MODEL_NAME: str = "HuggingFaceH4/zephyr-7b-alpha"
+    LOCAL_LLM_QUANTIZE_CPU: bool = True  # GPU 가 없으면 int8 동적 양자화
+    LOCAL_LLM_IDLE_UNLOAD_SECONDS: float = 15 * 60  # 이 시간 동안 사용하지 않으면 모델 해제 (0 이면 유지)
+    LOCAL_LLM_MAX_NEW_TOKENS: int = 100
+    LOCAL_LLM_MAX_BATCH_SIZE: int = 8  # 한 번에 함께 생성하는 최대 요청 수
+    LOCAL_LLM_MAX_BATCH_WAIT_MS: float = 20  # 배치를 모으기 위해 기다리는 최대 시간
+    LOCAL_LLM_MAX_QUEUE: int = 64  # 대기 가능한 요청 수 (초과 시 503)
+    LOCAL_LLM_REQUEST_TIMEOUT: float = 60.0
+
+    # 채팅 대화 기록 (서버 측 세션)
+    CHAT_HISTORY_MAX_TURNS: int = 12  # 세션당 보관하는 최근 메시지 수 (링 버퍼)
+    CHAT_CONTEXT_TOKEN_BUDGET: int = 600  # 프롬프트에 넣는 이전 대화의 최대 토큰 수
+    CHAT_SUMMARY_MAX_TOKENS: int = 120  # 밀려난 대화 요약의 최대 토큰 수
+    CHAT_MAX_SESSIONS: int = 10000
+    CHAT_SESSION_TTL_SECONDS: float = 60 * 60  # 1시간 동안 대화가 없으면 세션 만료
+
+    # 채팅 응답 캐시 (대화 기록 없는 요청만)
+    CHAT_CACHE_MAX_ENTRIES: int = 5000
+    CHAT_CACHE_TTL_SECONDS: float = 24 * 60 * 60
+    CHAT_CACHE_SIMILARITY: float = 0.0  # 0 이면 정확히 일치하는 질문만, 0 보다 크면 내용어가 같은 질문 중 단어 Jaccard 유사도 기준
+
+    # 발음 평가 설정
+    G2P_OOV_CACHE_SIZE: int = 4096  # 사전에 없는 단어의 발음 변환 결과 캐시 크기
+    WEAK_WORD_THRESHOLD: float = 70.0  # 이 점수 미만인 단어는 피드백에 포함
+
+    # TTS 오디오 캐시 설정
+    AUDIO_DIR: str = "audio_files"
+    TTS_CACHE_MAX_BYTES: int = 512 * 1024 * 1024  # 512MB
+    TTS_STREAM_WORKERS: int = 8  # 문장 단위 스트리밍 합성 동시 요청 수
+
+    # 레슨 오디오 사전 렌더링 설정
+    PRERENDER_SPEEDS: List[float] = [1.0, 0.7]  # 기본 속도, 초등학생용 느린 속도
+    PRERENDER_WORKERS: int = 4
     
     class Config:
         env_file = ".env"
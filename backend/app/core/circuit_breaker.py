@@ -0,0 +1,108 @@
+import threading
+import time
+from typing import Optional
+
+# 회로 상태
+CLOSED = "closed"  # 정상
+OPEN = "open"  # 차단 (바로 실패)
+HALF_OPEN = "half_open"  # 시험 요청 하나만 허용
+
+class CircuitOpenError(Exception):
+    """외부 서비스 장애로 요청이 차단됨"""
+
+class CircuitBreaker:
+    """
+    외부 서비스 회로 차단기
+
+    연속 실패가 failure_threshold 번이 되면 reset_seconds 동안 요청을 보내지 않고
+    바로 실패시킨다. 그 후 시험 요청 하나가 성공하면 다시 정상 상태로 돌아간다.
+    시험 요청의 결과가 trial_timeout 안에 기록되지 않으면(연결 끊김 등) 다시 차단한다.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        reset_seconds: float = 30.0,
+        trial_timeout: Optional[float] = None
+    ):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_seconds = reset_seconds
+        self.trial_timeout = trial_timeout if trial_timeout is not None else reset_seconds
+        self.state = CLOSED
+        self.failures = 0
+        self.rejected = 0
+        self._opened_at = 0.0
+        self._trial_started = 0.0
+        self._lock = threading.Lock()
+
+    def _expire_trial(self, now: float):
+        # 결과가 기록되지 않은 시험 요청은 실패로 보고 다시 차단
+        if self.state == HALF_OPEN and now - self._trial_started >= self.trial_timeout:
+            self.state = OPEN
+            self._opened_at = now
+
+    def allow(self) -> bool:
+        """
+        요청을 보내도 되는지 확인 (차단 시간이 지나면 시험 요청 하나를 허용)
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            now = time.monotonic()
+            self._expire_trial(now)
+            if self.state == OPEN and now - self._opened_at >= self.reset_seconds:
+                self.state = HALF_OPEN
+                self._trial_started = now
+                return True
+            self.rejected += 1
+            return False
+
+    def available(self) -> bool:
+        """
+        allow() 가 요청을 허용할지 미리 확인 (상태는 바꾸지 않음)
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            # 시험 요청이 진행 중(HALF_OPEN)이면 다른 요청은 허용하지 않음
+            return self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_seconds
+
+    def check(self):
+        """
+        차단 상태면 CircuitOpenError 발생
+        """
+        if not self.allow():
+            raise CircuitOpenError(f"{self.name} 회로 차단 중")
+
+    def record_success(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+
+    def release_trial(self):
+        """
+        결과 없이 끝난 요청 (클라이언트 취소 등) - 실패로 세지 않고
+        진행 중인 시험 요청 자리만 반환하여 다음 요청이 바로 시험할 수 있게 함
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+                self._opened_at = time.monotonic() - self.reset_seconds
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or self.failures >= self.failure_threshold:
+                if self.state != OPEN:
+                    print(f"{self.name} 회로 차단 ({self.failures}회 연속 실패)")
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "rejected": self.rejected,
+        }
@@ -0,0 +1,62 @@
+import asyncio
+from typing import Callable
+
+from fastapi import HTTPException
+
+from app.core.exceptions import ServiceBusyError
+
+class ConcurrencyLimiter:
+    """
+    비동기 동시 실행 제한
+
+    최대 max_concurrency 개까지 동시에 실행하고, 대기 중인 요청이
+    max_waiting 개를 넘으면 기다리지 않고 바로 error (기본 ServiceBusyError) 를 발생시킨다.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        max_waiting: int,
+        error: Callable[[], HTTPException] = ServiceBusyError
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_waiting = max_waiting
+        self.error = error
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._active = 0
+        self._waiting = 0
+
+    async def acquire(self):
+        """
+        실행 자리 확보 (대기 중인 요청이 너무 많으면 error 발생)
+        """
+        if self._semaphore.locked() and self._waiting >= self.max_waiting:
+            self.rejected += 1
+            raise self.error()
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+        self._active += 1
+
+    def release(self):
+        self._active -= 1
+        self._semaphore.release()
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.release()
+
+    def stats(self) -> dict:
+        return {
+            "active": self._active,
+            "waiting": self._waiting,
+            "max_concurrency": self.max_concurrency,
+            "max_waiting": self.max_waiting,
+            "rejected": self.rejected,
+        }
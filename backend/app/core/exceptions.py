@@ -39,4 +39,22 @@ class DatabaseError(HTTPException):
         super().__init__(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=detail
-        )
\ No newline at end of file
+        )
+
+class ServiceBusyError(HTTPException):
+    """서버 과부하 오류 (잠시 후 재시도)"""
+    def __init__(self, detail: str = "요청이 많아 잠시 후 다시 시도해주세요.", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
+
+class TooManyRequestsError(HTTPException):
+    """요청 수 제한 초과 오류 (잠시 후 재시도)"""
+    def __init__(self, detail: str = "요청이 많아 잠시 후 다시 시도해주세요.", retry_after: int = 1):
+        super().__init__(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)}
+        )
@@ -1,10 +1,24 @@
+import asyncio
+import multiprocessing
+import threading
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
-from typing import Optional, Union
+from typing import Optional, Tuple, Union
 import jwt
 from passlib.context import CryptContext
 from app.config.settings import settings
+from app.core.concurrency import ConcurrencyLimiter
+from app.core.exceptions import ServiceBusyError, TooManyRequestsError
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# min_rounds 보다 약한 해시는 verify_and_update 에서 새 해시를 돌려줌
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+    bcrypt__min_rounds=settings.BCRYPT_ROUNDS
+)
 
 def create_access_token(subject: Union[str, int]) -> str:
     """
@@ -15,12 +29,23 @@ def create_access_token(subject: Union[str, int]) -> str:
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt
 
-def create_refresh_token(subject: Union[str, int]) -> tuple[str, datetime]:
+def create_refresh_token(subject: Union[str, int], family: Optional[str] = None) -> tuple[str, datetime]:
     """
     JWT 리프레시 토큰 생성
+
+    jti 는 토큰마다 고유하고, fam 은 한 번의 로그인에서 갱신으로 이어지는
+    토큰들(토큰 패밀리)이 공유한다. family 가 없으면 새 패밀리를 시작한다.
     """
-    expire = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
-    to_encode = {"exp": expire, "sub": str(subject)}
+    now = datetime.utcnow()
+    expire = now + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    to_encode = {
+        "exp": expire,
+        "iat": now,
+        "sub": str(subject),
+        "type": "refresh",
+        "jti": uuid.uuid4().hex,
+        "fam": family or uuid.uuid4().hex,
+    }
     encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
     return encoded_jwt, expire
 
@@ -36,6 +61,107 @@ def get_password_hash(password: str) -> str:
     """
     return pwd_context.hash(password)
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    비밀번호 확인 및 해시 설정이 바뀐 경우 새 해시 반환 (바뀌지 않았으면 None)
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+def dummy_verify_password(plain_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    없는 사용자 로그인 시 실제 확인과 같은 시간이 걸리도록 고정된 해시로 확인 (항상 실패)
+    """
+    pwd_context.dummy_verify()
+    return False, None
+
+# 비밀번호 해싱 전용 프로세스 풀 (bcrypt 는 CPU 를 오래 쓰므로 요청 스레드 풀과 분리)
+_hash_pool: Optional[ProcessPoolExecutor] = None
+_hash_pool_lock = threading.Lock()
+
+# 해싱 풀이 가득 차면 기다리지 않고 429 반환
+password_limiter = ConcurrencyLimiter(
+    settings.PASSWORD_HASH_WORKERS,
+    settings.PASSWORD_HASH_MAX_WAITING,
+    error=TooManyRequestsError
+)
+
+def _get_hash_pool() -> ProcessPoolExecutor:
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is None:
+            # 스레드가 있는 서버 프로세스를 fork 하지 않도록 spawn 사용
+            _hash_pool = ProcessPoolExecutor(
+                max_workers=settings.PASSWORD_HASH_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+        return _hash_pool
+
+def _reset_hash_pool():
+    global _hash_pool
+    with _hash_pool_lock:
+        if _hash_pool is not None:
+            _hash_pool.shutdown(wait=False, cancel_futures=True)
+            _hash_pool = None
+
+def _release_hash_slot(future: asyncio.Future):
+    password_limiter.release()
+    if not future.cancelled():
+        # 시간 초과로 먼저 응답한 작업의 예외는 확인만 하고 무시
+        future.exception()
+
+async def _run_in_hash_pool(fn, *args):
+    """
+    해싱 프로세스 풀에서 실행 (동시 요청 수 제한, 시간 초과 시 503)
+
+    시간 초과로 먼저 응답하더라도 작업 프로세스는 해싱을 계속하므로,
+    제한 자리는 응답 시점이 아니라 작업이 끝날 때 반환한다.
+    """
+    await password_limiter.acquire()
+    loop = asyncio.get_running_loop()
+    try:
+        future = loop.run_in_executor(_get_hash_pool(), fn, *args)
+    except BaseException:
+        password_limiter.release()
+        raise
+    future.add_done_callback(_release_hash_slot)
+
+    try:
+        # shield: 시간 초과 시 작업 future 가 취소되어 자리가 바로 반환되지 않도록 함
+        return await asyncio.wait_for(
+            asyncio.shield(future),
+            timeout=settings.PASSWORD_HASH_TIMEOUT_SECONDS
+        )
+    except asyncio.TimeoutError:
+        raise ServiceBusyError()
+    except BrokenProcessPool:
+        # 작업 프로세스가 비정상 종료된 경우 다음 요청에서 새로 생성
+        print("비밀번호 해싱 프로세스 풀 재시작")
+        _reset_hash_pool()
+        raise ServiceBusyError()
+
+async def verify_and_update_password_async(
+    plain_password: str, hashed_password: str
+) -> Tuple[bool, Optional[str]]:
+    """
+    verify_and_update_password 를 해싱 프로세스 풀에서 실행
+    """
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
+async def dummy_verify_password_async(plain_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    dummy_verify_password 를 해싱 프로세스 풀에서 실행
+    """
+    return await _run_in_hash_pool(dummy_verify_password, plain_password)
+
+async def get_password_hash_async(password: str) -> str:
+    """
+    get_password_hash 를 해싱 프로세스 풀에서 실행
+    """
+    return await _run_in_hash_pool(get_password_hash, password)
+
+def shutdown_hash_pool():
+    _reset_hash_pool()
+
 def decode_token(token: str) -> Optional[dict]:
     """
     JWT 토큰 디코딩
@@ -0,0 +1,61 @@
+import argparse
+from typing import Optional
+
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, MetaData, String, Table, func, inspect
+from sqlalchemy.engine import Engine
+
+from app.db.models import RevokedToken
+
+# 리프레시 토큰을 DB 에 저장하던 이전 테이블 (되돌리기용 정의)
+_legacy_metadata = MetaData()
+legacy_refresh_tokens = Table(
+    "refresh_tokens",
+    _legacy_metadata,
+    Column("id", Integer, primary_key=True, index=True),
+    Column("user_id", Integer, ForeignKey("users.id"), nullable=False),
+    Column("token", String(255), unique=True, nullable=False),
+    Column("expires_at", DateTime(timezone=True), nullable=False),
+    Column("created_at", DateTime(timezone=True), server_default=func.now()),
+)
+
+def upgrade_refresh_token_revocation(engine: Engine) -> dict:
+    """
+    리프레시 토큰 저장 방식 변경 적용 (refresh_tokens -> revoked_tokens)
+
+    리프레시 토큰은 더 이상 DB 에 저장하지 않고 폐기 목록(revoked_tokens)만 유지한다.
+    이전에 발급된 리프레시 토큰(jti/fam 클레임 없음)은 어차피 갱신에 쓸 수 없으므로
+    refresh_tokens 테이블은 삭제한다. 여러 번 실행해도 결과는 같다.
+    """
+    created = not inspect(engine).has_table(RevokedToken.__tablename__)
+    RevokedToken.__table__.create(bind=engine, checkfirst=True)
+
+    dropped = inspect(engine).has_table(legacy_refresh_tokens.name)
+    legacy_refresh_tokens.drop(bind=engine, checkfirst=True)
+    return {"revoked_tokens_created": created, "refresh_tokens_dropped": dropped}
+
+def downgrade_refresh_token_revocation(engine: Engine) -> dict:
+    """
+    변경 되돌리기 (refresh_tokens 테이블 다시 생성, revoked_tokens 삭제)
+
+    되돌린 뒤에는 모든 사용자가 다시 로그인해야 한다.
+    """
+    # users 외래 키를 해석하기 위해 같은 MetaData 에 users 테이블을 불러옴
+    Table("users", _legacy_metadata, autoload_with=engine, extend_existing=True)
+    legacy_refresh_tokens.create(bind=engine, checkfirst=True)
+    RevokedToken.__table__.drop(bind=engine, checkfirst=True)
+    return {"refresh_tokens_created": True, "revoked_tokens_dropped": True}
+
+def run(direction: str = "upgrade", engine: Optional[Engine] = None) -> dict:
+    from app.db.session import engine as default_engine
+
+    engine = engine or default_engine
+    if direction == "downgrade":
+        return downgrade_refresh_token_revocation(engine)
+    return upgrade_refresh_token_revocation(engine)
+
+# 배치 실행: python -m app.db.migrations [upgrade|downgrade]
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="리프레시 토큰 폐기 목록 스키마 변경")
+    parser.add_argument("direction", nargs="?", choices=["upgrade", "downgrade"], default="upgrade")
+    args = parser.parse_args()
+    print(f"스키마 변경 완료 ({args.direction}): {run(args.direction)}")
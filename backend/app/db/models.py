@@ -60,11 +60,16 @@ class UserProgress(Base):
     user = relationship("User", back_populates="progress")
     lesson = relationship("Lesson", back_populates="progress")
 
-class RefreshToken(Base):
-    __tablename__ = "refresh_tokens"
+class RevokedToken(Base):
+    """
+    폐기된 리프레시 토큰 목록
 
-    id = Column(Integer, primary_key=True, index=True)
-    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    token = Column(String(255), unique=True, nullable=False)
-    expires_at = Column(DateTime(timezone=True), nullable=False)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    key 는 사용된 토큰의 jti, 폐기된 토큰 패밀리(fam:<id>), 로그아웃한
+    사용자(user:<id>, revoked_at 이전에 발급된 토큰 모두 폐기) 중 하나다.
+    expires_at 이 지난 행은 더 이상 필요 없으므로 정리 작업이 삭제한다.
+    """
+    __tablename__ = "revoked_tokens"
+
+    key = Column(String(64), primary_key=True)
+    revoked_at = Column(DateTime, nullable=False)
+    expires_at = Column(DateTime, nullable=False, index=True)
@@ -1,15 +1,106 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from collections import deque
+from typing import Deque, Optional
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import declarative_base, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 
 from app.config.settings import settings
 
-# 데이터베이스 엔진 생성
-engine = create_engine(
-    settings.DATABASE_URL,
-    # SQLite를 사용하는 경우에만 적용
-    connect_args={"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-)
+class PoolMetrics:
+    """
+    커넥션 풀 대기 시간 기록 (최근 window 개로 백분위수 계산)
+    """
+
+    def __init__(self, window: int = 1000):
+        self._waits: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.max_wait = 0.0
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._waits.append(seconds)
+            self.checkouts += 1
+            self.max_wait = max(self.max_wait, seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.timeouts += 1
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            waits = sorted(self._waits)
+        if not waits:
+            return None
+        return waits[min(len(waits) - 1, int(q / 100 * len(waits)))]
+
+pool_metrics = PoolMetrics()
+
+class TimedQueuePool(QueuePool):
+    """
+    커넥션을 얻기까지 기다린 시간을 기록하는 QueuePool
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record(time.perf_counter() - started)
+        return connection
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record):
+    # WAL: 읽기와 쓰기가 서로 막지 않음, busy_timeout: 잠금 시 바로 실패하지 않고 대기
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.execute(f"PRAGMA busy_timeout={settings.SQLITE_BUSY_TIMEOUT_MS}")
+    cursor.close()
+
+def create_db_engine(url: Optional[str] = None) -> Engine:
+    """
+    설정(Settings)에 따른 데이터베이스 엔진 생성
+
+    풀 크기는 워커 수에 맞춰 DB_POOL_SIZE/DB_MAX_OVERFLOW 로 조정한다.
+    SQLite 는 WAL 모드와 pragma 를 연결마다 적용한다.
+    """
+    url = url or settings.DATABASE_URL
+    is_sqlite = url.startswith("sqlite")
+    in_memory = is_sqlite and (":memory:" in url or url == "sqlite://")
+
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if is_sqlite:
+        # 여러 스레드(요청 스레드 풀, 백그라운드 작업)에서 연결 사용
+        options["connect_args"] = {"check_same_thread": False}
+    if in_memory:
+        # 메모리 DB 는 연결마다 별도 DB 가 되므로 모든 스레드가 연결 하나를 공유
+        # (기본 SingletonThreadPool 은 스레드마다 연결을 열어 서로 다른 빈 DB 를 봄)
+        options["poolclass"] = StaticPool
+    else:
+        options.update(
+            poolclass=TimedQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    db_engine = create_engine(url, **options)
+    if is_sqlite and not in_memory:
+        event.listen(db_engine, "connect", _set_sqlite_pragmas)
+    return db_engine
+
+# 애플리케이션 전체에서 공유하는 엔진 (app.config.database 도 이 엔진을 사용)
+engine = create_db_engine()
 
 # 세션 팩토리 생성
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
@@ -17,12 +108,36 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 # SQLAlchemy 모델의 기본 클래스
 Base = declarative_base()
 
+def pool_stats() -> dict:
+    """
+    커넥션 풀 사용량과 대기 시간 지표
+    """
+    pool = engine.pool
+    stats = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            overflow=pool.overflow(),
+            idle=pool.checkedin(),
+            max_overflow=settings.DB_MAX_OVERFLOW,
+        )
+    p50, p95 = pool_metrics.percentile(50), pool_metrics.percentile(95)
+    stats.update(
+        checkouts=pool_metrics.checkouts,
+        timeouts=pool_metrics.timeouts,
+        wait_ms_p50=round(p50 * 1000, 2) if p50 is not None else None,
+        wait_ms_p95=round(p95 * 1000, 2) if p95 is not None else None,
+        wait_ms_max=round(pool_metrics.max_wait * 1000, 2),
+    )
+    return stats
+
 # 데이터베이스 초기화 함수
 def init_db():
     """
     데이터베이스 테이블 생성
-    
+
     첫 실행 시 사용
     """
     from app.db.models import Base
-    Base.metadata.create_all(bind=engine)
\ No newline at end of file
+    Base.metadata.create_all(bind=engine)
@@ -1,8 +1,28 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
+from fastapi.staticfiles import StaticFiles
+from starlette.concurrency import run_in_threadpool
 from app.api.routes import auth, lessons
+from app.api.AI_model import model_manager, batch_scheduler
+from app.api.AI_model_DS import teacher
 from app.config.settings import settings
-from app.db.session import init_db
+from app.core.security import password_limiter, shutdown_hash_pool
+from app.db.session import init_db, pool_stats
+from app.services.google_clients import (
+    check_clients_health,
+    tts_clients,
+    speech_clients,
+    speech_async_clients
+)
+from app.services.stt_backends import get_stt_backend
+from app.services.response_cache import chat_response_cache
+from app.services.llm_router import llm_router
+from app.services.user_cache import user_cache
+from app.services.token_revocation import revocation_store
+from app.services.conversation_service import conversation_store
+from app.services.tts_service import audio_cache
+from app.services.speech_service import stt_limiter
 
 app = FastAPI(
     title="영어회화 AI API",
@@ -25,10 +45,57 @@ app.add_middleware(
 app.include_router(auth.router, prefix="/api/auth", tags=["인증"])
 app.include_router(lessons.router, prefix="/api/lessons", tags=["학습"])
 
+# 합성/사전 렌더링된 오디오 파일 제공
+app.mount("/audio", StaticFiles(directory=settings.AUDIO_DIR), name="audio")
+
 @app.get("/")
 async def root():
     return {"message": "영어회화 AI API에 오신 것을 환영합니다!"}
 
+@app.get("/health")
+async def health():
+    """
+    서버 및 외부 클라이언트 상태 확인
+    """
+    # gRPC 채널 확인은 블로킹되므로 이벤트 루프 밖에서 실행
+    google_clients = await run_in_threadpool(check_clients_health)
+    return {
+        "status": "ok",
+        "google_clients": google_clients,
+        "deepseek": teacher.circuit_breaker.stats(),
+        "chat_model": (
+            {**model_manager.status(), "batching": batch_scheduler.stats()}
+            if llm_router.uses("local") else None
+        ),
+        "chat_router": llm_router.stats(),
+    }
+
+@app.get("/health/ready")
+def readiness():
+    """
+    채팅 요청을 처리할 준비가 되었는지 확인 (사용할 수 있는 백엔드가 없으면 503)
+    """
+    if not llm_router.ready():
+        status = model_manager.state if llm_router.uses("local") else "unavailable"
+        return JSONResponse(status_code=503, content={"status": status})
+    return {"status": "ready"}
+
+@app.get("/metrics")
+def metrics():
+    """
+    캐시/동시성 지표
+    """
+    return {
+        "chat_response_cache": chat_response_cache.stats(),
+        "conversations": conversation_store.stats(),
+        "tts_audio_cache": audio_cache.stats(),
+        "stt_limiter": stt_limiter.stats(),
+        "auth_user_cache": user_cache.stats(),
+        "password_hashing": password_limiter.stats(),
+        "token_revocation": revocation_store.stats(),
+        "db_pool": pool_stats(),
+    }
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run("app.main:app", host="0.0.0.0", port=8000, reload=True)
@@ -36,4 +103,25 @@ if __name__ == "__main__":
 
 @app.on_event("startup")
 def startup_event():
-    init_db()
\ No newline at end of file
+    init_db()
+    # 만료된 리프레시 토큰 폐기 항목 정리 작업 시작
+    revocation_store.start()
+    # 로컬 STT 모델은 첫 요청 전에 미리 로드
+    get_stt_backend().warmup()
+    # 로컬 채팅 모델은 백그라운드에서 로드 (서버는 바로 요청을 받음)
+    if llm_router.uses("local"):
+        model_manager.start_loading()
+
+
+@app.on_event("shutdown")
+def shutdown_event():
+    tts_clients.close()
+    speech_clients.close()
+    speech_async_clients.close()
+    get_stt_backend().close()
+    batch_scheduler.shutdown()
+    model_manager.shutdown()
+    llm_router.close()
+    shutdown_hash_pool()
+    revocation_store.stop()
+    teacher.close()
\ No newline at end of file
@@ -47,9 +47,27 @@ class UserProgressResponse(BaseModel):
     class Config:
         orm_mode = True
 
+class WordPronunciation(BaseModel):
+    word: str
+    score: float
+    heard: Optional[str] = None
+
+class FluencyMetricsResponse(BaseModel):
+    duration: float
+    speech_duration: float
+    speech_ratio: float
+    speech_rate: float
+    articulation_rate: float
+    pause_count: int
+    long_pause_count: int
+    mean_pause: float
+    longest_pause: float
+
 class SpeechEvaluationResponse(BaseModel):
     accuracy: float
     pronunciation: float
     fluency: float
     overall_score: float
-    feedback: str
\ No newline at end of file
+    feedback: str
+    word_scores: List[WordPronunciation] = []
+    fluency_metrics: Optional[FluencyMetricsResponse] = None
\ No newline at end of file
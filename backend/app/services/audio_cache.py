@@ -0,0 +1,304 @@
+import os
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Set
+
+
+def make_cache_key(
+    text: str,
+    voice: str,
+    speed: float,
+    language_code: str,
+    encoding: str,
+    **extra
+) -> str:
+    """
+    TTS 합성 파라미터로 콘텐츠 주소(캐시 키) 생성
+
+    같은 텍스트와 음성 설정이면 항상 같은 키가 나오므로
+    키를 그대로 파일명으로 사용할 수 있다.
+    """
+    payload = {
+        "text": text,
+        "voice": voice,
+        "speed": round(float(speed), 3),
+        "language_code": language_code,
+        "encoding": encoding,
+    }
+    payload.update(extra)
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AudioCache:
+    """
+    콘텐츠 주소 기반 오디오 캐시
+
+    메모리의 LRU 인덱스(키 -> 파일 크기)와 디스크 저장소로 구성된다.
+    저장된 전체 크기가 max_bytes 를 넘으면 가장 오래 사용되지 않은 파일부터 삭제한다.
+    pin 한 파일(사전 렌더링되어 DB 에 경로가 기록된 오디오)은 pinned/ 하위 디렉토리로
+    옮겨 LRU 용량 계산과 삭제 대상에서 제외한다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, extension: str = "mp3"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.extension = extension
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._index: "OrderedDict[str, int]" = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._pinned: Set[str] = set()
+        self.pinned_directory = os.path.join(directory, "pinned")
+
+        os.makedirs(self.pinned_directory, exist_ok=True)
+        self._load_index()
+
+    def _cache_keys(self, directory: str):
+        # 캐시 키(sha256)로 된 파일만 관리 대상
+        suffix = f".{self.extension}"
+        for name in os.listdir(directory):
+            key, ext = os.path.splitext(name)
+            if ext == suffix and len(key) == 64:
+                yield key, os.path.join(directory, name)
+
+    def _load_index(self):
+        """
+        디스크에 이미 있는 캐시 파일로 인덱스 복원 (수정 시간 순)
+        """
+        entries = []
+        for key, path in self._cache_keys(self.directory):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, key, stat.st_size))
+
+        with self._lock:
+            self._pinned.update(key for key, _ in self._cache_keys(self.pinned_directory))
+            for _, key, size in sorted(entries):
+                self._index[key] = size
+                self._total_bytes += size
+            self._evict()
+
+    def filename(self, key: str) -> str:
+        return f"{key}.{self.extension}"
+
+    def path(self, key: str) -> str:
+        directory = self.pinned_directory if key in self._pinned else self.directory
+        return os.path.join(directory, self.filename(key))
+
+    def contains(self, key: str) -> bool:
+        """
+        캐시 여부 확인 (적중/실패 통계에 반영하지 않음)
+        """
+        with self._lock:
+            return (key in self._index or key in self._pinned) and os.path.exists(self.path(key))
+
+    def _lookup(self, key: str) -> Optional[str]:
+        """
+        캐시된 파일 경로 조회 (lock 을 잡은 상태에서 호출)
+        """
+        if key in self._pinned:
+            self.hits += 1
+            return self.path(key)
+        if key not in self._index:
+            self.misses += 1
+            return None
+        path = self.path(key)
+        # 외부에서 파일이 삭제된 경우 인덱스에서도 제거
+        if not os.path.exists(path):
+            self._total_bytes -= self._index.pop(key)
+            self.misses += 1
+            return None
+        self._index.move_to_end(key)
+        self.hits += 1
+        return path
+
+    def get_path(self, key: str) -> Optional[str]:
+        """
+        캐시된 파일 경로 조회 (없으면 None)
+        """
+        with self._lock:
+            return self._lookup(key)
+
+    def get_bytes(self, key: str) -> Optional[bytes]:
+        """
+        캐시된 오디오 데이터 조회 (없으면 None)
+
+        파일은 lock 을 잡은 상태에서 열어 두므로, 읽는 도중 다른 요청이
+        삭제(_evict)해도 열린 파일은 끝까지 읽을 수 있다.
+        """
+        with self._lock:
+            path = self._lookup(key)
+            if path is None:
+                return None
+            try:
+                f = open(path, "rb")
+            except OSError:
+                return None
+        with f:
+            return f.read()
+
+    def put(self, key: str, data: bytes) -> str:
+        """
+        오디오 데이터를 저장하고 파일 경로 반환
+        """
+        path = self.path(key)
+        # 임시 파일에 쓴 뒤 교체하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 함
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(temp_path, "wb") as out:
+            out.write(data)
+        os.replace(temp_path, path)
+
+        with self._lock:
+            # 고정된 파일은 LRU 인덱스에 넣지 않음
+            if key in self._pinned:
+                return path
+            if key in self._index:
+                self._total_bytes -= self._index[key]
+            self._index[key] = len(data)
+            self._index.move_to_end(key)
+            self._total_bytes += len(data)
+            self._evict()
+        return path
+
+    def get_or_create(self, key: str, synthesize: Callable[[], bytes]) -> Optional[str]:
+        """
+        캐시에 있으면 경로를 반환하고, 없으면 synthesize() 결과를 저장 후 반환
+
+        같은 키에 대한 동시 요청은 한 번만 합성한다.
+        """
+        path = self.get_path(key)
+        if path is not None:
+            return path
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # 다른 요청이 먼저 합성했을 수 있으므로 다시 확인
+                with self._lock:
+                    if key in self._pinned:
+                        return self.path(key)
+                    if key in self._index and os.path.exists(self.path(key)):
+                        self._index.move_to_end(key)
+                        return self.path(key)
+
+                data = synthesize()
+                if not data:
+                    return None
+                return self.put(key, data)
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def pin(self, key: str) -> Optional[str]:
+        """
+        캐시 파일을 삭제 대상에서 제외하고 고정된 경로 반환 (없으면 None)
+
+        DB 에 경로를 기록하는 오디오(Dialogue.audio_file)는 LRU 삭제로
+        사라지지 않도록 기록하기 전에 pin 한다.
+        """
+        with self._lock:
+            if key in self._pinned:
+                return self.path(key)
+            if key not in self._index:
+                return None
+            source = self.path(key)
+            target = os.path.join(self.pinned_directory, self.filename(key))
+            try:
+                os.replace(source, target)
+            except OSError:
+                return None
+            self._total_bytes -= self._index.pop(key)
+            self._pinned.add(key)
+            return target
+
+    def unpin(self, key: str) -> bool:
+        """
+        고정을 풀어 다시 LRU 삭제 대상으로 되돌림 (가장 먼저 삭제되는 위치)
+        """
+        with self._lock:
+            if key not in self._pinned:
+                return False
+            source = self.path(key)
+            target = os.path.join(self.directory, self.filename(key))
+            try:
+                os.replace(source, target)
+                size = os.path.getsize(target)
+            except OSError:
+                return False
+            self._pinned.discard(key)
+            self._index[key] = size
+            self._index.move_to_end(key, last=False)
+            self._total_bytes += size
+            self._evict()
+            return True
+
+    def pinned_keys(self) -> Set[str]:
+        with self._lock:
+            return set(self._pinned)
+
+    def get_or_create_bytes(self, key: str, synthesize: Callable[[], bytes]) -> Optional[bytes]:
+        """
+        get_or_create 와 같지만 파일 경로 대신 오디오 데이터를 반환
+
+        새로 합성한 경우 저장한 데이터를 그대로 반환하므로 파일을 다시 열지 않는다.
+        """
+        data = self.get_bytes(key)
+        if data is not None:
+            return data
+
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            try:
+                # 다른 요청이 먼저 합성했을 수 있으므로 다시 확인
+                data = self.get_bytes(key)
+                if data is not None:
+                    return data
+
+                data = synthesize()
+                if not data:
+                    return None
+                self.put(key, data)
+                return data
+            finally:
+                with self._lock:
+                    self._key_locks.pop(key, None)
+
+    def _evict(self):
+        """
+        최대 용량을 넘으면 LRU 순서로 삭제 (lock 을 잡은 상태에서 호출)
+        """
+        while self._total_bytes > self.max_bytes and len(self._index) > 1:
+            key, size = self._index.popitem(last=False)
+            self._total_bytes -= size
+            self.evictions += 1
+            try:
+                os.remove(self.path(key))
+            except OSError:
+                pass
+
+    def stats(self) -> dict:
+        """
+        캐시 상태 정보
+        """
+        with self._lock:
+            return {
+                "entries": len(self._index),
+                "pinned": len(self._pinned),
+                "total_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
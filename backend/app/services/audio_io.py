@@ -0,0 +1,55 @@
+import io
+import os
+import asyncio
+from typing import BinaryIO, Union
+
+from fastapi import UploadFile
+
+# 오디오 입력: 파일 경로, 메모리 버퍼(bytes), 파일 객체(UploadFile.file 등)
+AudioSource = Union[str, bytes, bytearray, BinaryIO]
+
+def read_audio(source: AudioSource) -> bytes:
+    """
+    오디오 입력을 bytes 로 읽음 (bytes 는 복사 없이 그대로 반환)
+    """
+    if isinstance(source, bytes):
+        return source
+    if isinstance(source, bytearray):
+        return bytes(source)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f:
+            return f.read()
+    # 파일 객체는 처음부터 읽음
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source.read()
+
+async def read_audio_async(source: AudioSource) -> bytes:
+    """
+    read_audio 의 비동기 버전 (디스크 읽기가 필요한 경우만 executor 사용)
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return read_audio(source)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, read_audio, source)
+
+def as_file(source: AudioSource) -> Union[str, BinaryIO]:
+    """
+    파일 경로나 파일 객체가 필요한 라이브러리에 넘길 수 있는 형태로 변환
+    """
+    if isinstance(source, (bytes, bytearray)):
+        return io.BytesIO(source)
+    if hasattr(source, "seek"):
+        source.seek(0)
+    return source
+
+async def load_upload(upload: UploadFile) -> bytes:
+    """
+    업로드된 오디오를 평가용 입력(bytes)으로 읽음
+
+    STT 와 유창성 분석 모두 오디오 전체를 메모리에 올려야 하므로 크기와 관계없이
+    한 번만 읽고, 이후 단계에서는 같은 버퍼를 복사 없이 사용한다.
+    (디스크로 넘어간 큰 업로드는 UploadFile.read 가 스레드에서 읽음)
+    """
+    await upload.seek(0)
+    return await upload.read()
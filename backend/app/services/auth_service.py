@@ -1,7 +1,16 @@
-from datetime import datetime
+from datetime import datetime, timedelta
+from typing import Optional, Tuple
 from sqlalchemy.orm import Session
-from app.db.models import User, RefreshToken
-from app.core.security import verify_password, get_password_hash, create_access_token, create_refresh_token
+from app.config.settings import settings
+from app.db.models import User
+from app.core.security import (
+    verify_password,
+    get_password_hash,
+    create_access_token,
+    create_refresh_token,
+    decode_token
+)
+from app.services.token_revocation import revocation_store, family_key, user_key
 
 def authenticate_user(db: Session, email: str, password: str):
     """
@@ -27,37 +36,41 @@ def create_user(db: Session, name: str, email: str, password: str):
     db.refresh(db_user)
     return db_user
 
-def create_user_tokens(db: Session, user_id: int):
+def create_user_tokens(user_id: int, family: Optional[str] = None) -> Tuple[str, str]:
     """
-    사용자 인증 토큰 생성 및 저장
+    사용자 인증 토큰 생성 (리프레시 토큰은 DB 에 저장하지 않음)
     """
     access_token = create_access_token(user_id)
-    refresh_token_str, expires_at = create_refresh_token(user_id)
-    
-    # 기존 리프레시 토큰 삭제
-    db.query(RefreshToken).filter(RefreshToken.user_id == user_id).delete()
-    
-    # 새 리프레시 토큰 저장
-    db_refresh_token = RefreshToken(
-        user_id=user_id,
-        token=refresh_token_str,
-        expires_at=expires_at
-    )
-    db.add(db_refresh_token)
-    db.commit()
-    
+    refresh_token_str, _ = create_refresh_token(user_id, family)
     return access_token, refresh_token_str
 
-def validate_refresh_token(db: Session, refresh_token: str):
+def rotate_refresh_token(db: Session, refresh_token: str) -> Optional[Tuple[str, str]]:
     """
-    리프레시 토큰 유효성 검증
+    리프레시 토큰을 사용하고 같은 패밀리의 새 토큰 발급 (유효하지 않으면 None)
+
+    토큰 하나는 한 번만 사용할 수 있다. 이미 사용된 토큰이 다시 오면
+    탈취된 것으로 보고 그 패밀리 전체를 폐기한다.
     """
-    db_token = db.query(RefreshToken).filter(
-        RefreshToken.token == refresh_token,
-        RefreshToken.expires_at > datetime.utcnow()
-    ).first()
-    
-    if not db_token:
+    payload = decode_token(refresh_token)
+    if payload is None or payload.get("type") != "refresh" or not payload.get("jti") or not payload.get("fam"):
+        return None
+
+    if revocation_store.is_revoked(db, payload):
+        return None
+
+    expires_at = datetime.utcfromtimestamp(payload["exp"])
+    if not revocation_store.claim(db, payload["jti"], expires_at):
+        print(f"리프레시 토큰 재사용 감지 (사용자 {payload['sub']}), 토큰 패밀리 폐기")
+        revocation_store.revoke(db, family_key(payload["fam"]), expires_at)
+        db.commit()
         return None
-    
-    return db_token
\ No newline at end of file
+
+    return create_user_tokens(int(payload["sub"]), payload["fam"])
+
+def revoke_user_tokens(db: Session, user_id: int):
+    """
+    지금까지 발급된 사용자의 리프레시 토큰 모두 폐기 (로그아웃)
+    """
+    expires_at = datetime.utcnow() + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+    revocation_store.revoke(db, user_key(user_id), expires_at)
+    db.commit()
@@ -0,0 +1,143 @@
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Deque, List, NamedTuple, Optional, Tuple
+
+from app.config.settings import settings
+
+class Turn(NamedTuple):
+    """
+    대화 한 턴 (학생 또는 선생님 메시지)
+    """
+    role: str  # user | assistant
+    content: str
+    tokens: int
+
+def estimate_tokens(text: str) -> int:
+    """
+    토큰 수 추정 (영어 약 4자당 1토큰, 토크나이저 없이 빠르게 계산)
+    """
+    return len(text) // 4 + 1
+
+class ConversationSession:
+    """
+    사용자/레슨별 대화 기록
+
+    최근 턴만 고정 크기 링 버퍼(deque)에 보관하고, 밀려난 턴은
+    짧은 요약으로 합쳐 두므로 세션당 메모리가 일정하게 유지된다.
+    """
+
+    def __init__(self, max_turns: int, summary_max_tokens: int):
+        self.turns: Deque[Turn] = deque(maxlen=max_turns)
+        self.summary = ""
+        self.summary_max_tokens = summary_max_tokens
+        self.updated_at = time.monotonic()
+        self.lock = threading.Lock()
+
+    def append(self, role: str, content: str):
+        with self.lock:
+            if len(self.turns) == self.turns.maxlen:
+                self._summarize(self.turns[0])
+            self.turns.append(Turn(role, content, estimate_tokens(content)))
+            self.updated_at = time.monotonic()
+
+    def _summarize(self, turn: Turn):
+        """
+        오래된 턴을 요약에 추가 (첫 문장만, 최근 내용 위주로 길이 제한)
+        """
+        speaker = "Student" if turn.role == "user" else "Teacher"
+        first_sentence = turn.content.strip().split("\n")[0]
+        for mark in (". ", "? ", "! "):
+            first_sentence = first_sentence.split(mark)[0]
+        self.summary = f"{self.summary} {speaker}: {first_sentence.strip()}".strip()
+
+        max_chars = self.summary_max_tokens * 4
+        if len(self.summary) > max_chars:
+            self.summary = "..." + self.summary[-max_chars:]
+
+    def context(self, token_budget: int) -> List[dict]:
+        """
+        토큰 예산 안에서 요약과 최근 턴을 메시지 목록으로 반환 (오래된 턴부터 제외)
+        """
+        with self.lock:
+            turns = list(self.turns)
+            summary = self.summary
+
+        messages: List[dict] = []
+        used = 0
+        if summary:
+            summary_message = {"role": "system", "content": f"Earlier in this conversation: {summary}"}
+            used = estimate_tokens(summary_message["content"])
+
+        for turn in reversed(turns):
+            if used + turn.tokens > token_budget:
+                break
+            messages.append({"role": turn.role, "content": turn.content})
+            used += turn.tokens
+        messages.reverse()
+
+        if summary and used <= token_budget:
+            messages.insert(0, summary_message)
+        return messages
+
+class ConversationStore:
+    """
+    서버 측 대화 세션 저장소 (사용자, 레슨) 단위
+
+    오래 사용하지 않은 세션은 만료되고, 세션 수가 max_sessions 를 넘으면
+    가장 오래 전에 사용한 세션부터 제거한다.
+    """
+
+    def __init__(self, max_sessions: int, ttl_seconds: float, max_turns: int, summary_max_tokens: int):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_turns = max_turns
+        self.summary_max_tokens = summary_max_tokens
+        self._sessions: "OrderedDict[Tuple[str, str], ConversationSession]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(user_id, lesson_id: Optional[str]) -> Tuple[str, str]:
+        return str(user_id), lesson_id or ""
+
+    def get(self, user_id, lesson_id: Optional[str] = None) -> ConversationSession:
+        """
+        세션 조회 (없거나 만료되었으면 새로 생성)
+        """
+        key = self._key(user_id, lesson_id)
+        now = time.monotonic()
+        with self._lock:
+            session = self._sessions.get(key)
+            if session is not None and now - session.updated_at > self.ttl_seconds:
+                session = None
+            if session is None:
+                session = ConversationSession(self.max_turns, self.summary_max_tokens)
+                self._sessions[key] = session
+            self._sessions.move_to_end(key)
+            self._evict(now)
+        return session
+
+    def _evict(self, now: float):
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+        # 가장 오래된 것부터 만료 확인
+        while self._sessions:
+            key, session = next(iter(self._sessions.items()))
+            if now - session.updated_at <= self.ttl_seconds:
+                break
+            self._sessions.pop(key)
+
+    def clear(self, user_id, lesson_id: Optional[str] = None):
+        with self._lock:
+            self._sessions.pop(self._key(user_id, lesson_id), None)
+
+    def stats(self) -> dict:
+        return {"sessions": len(self._sessions), "max_sessions": self.max_sessions}
+
+# 프로세스 전체에서 공유하는 대화 저장소
+conversation_store = ConversationStore(
+    max_sessions=settings.CHAT_MAX_SESSIONS,
+    ttl_seconds=settings.CHAT_SESSION_TTL_SECONDS,
+    max_turns=settings.CHAT_HISTORY_MAX_TURNS,
+    summary_max_tokens=settings.CHAT_SUMMARY_MAX_TOKENS
+)
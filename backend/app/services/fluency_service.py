@@ -0,0 +1,179 @@
+import io
+import wave
+from typing import TYPE_CHECKING, NamedTuple, Optional, Tuple
+
+# numpy 는 첫 분석 시 로드 (서버 시작 시 import 비용 절약)
+if TYPE_CHECKING:
+    import numpy as np
+
+# 분석 프레임 설정
+FRAME_MS = 25
+HOP_MS = 10
+DEFAULT_SAMPLE_RATE = 16000  # 헤더 없는 LINEAR16 입력의 샘플레이트
+
+# 음성 구간 검출 설정
+NOISE_PERCENTILE = 10  # 하위 10% 프레임 에너지를 배경 소음으로 간주
+SPEECH_MARGIN_DB = 12.0  # 배경 소음보다 이만큼 크면 음성
+PEAK_RANGE_DB = 35.0  # 최대 에너지보다 이만큼 작으면 음성이 아님
+MIN_SPEECH_SECONDS = 0.08  # 이보다 짧은 음성 구간은 잡음으로 제거
+MIN_PAUSE_SECONDS = 0.25  # 이보다 짧은 무음은 쉼으로 보지 않음
+LONG_PAUSE_SECONDS = 0.7  # 긴 쉼 (머뭇거림) 기준
+
+# 초등학생 영어 학습자 기준 적정 발화 속도 (단어/초)
+TARGET_RATE_RANGE = (1.2, 2.8)
+
+class FluencyMetrics(NamedTuple):
+    """
+    발화 오디오의 유창성 지표
+    """
+    duration: float  # 전체 길이 (초)
+    speech_duration: float  # 음성 구간 길이 합 (초)
+    speech_ratio: float  # 첫 발화 ~ 마지막 발화 사이에서 음성이 차지하는 비율
+    speech_rate: float  # 단어/초 (첫 발화 ~ 마지막 발화 기준)
+    articulation_rate: float  # 단어/초 (음성 구간만 기준)
+    pause_count: int
+    long_pause_count: int
+    mean_pause: float  # 평균 쉼 길이 (초)
+    longest_pause: float
+
+def decode_wav(content: bytes, raw_pcm: bool = False) -> Tuple["np.ndarray", int]:
+    """
+    WAV(16bit PCM) 오디오를 -1.0~1.0 mono 배열로 변환
+
+    헤더 없는 LINEAR16(16kHz, mono) 은 raw_pcm=True 일 때만 허용한다
+    (webm 등 다른 형식을 PCM 으로 읽으면 그럴듯한 잘못된 지표가 나오므로).
+    """
+    import numpy as np
+
+    sample_rate = DEFAULT_SAMPLE_RATE
+    channels = 1
+    frames = content
+    if content[:4] == b"RIFF":
+        with wave.open(io.BytesIO(content), "rb") as wav:
+            if wav.getsampwidth() != 2:
+                raise ValueError("16bit PCM WAV 만 지원합니다.")
+            sample_rate = wav.getframerate()
+            channels = wav.getnchannels()
+            frames = wav.readframes(wav.getnframes())
+    elif not raw_pcm:
+        raise ValueError("WAV 형식이 아닌 오디오입니다.")
+
+    # 홀수 길이 조각은 마지막 바이트를 버림
+    usable = len(frames) - len(frames) % (2 * channels)
+    samples = np.frombuffer(frames[:usable], dtype="<i2").astype(np.float32) / 32768.0
+    if channels > 1:
+        samples = samples.reshape(-1, channels).mean(axis=1)
+    return samples, sample_rate
+
+def frame_energy(samples: "np.ndarray", sample_rate: int) -> "np.ndarray":
+    """
+    프레임별 RMS 에너지 (dB)
+    """
+    import numpy as np
+
+    frame_length = int(sample_rate * FRAME_MS / 1000)
+    hop = int(sample_rate * HOP_MS / 1000)
+    if len(samples) < frame_length:
+        return np.empty(0, dtype=np.float32)
+
+    frames = np.lib.stride_tricks.sliding_window_view(samples, frame_length)[::hop]
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    return 20.0 * np.log10(rms + 1e-10)
+
+def _runs(mask: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    불리언 배열에서 True 구간의 (시작, 끝) 인덱스
+    """
+    import numpy as np
+
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+def detect_speech(energy: "np.ndarray") -> Tuple["np.ndarray", "np.ndarray"]:
+    """
+    에너지 임계값으로 음성 구간 검출 (프레임 단위 시작, 끝 인덱스)
+    """
+    import numpy as np
+
+    if energy.size == 0:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+
+    noise_floor = np.percentile(energy, NOISE_PERCENTILE)
+    threshold = max(noise_floor + SPEECH_MARGIN_DB, energy.max() - PEAK_RANGE_DB)
+    voiced = energy > threshold
+
+    # 짧은 무음은 음성 구간에 포함
+    min_pause_frames = int(MIN_PAUSE_SECONDS * 1000 / HOP_MS)
+    gap_starts, gap_ends = _runs(~voiced)
+    short_gaps = (gap_ends - gap_starts) < min_pause_frames
+    # 앞뒤 무음은 쉼이 아니므로 그대로 둠
+    short_gaps &= (gap_starts > 0) & (gap_ends < voiced.size)
+    for start, end in zip(gap_starts[short_gaps], gap_ends[short_gaps]):
+        voiced[start:end] = True
+
+    # 너무 짧은 음성 구간은 잡음으로 제거
+    starts, ends = _runs(voiced)
+    long_enough = (ends - starts) >= int(MIN_SPEECH_SECONDS * 1000 / HOP_MS)
+    return starts[long_enough], ends[long_enough]
+
+def analyze_fluency(content: bytes, word_count: int, raw_pcm: bool = False) -> Optional[FluencyMetrics]:
+    """
+    발화 오디오를 분석하여 유창성 지표 계산
+
+    Args:
+        content: WAV 오디오 (raw_pcm=True 이면 헤더 없는 LINEAR16(16kHz, mono))
+        word_count: 인식된 단어 수
+        raw_pcm: 헤더 없는 LINEAR16 입력인지 (WebSocket 스트리밍 경로)
+
+    Returns:
+        유창성 지표 (디코딩할 수 없거나 음성이 없으면 None)
+    """
+    import numpy as np
+
+    try:
+        samples, sample_rate = decode_wav(content, raw_pcm)
+    except (wave.Error, ValueError, EOFError) as e:
+        print(f"유창성 분석용 오디오 디코딩 실패: {e}")
+        return None
+
+    starts, ends = detect_speech(frame_energy(samples, sample_rate))
+    if starts.size == 0:
+        return None
+
+    hop_seconds = HOP_MS / 1000
+    speech_duration = float((ends - starts).sum()) * hop_seconds
+    # 첫 발화 시작부터 마지막 발화 끝까지 (앞뒤 무음 제외)
+    active_duration = float(ends[-1] - starts[0]) * hop_seconds
+    pauses = (starts[1:] - ends[:-1]) * hop_seconds
+
+    return FluencyMetrics(
+        duration=len(samples) / sample_rate,
+        speech_duration=speech_duration,
+        speech_ratio=speech_duration / active_duration if active_duration else 0.0,
+        speech_rate=word_count / active_duration if active_duration else 0.0,
+        articulation_rate=word_count / speech_duration if speech_duration else 0.0,
+        pause_count=int(pauses.size),
+        long_pause_count=int(np.count_nonzero(pauses >= LONG_PAUSE_SECONDS)),
+        mean_pause=float(pauses.mean()) if pauses.size else 0.0,
+        longest_pause=float(pauses.max()) if pauses.size else 0.0
+    )
+
+def score_audio_fluency(metrics: FluencyMetrics) -> float:
+    """
+    유창성 지표 기반 점수 (0-100)
+
+    발화 속도가 적정 범위에 있는지와 머뭇거림(긴 쉼) 정도로 계산한다.
+    """
+    low, high = TARGET_RATE_RANGE
+    if low <= metrics.speech_rate <= high:
+        rate_score = 100.0
+    elif metrics.speech_rate < low:
+        rate_score = 100.0 * metrics.speech_rate / low
+    else:
+        rate_score = max(0.0, 100.0 - 50.0 * (metrics.speech_rate - high) / high)
+
+    # 긴 쉼 하나당 감점, 음성 비율이 낮을수록 감점
+    pause_score = max(0.0, 100.0 - 15.0 * metrics.long_pause_count)
+    continuity_score = min(100.0, metrics.speech_ratio * 125.0)
+
+    return rate_score * 0.5 + pause_score * 0.3 + continuity_score * 0.2
@@ -0,0 +1,221 @@
+import asyncio
+import inspect
+import itertools
+import threading
+import time
+from typing import Any, Callable, List, Optional, Tuple
+
+from app.config.settings import settings
+
+# Google Cloud 인증
+# 환경변수가 설정되어 있으면 자동으로 인증
+# 인증을 위해서는 Google Cloud Platform 에 접속하여 키를 발급받고
+# 해당 키 파일을 cmd로 등록한다.
+# window용 set GOOGLE_APPLICATION_CREDENTIALS=D:\conversation_v2\backend\app\api\routes\ssml-key.json
+# Linux/macOS용 export GOOGLE_APPLICATION_CREDENTIALS="D:\conversation_v2\backend\app\api\routes\ssml-key.json"
+# PowerShell용 $env:GOOGLE_APPLICATION_CREDENTIALS = "D:\conversation_v2\backend\app\api\routes\ssml-key.json"
+
+class ClientPool:
+    """
+    Google Cloud 클라이언트 풀
+
+    클라이언트는 처음 사용할 때 생성되며(지연 초기화), 각 클라이언트가
+    자신의 gRPC 채널을 가지므로 size 개의 채널을 번갈아 사용한다.
+    연결 오류가 나면 해당 클라이언트를 새로 만들어 한 번 재시도한다.
+    """
+
+    def __init__(self, name: str, factory: Callable[[], Any], size: int = 1):
+        self.name = name
+        self.factory = factory
+        self.size = max(1, size)
+        self.reconnects = 0
+        self._clients: List[Optional[Any]] = [None] * self.size
+        self._counter = itertools.count()
+        self._lock = threading.Lock()
+
+    def _slot(self) -> int:
+        return next(self._counter) % self.size
+
+    def _get_slot(self, slot: int) -> Any:
+        client = self._clients[slot]
+        if client is not None:
+            return client
+        with self._lock:
+            if self._clients[slot] is None:
+                self._clients[slot] = self.factory()
+            return self._clients[slot]
+
+    def get(self) -> Any:
+        """
+        클라이언트 하나를 가져옴 (라운드 로빈)
+        """
+        return self._get_slot(self._slot())
+
+    def reset(self, slot: int, client: Optional[Any] = None):
+        """
+        해당 슬롯을 비워 다음 사용 시 클라이언트가 다시 생성되도록 함
+
+        기존 클라이언트는 다른 스레드가 아직 사용 중일 수 있으므로 닫지 않고,
+        참조가 모두 사라지면 GC 가 채널을 정리하도록 둔다.
+        client 를 주면 슬롯이 아직 그 클라이언트일 때만 비운다
+        (다른 스레드가 이미 새로 만든 클라이언트를 버리지 않도록).
+        """
+        with self._lock:
+            current = self._clients[slot]
+            if current is None or (client is not None and current is not client):
+                return
+            self._clients[slot] = None
+            self.reconnects += 1
+
+    def run(self, call: Callable[[Any], Any]) -> Any:
+        """
+        클라이언트로 call 을 실행 (연결 오류 시 클라이언트를 재생성해 한 번 재시도)
+        """
+        slot = self._slot()
+        client = self._get_slot(slot)
+        try:
+            return call(client)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            print(f"{self.name} 클라이언트 재연결: {e}")
+            self.reset(slot, client)
+            return call(self._get_slot(slot))
+
+    async def run_async(self, call: Callable[[Any], Any]) -> Any:
+        """
+        비동기 클라이언트로 call 을 실행 (run 의 비동기 버전)
+        """
+        slot = self._slot()
+        client = self._get_slot(slot)
+        try:
+            return await call(client)
+        except Exception as e:
+            if not _is_connection_error(e):
+                raise
+            print(f"{self.name} 클라이언트 재연결: {e}")
+            self.reset(slot, client)
+            return await call(self._get_slot(slot))
+
+    def check_health(self, timeout: float = 1.0) -> dict:
+        """
+        생성된 클라이언트의 gRPC 채널 상태 확인 (응답 없는 채널은 재생성 대상으로 초기화)
+        """
+        healthy = 0
+        initialized = 0
+        for slot, client in enumerate(list(self._clients)):
+            if client is None:
+                continue
+            initialized += 1
+            if _channel_ready(client, timeout):
+                healthy += 1
+            else:
+                self.reset(slot, client)
+        return {
+            "pool_size": self.size,
+            "initialized": initialized,
+            "healthy": healthy,
+            "reconnects": self.reconnects,
+        }
+
+    def close(self):
+        """
+        모든 클라이언트 종료
+        """
+        with self._lock:
+            clients = self._clients
+            self._clients = [None] * self.size
+        for client in clients:
+            _close_client(client)
+
+def _is_connection_error(error: Exception) -> bool:
+    """
+    채널 재생성으로 해결될 수 있는 오류인지 확인
+    """
+    try:
+        from google.api_core import exceptions as api_exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (api_exceptions.ServiceUnavailable, api_exceptions.DeadlineExceeded))
+
+def _channel_ready(client: Any, timeout: float) -> bool:
+    """
+    클라이언트의 gRPC 채널이 연결 가능한 상태인지 확인
+    """
+    try:
+        import grpc
+        channel = client.transport.grpc_channel
+        # 비동기(aio) 채널은 동기적으로 확인할 수 없으므로 정상으로 간주
+        if isinstance(channel, grpc.aio.Channel):
+            return True
+        grpc.channel_ready_future(channel).result(timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+def _close_client(client: Optional[Any]):
+    if client is None:
+        return
+    try:
+        result = client.transport.close()
+        # 비동기 클라이언트는 close 가 코루틴을 반환
+        if inspect.isawaitable(result):
+            try:
+                asyncio.get_running_loop().create_task(result)
+            except RuntimeError:
+                result.close()
+    except Exception:
+        pass
+
+def _create_tts_client():
+    from google.cloud import texttospeech
+    return texttospeech.TextToSpeechClient()
+
+def _create_speech_client():
+    from google.cloud import speech_v1p1beta1 as speech
+    return speech.SpeechClient()
+
+def _create_speech_async_client():
+    from google.cloud import speech_v1p1beta1 as speech
+    return speech.SpeechAsyncClient()
+
+# 프로세스 전체에서 공유하는 클라이언트 풀
+tts_clients = ClientPool("TTS", _create_tts_client, settings.GOOGLE_CLIENT_POOL_SIZE)
+speech_clients = ClientPool("STT", _create_speech_client, settings.GOOGLE_CLIENT_POOL_SIZE)
+# 비동기 STT 클라이언트는 이벤트 루프 안에서 처음 사용할 때 생성됨
+speech_async_clients = ClientPool("STT(async)", _create_speech_async_client, settings.GOOGLE_CLIENT_POOL_SIZE)
+
+def get_tts_client():
+    """
+    공유 TTS 클라이언트 가져오기
+    """
+    return tts_clients.get()
+
+def get_speech_client():
+    """
+    공유 STT 클라이언트 가져오기
+    """
+    return speech_clients.get()
+
+# 최근 상태 확인 결과 (확인 시각, 결과)
+_health_cache: Optional[Tuple[float, dict]] = None
+_health_lock = threading.Lock()
+
+def check_clients_health() -> dict:
+    """
+    모든 클라이언트 풀의 상태 확인 (채널 확인이 블로킹되므로 스레드에서 호출)
+
+    GOOGLE_HEALTH_CACHE_SECONDS 동안은 마지막 결과를 재사용하고,
+    동시에 들어온 확인 요청은 한 번만 채널을 확인한다.
+    """
+    global _health_cache
+    with _health_lock:
+        if _health_cache is not None and time.monotonic() - _health_cache[0] < settings.GOOGLE_HEALTH_CACHE_SECONDS:
+            return _health_cache[1]
+        result = {
+            "tts": tts_clients.check_health(),
+            "stt": speech_clients.check_health(),
+            "stt_async": speech_async_clients.check_health(),
+        }
+        _health_cache = (time.monotonic(), result)
+        return result
@@ -2,6 +2,7 @@ from sqlalchemy.orm import Session
 from app.db.models import Lesson, Dialogue, UserProgress
 from typing import List, Optional
 from app.schemas.lesson import LessonCreate
+from app.services.scoring_service import expected_line_index
 
 def get_all_lessons(db: Session):
     """
@@ -13,7 +14,11 @@ def get_lesson_by_id(db: Session, lesson_id: str) -> Optional[Lesson]:
     """
     ID로 레슨 조회
     """
-    return db.query(Lesson).filter(Lesson.id == lesson_id, Lesson.is_active == True).first()
+    lesson = db.query(Lesson).filter(Lesson.id == lesson_id, Lesson.is_active == True).first()
+    if lesson:
+        # 평가에 쓰일 학생 대사 채점 자료를 미리 준비
+        expected_line_index.build(lesson.dialogues)
+    return lesson
 
 def create_lesson(db: Session, lesson_data: LessonCreate) -> Lesson:
     """
@@ -51,6 +56,9 @@ def add_dialogue_to_lesson(
     db.add(dialogue)
     db.commit()
     db.refresh(dialogue)
+    
+    # 학생 대사 채점 자료 갱신
+    expected_line_index.put(dialogue.id, dialogue.student_line)
     return dialogue
 
 def get_user_progress(db: Session, user_id: int) -> List[UserProgress]:
@@ -0,0 +1,409 @@
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Callable, Deque, Dict, Iterator, List, Optional
+
+from app.config.settings import settings
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core.exceptions import ServiceBusyError
+
+class ChatBackend(ABC):
+    """
+    채팅 응답 생성 백엔드 인터페이스
+
+    complete 는 실패하면 예외를 발생시켜야 라우터가 다른 백엔드로 넘어갈 수 있다.
+    """
+    name = "base"
+    remote = True
+
+    def is_available(self) -> bool:
+        return True
+
+    def is_loading(self) -> bool:
+        """
+        준비 중이라 잠시 후 사용할 수 있는지 (이 경우 라우터는 503 을 반환)
+        """
+        return False
+
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        """
+        백엔드가 직접 관리하는 회로 차단기 (없으면 라우터가 만들어 관리)
+        """
+        return None
+
+    @abstractmethod
+    def prompt_version(self) -> str:
+        """
+        응답 캐시 키에 포함할 프롬프트/모델 버전
+        """
+
+    @abstractmethod
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        """
+        전체 응답 생성 (실패 시 예외 발생)
+        """
+
+    def stream(
+        self,
+        text: str,
+        cancel: Optional[threading.Event] = None,
+        history: Optional[List[dict]] = None
+    ) -> Iterator[str]:
+        # 스트리밍을 지원하지 않는 백엔드는 전체 응답을 한 번에 반환
+        yield self.complete(text, history)
+
+class DeepSeekBackend(ChatBackend):
+    """
+    DeepSeek HTTP API (AI_model_DS.EnglishTeacher)
+    """
+    name = "deepseek"
+
+    def circuit_breaker(self) -> Optional[CircuitBreaker]:
+        # EnglishTeacher 가 요청마다 확인하고 결과를 기록하는 차단기를 그대로 사용
+        from app.api.AI_model_DS import teacher
+        return teacher.circuit_breaker
+
+    def prompt_version(self) -> str:
+        from app.api.AI_model_DS import PROMPT_VERSION
+        return PROMPT_VERSION
+
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        from app.api.AI_model_DS import teacher
+        return teacher.complete(text, history)
+
+    def stream(self, text, cancel=None, history=None) -> Iterator[str]:
+        from app.api.AI_model_DS import teacher
+        return teacher.stream_response(text, cancel, history)
+
+class DeepSeekSDKBackend(ChatBackend):
+    """
+    DeepSeek 공식 SDK 클라이언트 (deepseek 패키지가 설치된 경우만 사용)
+    """
+    name = "deepseek_sdk"
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
+
+    def is_available(self) -> bool:
+        try:
+            self._get_client()
+            return True
+        except ImportError:
+            return False
+
+    def _get_client(self):
+        if self._client is not None:
+            return self._client
+        with self._lock:
+            if self._client is None:
+                from deepseek import DeepseekChat
+                from app.api.AI_model_DS import DEEPSEEK_API_KEY
+                self._client = DeepseekChat(api_key=DEEPSEEK_API_KEY)
+        return self._client
+
+    def prompt_version(self) -> str:
+        from app.api.AI_model_DS import PROMPT_VERSION
+        return PROMPT_VERSION
+
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        from app.api.AI_model_DS import TEACHER_PROMPT
+        response = self._get_client().chat.completions.create(
+            model="deepseek-chat",
+            messages=[
+                {"role": "system", "content": TEACHER_PROMPT},
+                *(history or []),
+                {"role": "user", "content": text}
+            ],
+            temperature=0.7,
+            max_tokens=150,
+        )
+        return response.choices[0].message.content
+
+class LocalBackend(ChatBackend):
+    """
+    로컬 Zephyr 모델 (AI_model)
+    """
+    name = "local"
+    remote = False
+
+    def is_available(self) -> bool:
+        from app.api.AI_model import model_manager
+        if model_manager.is_ready():
+            return True
+        model_manager.start_loading()
+        return False
+
+    def is_loading(self) -> bool:
+        from app.api.AI_model import LOADING, model_manager
+        return model_manager.state == LOADING
+
+    def prompt_version(self) -> str:
+        from app.api.AI_model import PROMPT_VERSION
+        return PROMPT_VERSION
+
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        from app.api.AI_model import generate_response
+        return generate_response(text, history)
+
+    def stream(self, text, cancel=None, history=None) -> Iterator[str]:
+        from app.api.AI_model import stream_response
+        return stream_response(text, cancel, history)
+
+class FallbackBackend(ChatBackend):
+    """
+    사용할 수 있는 백엔드가 없을 때 기본 응답을 바로 반환 (원격 서비스 장애 등)
+    """
+    name = "fallback"
+
+    def prompt_version(self) -> str:
+        return "fallback"
+
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        from app.api.AI_model_DS import FALLBACK_REPLY
+        return FALLBACK_REPLY
+
+BACKENDS: Dict[str, Callable[[], ChatBackend]] = {
+    "deepseek": DeepSeekBackend,
+    "deepseek_sdk": DeepSeekSDKBackend,
+    "local": LocalBackend,
+}
+
+class LatencyTracker:
+    """
+    최근 응답 시간 기록 (백분위수 계산용)
+    """
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def percentile(self, q: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, int(q / 100 * len(samples)))
+        return samples[index]
+
+class _Route:
+    """
+    라우터가 관리하는 백엔드 하나와 그 상태
+    """
+
+    def __init__(self, backend: ChatBackend):
+        self.backend = backend
+        self.latency = LatencyTracker()
+        # 백엔드마다 차단기는 하나만 사용 (백엔드에 있으면 그것을, 없으면 라우터가 관리)
+        breaker = backend.circuit_breaker()
+        self.manages_breaker = breaker is None
+        self.breaker = breaker or CircuitBreaker(
+            backend.name,
+            failure_threshold=settings.CHAT_ROUTER_FAILURES,
+            reset_seconds=settings.CHAT_ROUTER_RESET_SECONDS
+        )
+        self.successes = 0
+        self.failures = 0
+
+    def healthy(self) -> bool:
+        # _call 의 breaker.check() (allow) 와 같은 판단
+        return self.breaker.available() and self.backend.is_available()
+
+    def expected_latency(self) -> float:
+        # 기록이 없으면 순서대로 시도되도록 0 으로 취급
+        p50 = self.latency.percentile(50)
+        return p50 if p50 is not None else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "healthy": self.healthy(),
+            "circuit": self.breaker.state,
+            "samples": len(self.latency),
+            "p50": self.latency.percentile(50),
+            "p95": self.latency.percentile(95),
+            "successes": self.successes,
+            "failures": self.failures,
+        }
+
+class LLMRouter:
+    """
+    채팅 백엔드 라우터
+
+    원격 백엔드 중 정상이며 중앙값 응답 시간이 가장 짧은 것부터 요청하고,
+    p95 시간 안에 응답이 없으면 다음 백엔드로 같은 요청(hedge)을 보내 먼저 온
+    응답을 사용한다. 원격 백엔드가 모두 실패하면 로컬 모델로 넘어간다.
+    """
+
+    def __init__(self, names: List[str]):
+        self.routes: List[_Route] = []
+        for name in dict.fromkeys(names):
+            if name not in BACKENDS:
+                print(f"알 수 없는 채팅 백엔드: {name}")
+                continue
+            self.routes.append(_Route(BACKENDS[name]()))
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.fallbacks = 0
+        self.unavailable = 0
+        self._fallback = FallbackBackend()
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.CHAT_ROUTER_WORKERS,
+            thread_name_prefix="llm-router"
+        )
+
+    def uses(self, name: str) -> bool:
+        return any(route.backend.name == name for route in self.routes)
+
+    def prompt_version(self) -> str:
+        """
+        응답 캐시 키용 버전 (설정된 백엔드와 프롬프트가 바뀌면 달라짐)
+        """
+        versions = [f"{route.backend.name}:{route.backend.prompt_version()}" for route in self.routes]
+        return hashlib.sha256("|".join(versions).encode("utf-8")).hexdigest()[:12]
+
+    def _candidates(self) -> List[_Route]:
+        remote = sorted(
+            (route for route in self.routes if route.backend.remote and route.healthy()),
+            key=_Route.expected_latency
+        )
+        local = [route for route in self.routes if not route.backend.remote and route.healthy()]
+        return remote + local
+
+    def _raise_unavailable(self):
+        """
+        정상 백엔드가 없을 때: 로컬 모델 로딩 중이면 503, 아니면 CircuitOpenError
+        (원격 서비스 장애는 호출한 쪽에서 기본 응답으로 바로 대체)
+        """
+        self.unavailable += 1
+        if any(route.backend.is_loading() for route in self.routes):
+            raise ServiceBusyError(detail="AI 선생님이 준비 중이에요. 잠시 후 다시 시도해주세요.", retry_after=10)
+        raise CircuitOpenError("사용할 수 있는 채팅 백엔드 없음")
+
+    def _hedge_delay(self, route: _Route) -> float:
+        if len(route.latency) < settings.CHAT_HEDGE_MIN_SAMPLES:
+            return settings.CHAT_HEDGE_DEFAULT_DELAY
+        return route.latency.percentile(95)
+
+    def _call(self, route: _Route, text: str, history: Optional[List[dict]]) -> str:
+        # 백엔드가 관리하는 차단기는 백엔드가 직접 확인/기록함
+        if route.manages_breaker:
+            route.breaker.check()
+        started = time.monotonic()
+        try:
+            reply = route.backend.complete(text, history)
+        except Exception:
+            route.failures += 1
+            if route.manages_breaker:
+                route.breaker.record_failure()
+            raise
+        route.latency.record(time.monotonic() - started)
+        route.successes += 1
+        if route.manages_breaker:
+            route.breaker.record_success()
+        return reply
+
+    def complete(self, text: str, history: Optional[List[dict]] = None) -> str:
+        """
+        응답 생성 (모든 백엔드가 실패하면 마지막 예외 발생)
+
+        로컬 모델이 로딩 중이라 사용할 백엔드가 없을 때만 ServiceBusyError(503) 를 발생시킨다.
+        """
+        candidates = self._candidates()
+        if not candidates:
+            self._raise_unavailable()
+
+        pending: Dict[Future, _Route] = {}
+        hedges = set()
+        next_index = 0
+        last_error: Optional[Exception] = None
+
+        def launch() -> Future:
+            nonlocal next_index
+            route = candidates[next_index]
+            next_index += 1
+            future = self._executor.submit(self._call, route, text, history)
+            pending[future] = route
+            return future
+
+        launch()
+        while pending:
+            # 다음 원격 백엔드가 남아 있으면 p95 까지만 기다림 (로컬 모델은 실패 시에만 사용)
+            can_hedge = (
+                settings.CHAT_HEDGE_ENABLED
+                and next_index < len(candidates)
+                and candidates[next_index].backend.remote
+            )
+            timeout = self._hedge_delay(candidates[next_index - 1]) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+
+            if not done:
+                # 첫 요청이 늦음: 다음 백엔드로 같은 요청을 보냄
+                self.hedged += 1
+                hedges.add(launch())
+                continue
+
+            for future in done:
+                route = pending.pop(future)
+                try:
+                    reply = future.result()
+                except Exception as e:
+                    last_error = e
+                    print(f"{route.backend.name} 채팅 백엔드 실패: {e}")
+                    continue
+                if future in hedges:
+                    self.hedge_wins += 1
+                elif route is not candidates[0]:
+                    self.fallbacks += 1
+                # 늦게 끝나는 요청은 결과만 버림 (지연 기록은 그대로 남김)
+                return reply
+
+            # 실패한 경우 아직 보내지 않은 다음 백엔드로 넘어감
+            if not pending and next_index < len(candidates):
+                launch()
+
+        raise last_error or RuntimeError("채팅 백엔드 응답 없음")
+
+    def ready(self) -> bool:
+        """
+        지금 요청을 처리할 수 있는 백엔드가 있는지
+        """
+        return bool(self._candidates())
+
+    def select_stream(self) -> ChatBackend:
+        """
+        스트리밍에 사용할 백엔드 (가장 빠른 정상 백엔드)
+
+        정상 백엔드가 없으면 로컬 모델 로딩 중일 때는 503, 그 외에는 기본 응답 백엔드를 반환한다.
+        """
+        candidates = self._candidates()
+        if not candidates:
+            try:
+                self._raise_unavailable()
+            except CircuitOpenError:
+                return self._fallback
+        return candidates[0].backend
+
+    def stats(self) -> dict:
+        return {
+            "backends": {route.backend.name: route.stats() for route in self.routes},
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "fallbacks": self.fallbacks,
+            "unavailable": self.unavailable,
+        }
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+# 설정된 순서의 채팅 백엔드 라우터 (CHAT_BACKEND 가 기본, 나머지는 대체/hedge 용)
+llm_router = LLMRouter([settings.CHAT_BACKEND, *settings.CHAT_FALLBACK_BACKENDS])
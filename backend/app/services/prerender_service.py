@@ -0,0 +1,178 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.db.models import Lesson, Dialogue
+from app.services.tts_service import (
+    VOICE_SETTINGS,
+    audio_cache,
+    get_tts_cache_key,
+    get_emotion_cache_key,
+    get_tts_audio,
+    get_emotion_tts_audio,
+    to_audio_url
+)
+
+def _variant_keys(text: str, speeds: Iterable[float], emotions: Iterable[str]) -> List[str]:
+    """
+    대사 하나의 모든 사전 렌더링 음성(기본 + 감정별, 속도별) 캐시 키
+    """
+    keys = []
+    for speed in speeds:
+        keys.append(get_tts_cache_key(text, speed=speed))
+        keys.extend(get_emotion_cache_key(text, emotion=emotion, speed=speed) for emotion in emotions)
+    return keys
+
+def release_stale_pins(db: Session, speeds: Iterable[float] = ()) -> int:
+    """
+    현재 어떤 대화에도 쓰이지 않는 고정 파일(대사가 바뀌었거나 삭제된 대화)의 고정 해제
+
+    고정 해제된 파일은 LRU 삭제 대상으로 돌아간다. 같은 대사를 쓰는 다른 대화가
+    있으면 키가 같으므로 고정을 유지한다.
+    """
+    speeds = set(speeds) | set(settings.PRERENDER_SPEEDS) | {1.0}
+    emotions = list(VOICE_SETTINGS.keys())
+    wanted: Set[str] = set()
+    for (text,) in db.query(Dialogue.teacher_line):
+        wanted.update(_variant_keys(text, speeds, emotions))
+
+    released = 0
+    for key in audio_cache.pinned_keys() - wanted:
+        if audio_cache.unpin(key):
+            released += 1
+    return released
+
+def _build_jobs(
+    dialogues: List[Dialogue],
+    speeds: List[float],
+    emotions: List[str]
+) -> List[Tuple[int, str, Callable[[], Optional[str]]]]:
+    """
+    합성이 필요한 (대화 id, 캐시 키, 합성 함수) 목록 생성
+
+    캐시 키에 텍스트 해시가 포함되어 있으므로, 이미 파일이 있는 조합은
+    텍스트가 바뀌지 않았다는 뜻이라 건너뛴다.
+    """
+    jobs = []
+    for dialogue in dialogues:
+        text = dialogue.teacher_line
+        for speed in speeds:
+            # 기본(중성) 음성 - /tts/{lesson_id}/{dialogue_id} 에서 사용
+            key = get_tts_cache_key(text, speed=speed)
+            if not audio_cache.contains(key):
+                jobs.append((dialogue.id, key, lambda t=text, s=speed: get_tts_audio(t, speed=s)))
+
+            # 감정별 음성
+            for emotion in emotions:
+                key = get_emotion_cache_key(text, emotion=emotion, speed=speed)
+                if not audio_cache.contains(key):
+                    jobs.append((
+                        dialogue.id,
+                        key,
+                        lambda t=text, e=emotion, s=speed: get_emotion_tts_audio(t, emotion=e, speed=s)
+                    ))
+    return jobs
+
+def prerender_lessons(
+    db: Session,
+    lesson_id: Optional[int] = None,
+    speeds: Optional[List[float]] = None,
+    emotions: Optional[List[str]] = None,
+    max_workers: Optional[int] = None
+) -> Dict[str, int]:
+    """
+    활성화된 레슨의 선생님 대사를 미리 합성하여 오디오 저장소에 저장
+
+    Args:
+        db: 데이터베이스 세션
+        lesson_id: 특정 레슨만 처리할 경우 레슨 ID
+        speeds: 합성할 속도 목록 (기본값: settings.PRERENDER_SPEEDS)
+        emotions: 합성할 감정 목록 (기본값: VOICE_SETTINGS 전체)
+        max_workers: 동시에 합성할 작업 수 (기본값: settings.PRERENDER_WORKERS)
+
+    Returns:
+        처리 결과 통계 (대화 수, 합성 수, 건너뛴 수, 실패 수, 경로 갱신 수, 고정 해제 수)
+    """
+    speeds = speeds or settings.PRERENDER_SPEEDS
+    emotions = emotions or list(VOICE_SETTINGS.keys())
+    max_workers = max_workers or settings.PRERENDER_WORKERS
+
+    query = db.query(Lesson).filter(Lesson.is_active == True)
+    if lesson_id is not None:
+        query = query.filter(Lesson.id == lesson_id)
+
+    dialogues = [d for lesson in query.all() for d in lesson.dialogues]
+    jobs = _build_jobs(dialogues, speeds, emotions)
+    total = len(dialogues) * len(speeds) * (len(emotions) + 1)
+
+    stats = {
+        "dialogues": len(dialogues),
+        "rendered": 0,
+        "skipped": total - len(jobs),
+        "failed": 0,
+        "updated": 0,
+    }
+
+    # 외부 API 호출이므로 스레드 풀로 동시 처리 (동시 요청 수 제한)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {executor.submit(render): (dialogue_id, key) for dialogue_id, key, render in jobs}
+        for future in as_completed(futures):
+            dialogue_id, key = futures[future]
+            try:
+                path = future.result()
+            except Exception as e:
+                path = None
+                print(f"사전 렌더링 오류 (dialogue={dialogue_id}): {e}")
+            if path:
+                # 같은 배치의 다른 합성으로 삭제되지 않도록 바로 고정
+                audio_cache.pin(key)
+                stats["rendered"] += 1
+            else:
+                stats["failed"] += 1
+
+    # 이미 있던 음성(감정별, 속도별)도 고정하여 요청 시 다시 합성하지 않도록 함
+    for dialogue in dialogues:
+        for key in _variant_keys(dialogue.teacher_line, speeds, emotions):
+            audio_cache.pin(key)
+
+        # 기본 속도 오디오의 고정 경로를 대화에 기록 (DB 작업은 메인 스레드에서만)
+        path = audio_cache.pin(get_tts_cache_key(dialogue.teacher_line))
+        if path is None:
+            continue
+        audio_url = to_audio_url(path)
+        if dialogue.audio_file != audio_url:
+            dialogue.audio_file = audio_url
+            stats["updated"] += 1
+    db.commit()
+
+    # 대사가 바뀌어 더 이상 쓰이지 않는 이전 음성은 고정 해제
+    stats["released"] = release_stale_pins(db, speeds)
+
+    return stats
+
+# 배치 실행: python -m app.services.prerender_service
+if __name__ == "__main__":
+    from app.db.session import SessionLocal
+
+    parser = argparse.ArgumentParser(description="레슨 오디오 사전 렌더링")
+    parser.add_argument("--lesson", type=int, default=None, help="특정 레슨 ID만 처리")
+    parser.add_argument("--workers", type=int, default=None, help="동시 합성 작업 수")
+    parser.add_argument("--speeds", type=float, nargs="+", default=None, help="합성할 속도 목록")
+    parser.add_argument("--emotions", nargs="+", default=None, help="합성할 감정 목록")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        result = prerender_lessons(
+            db,
+            lesson_id=args.lesson,
+            speeds=args.speeds,
+            emotions=args.emotions,
+            max_workers=args.workers
+        )
+        print(f"사전 렌더링 완료: {result}")
+    finally:
+        db.close()
@@ -0,0 +1,142 @@
+import re
+import threading
+from difflib import SequenceMatcher
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from app.config.settings import settings
+
+class WordScore(NamedTuple):
+    """
+    예상 단어 하나의 발음 점수
+    """
+    word: str
+    score: float  # 0-100
+    heard: Optional[str]  # 정렬된 인식 단어 (없으면 None)
+
+_STRESS = re.compile(r"\d")
+
+# 음소 기호 -> 한 글자 코드 (문자열 편집 거리 계산용)
+_phoneme_codes: Dict[str, str] = {}
+_codes_lock = threading.Lock()
+
+_dictionary: Optional[Dict[str, Tuple[str, ...]]] = None
+_dictionary_lock = threading.Lock()
+
+def _load_dictionary() -> Dict[str, Tuple[str, ...]]:
+    """
+    CMU 발음 사전 로드 (첫 사용 시 한 번만, 강세 표시 제거)
+    """
+    global _dictionary
+    if _dictionary is not None:
+        return _dictionary
+    with _dictionary_lock:
+        if _dictionary is None:
+            entries = {}
+            try:
+                import cmudict
+                raw = cmudict.dict()
+            except ImportError:
+                try:
+                    from nltk.corpus import cmudict as nltk_cmudict
+                    raw = nltk_cmudict.dict()
+                except LookupError:
+                    print("CMU 발음 사전을 찾을 수 없어 규칙 기반 변환만 사용합니다.")
+                    raw = {}
+            for word, pronunciations in raw.items():
+                if pronunciations:
+                    entries[word] = tuple(_STRESS.sub("", p) for p in pronunciations[0])
+            _dictionary = entries
+    return _dictionary
+
+@lru_cache(maxsize=settings.G2P_OOV_CACHE_SIZE)
+def _fallback_phonemes(word: str) -> Tuple[str, ...]:
+    """
+    사전에 없는 단어는 metaphone 으로 근사한 발음 키 사용
+    """
+    import jellyfish
+    return tuple(jellyfish.metaphone(word)) if word else ()
+
+def word_to_phonemes(word: str) -> Tuple[str, ...]:
+    """
+    단어를 음소 열로 변환 (사전 -> 규칙 기반 순)
+    """
+    word = word.lower().strip("'")
+    phonemes = _load_dictionary().get(word)
+    if phonemes is not None:
+        return phonemes
+    return _fallback_phonemes(word)
+
+def encode_phonemes(phonemes: Tuple[str, ...]) -> str:
+    """
+    음소 열을 음소당 한 글자인 문자열로 변환
+    """
+    codes = []
+    for phoneme in phonemes:
+        code = _phoneme_codes.get(phoneme)
+        if code is None:
+            with _codes_lock:
+                code = _phoneme_codes.setdefault(phoneme, chr(0x100 + len(_phoneme_codes)))
+        codes.append(code)
+    return "".join(codes)
+
+def encode_word(word: str) -> str:
+    return encode_phonemes(word_to_phonemes(word))
+
+def phoneme_similarity(recognized: str, expected: str) -> float:
+    """
+    인코딩된 음소 문자열 간 유사도 (0.0-1.0, 편집 거리 기반)
+    """
+    import jellyfish
+    longest = max(len(recognized), len(expected))
+    if longest == 0:
+        return 1.0
+    return 1.0 - jellyfish.levenshtein_distance(recognized, expected) / longest
+
+def score_words(
+    recognized_words: List[str],
+    expected_words: List[str],
+    expected_codes: Optional[List[str]] = None
+) -> Tuple[float, List[WordScore]]:
+    """
+    단어 정렬 후 단어별 음소 유사도로 발음 점수 계산
+
+    Args:
+        recognized_words: 인식된 단어 목록
+        expected_words: 예상 단어 목록
+        expected_codes: 예상 단어의 인코딩된 음소 (미리 계산된 경우)
+
+    Returns:
+        (문장 발음 점수 0-100, 단어별 점수)
+    """
+    if expected_codes is None:
+        expected_codes = [encode_word(word) for word in expected_words]
+    recognized_codes = [encode_word(word) for word in recognized_words]
+
+    word_scores: List[Optional[WordScore]] = [None] * len(expected_words)
+    matcher = SequenceMatcher(None, expected_codes, recognized_codes, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        for index in range(i1, i2):
+            word = expected_words[index]
+            if tag == "equal":
+                heard_index = j1 + (index - i1)
+                word_scores[index] = WordScore(word, 100.0, recognized_words[heard_index])
+            elif tag == "replace":
+                # 같은 구간에서 가장 비슷하게 들린 단어와 비교
+                similarity, heard_index = max(
+                    (phoneme_similarity(recognized_codes[j], expected_codes[index]), j)
+                    for j in range(j1, j2)
+                )
+                word_scores[index] = WordScore(word, similarity * 100, recognized_words[heard_index])
+            else:
+                word_scores[index] = WordScore(word, 0.0, None)
+
+    # 음소 수로 가중 평균 (긴 단어일수록 비중이 큼)
+    total_weight = sum(max(1, len(code)) for code in expected_codes)
+    if total_weight == 0:
+        return 0.0, []
+    score = sum(
+        word_score.score * max(1, len(code))
+        for word_score, code in zip(word_scores, expected_codes)
+    ) / total_weight
+    return score, word_scores
@@ -0,0 +1,175 @@
+import re
+import threading
+import time
+from collections import OrderedDict, defaultdict
+from itertools import islice
+from typing import Dict, FrozenSet, NamedTuple, Optional, Set, Tuple
+
+from app.config.settings import settings
+
+# 정규화: 소문자, 영문/숫자/한글 외 문자 제거, 공백 정리
+_NON_WORD = re.compile(r"[^0-9a-z가-힣\s]")
+_SPACES = re.compile(r"\s+")
+
+def normalize_prompt(text: str) -> str:
+    """
+    캐시 키용 질문 정규화 ("What is apple in English?" -> "what is apple in english")
+    """
+    return _SPACES.sub(" ", _NON_WORD.sub(" ", text.lower())).strip()
+
+# 비슷한 질문 비교에서 무시하는 기능어 (내용어는 모두 같아야 같은 질문으로 봄)
+# 의문사(what/how/why 등)는 질문의 뜻을 바꾸므로 내용어로 취급
+_STOPWORDS = frozenset(
+    "a an the is are am was were be do does did can could will would should "
+    "i you he she it we they me my your to of in on at for with and or please "
+    "this that there".split()
+)
+
+# 비슷한 질문 조회 시 비교하는 최대 후보 수 (잠금 시간 제한)
+MAX_SIMILAR_CANDIDATES = 32
+
+def _content_words(words: FrozenSet[str]) -> FrozenSet[str]:
+    return frozenset(word for word in words if word not in _STOPWORDS)
+
+class CacheEntry(NamedTuple):
+    reply: str
+    expires_at: float
+    words: FrozenSet[str]  # 정규화한 질문의 단어 집합
+
+class ResponseCache:
+    """
+    채팅 응답 캐시
+
+    정규화한 질문으로 정확히 일치하는 응답을 찾는다. similarity_threshold 가
+    0 보다 크면 내용어(기능어 제외)가 모두 같은 질문 중 단어 Jaccard 유사도가
+    similarity_threshold 이상인 것도 사용한다 ("apple" 과 "grape" 처럼 내용어가
+    하나라도 다르면 다른 질문).
+    항목은 TTL 이 지나면 만료되고, max_entries 를 넘으면 가장 오래 전에
+    사용한 항목부터 제거한다. 키에 프롬프트 버전이 포함되므로 선생님 프롬프트가
+    바뀌면 이전 응답은 사용되지 않는다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float, similarity_threshold: float = 0.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.similarity_threshold = similarity_threshold
+        self._entries: "OrderedDict[Tuple[str, str], CacheEntry]" = OrderedDict()
+        # (버전, 내용어 집합) -> 키 (내용어가 같은 질문만 비교 후보)
+        self._index: Dict[Tuple[str, FrozenSet[str]], Set[Tuple[str, str]]] = defaultdict(set)
+        self._lock = threading.Lock()
+        self._version: Optional[str] = None
+        self.exact_hits = 0
+        self.approximate_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, text: str, version: str) -> Optional[str]:
+        """
+        캐시된 응답 조회 (없으면 None)
+        """
+        normalized = normalize_prompt(text)
+        if not normalized:
+            return None
+        key = (version, normalized)
+        now = time.monotonic()
+        with self._lock:
+            self._use_version(version)
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry.expires_at > now:
+                    self._entries.move_to_end(key)
+                    self.exact_hits += 1
+                    return entry.reply
+                self._remove(key)
+
+            if self.similarity_threshold > 0:
+                match = self._find_similar(version, normalized, now)
+                if match is not None:
+                    self._entries.move_to_end(match)
+                    self.approximate_hits += 1
+                    return self._entries[match].reply
+
+            self.misses += 1
+            return None
+
+    def _find_similar(self, version: str, normalized: str, now: float) -> Optional[Tuple[str, str]]:
+        """
+        내용어가 같은 후보 중 가장 비슷한 질문의 키 (최대 MAX_SIMILAR_CANDIDATES 개 비교)
+        """
+        words = frozenset(normalized.split())
+        content = _content_words(words)
+        if not content:
+            return None
+        candidates = self._index.get((version, content), ())
+
+        best_key, best_score = None, self.similarity_threshold
+        for key in islice(candidates, MAX_SIMILAR_CANDIDATES):
+            entry = self._entries[key]
+            if entry.expires_at <= now:
+                continue
+            score = len(words & entry.words) / len(words | entry.words)
+            if score >= best_score:
+                best_key, best_score = key, score
+        return best_key
+
+    def put(self, text: str, version: str, reply: str):
+        normalized = normalize_prompt(text)
+        if not normalized or not reply:
+            return
+        key = (version, normalized)
+        entry = CacheEntry(reply, time.monotonic() + self.ttl_seconds, frozenset(normalized.split()))
+        with self._lock:
+            self._use_version(version)
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._index[(version, _content_words(entry.words))].add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def _use_version(self, version: str):
+        """
+        프롬프트 버전이 바뀌면 이전 버전의 항목을 모두 삭제
+        """
+        if version == self._version:
+            return
+        for key in [key for key in self._entries if key[0] != version]:
+            self._remove(key)
+        self._version = version
+
+    def _remove(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key)
+        index_key = (key[0], _content_words(entry.words))
+        keys = self._index.get(index_key)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._index[index_key]
+
+    def invalidate(self, version: Optional[str] = None):
+        """
+        해당 프롬프트 버전의 항목 삭제 (None 이면 전체)
+        """
+        with self._lock:
+            for key in [key for key in self._entries if version is None or key[0] == version]:
+                self._remove(key)
+
+    def stats(self) -> dict:
+        hits = self.exact_hits + self.approximate_hits
+        total = hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "exact_hits": self.exact_hits,
+            "approximate_hits": self.approximate_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": round(hits / total, 3) if total else 0.0,
+        }
+
+# 기록 없는(첫 질문 또는 비로그인) 채팅 요청의 응답 캐시
+chat_response_cache = ResponseCache(
+    max_entries=settings.CHAT_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.CHAT_CACHE_TTL_SECONDS,
+    similarity_threshold=settings.CHAT_CACHE_SIMILARITY
+)
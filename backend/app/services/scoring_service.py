@@ -0,0 +1,320 @@
+import re
+import threading
+from collections import Counter
+from difflib import SequenceMatcher
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple, Union
+
+from sqlalchemy import event
+
+from app.db.models import Dialogue
+from app.services.fluency_service import FluencyMetrics, score_audio_fluency
+from app.services.pronunciation_service import WordScore, encode_word, score_words
+
+# 전체 점수 가중치 (정확도, 발음, 유창성)
+ACCURACY_WEIGHT = 0.4
+PRONUNCIATION_WEIGHT = 0.4
+FLUENCY_WEIGHT = 0.2
+
+# nltk, jellyfish 는 첫 채점 시 로드한다 (서버 시작 시 import 비용 절약)
+_tokenizer = None
+
+# 문장 경계 (Treebank 토크나이저는 마지막 문장의 마침표만 분리하므로 먼저 문장을 나눔)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# 오디오 분석 결과가 있을 때 유창성 점수에서 오디오 지표가 차지하는 비율
+AUDIO_FLUENCY_WEIGHT = 0.7
+
+class TokenizedText(NamedTuple):
+    """
+    한 번만 정규화/토큰화한 텍스트
+    """
+    text: str  # 소문자 변환된 원문
+    tokens: List[str]  # 단어 토큰 (구두점 포함)
+    word_count: int  # 공백 기준 단어 수
+
+class ExpectedLine(NamedTuple):
+    """
+    예상 문장(레슨 학생 대사)의 사전 계산된 채점 자료
+    """
+    source: str  # 원문 (변경 여부 확인용)
+    prepared: TokenizedText
+    word_counts: Counter  # 단어 다중집합 (구두점 제외)
+    phonetic_keys: List[str]  # 토큰별 발음 키 (구두점은 빈 문자열)
+    char_count: int
+    words: List[str]  # 구두점을 제외한 단어 토큰
+    phoneme_codes: List[str]  # 단어별 인코딩된 음소 열
+
+class ScoreResult(NamedTuple):
+    """
+    발화 하나의 채점 결과
+    """
+    accuracy: float
+    pronunciation: float
+    fluency: float
+    overall_score: float
+    missed_words: List[str]  # 예상 문장에서 빠졌거나 틀린 단어 (순서 유지)
+    word_scores: List[WordScore]  # 예상 단어별 발음 점수
+    fluency_metrics: Optional[FluencyMetrics]  # 오디오 유창성 지표 (오디오가 없으면 None)
+
+def _word_tokenize(text: str) -> List[str]:
+    """
+    단어 토큰화
+
+    punkt 등 별도 다운로드가 필요한 리소스 없이 nltk 에 포함된
+    정규식 기반 Treebank 토크나이저만 사용한다. 이 토크나이저는 문장을
+    나누지 않으므로("hello. how" -> "hello.") 문장별로 토큰화한다.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        from nltk.tokenize.destructive import NLTKWordTokenizer
+        _tokenizer = NLTKWordTokenizer()
+    return [
+        token
+        for sentence in _SENTENCE_BOUNDARY.split(text)
+        for token in _tokenizer.tokenize(sentence)
+    ]
+
+def prepare_text(text: str) -> TokenizedText:
+    """
+    채점용 텍스트 준비 (소문자 변환 및 토큰화)
+    """
+    normalized = text.lower().strip()
+    return TokenizedText(
+        text=normalized,
+        tokens=_word_tokenize(normalized),
+        word_count=len(normalized.split())
+    )
+
+def _is_word(token: str) -> bool:
+    return token.isalnum() or "'" in token
+
+def _words(tokens: List[str]) -> List[str]:
+    return [token for token in tokens if _is_word(token)]
+
+def _phonetic_key(token: str) -> str:
+    # 발음 비교 도구 (필요시 추가 설치 필요)
+    import jellyfish
+    return jellyfish.metaphone(token) if _is_word(token) else ""
+
+def prepare_expected(text: str) -> ExpectedLine:
+    """
+    예상 문장의 채점 자료 생성 (토큰, 다중집합, 발음 키, 길이 정보)
+    """
+    prepared = prepare_text(text)
+    words = _words(prepared.tokens)
+    return ExpectedLine(
+        source=text,
+        prepared=prepared,
+        word_counts=Counter(words),
+        phonetic_keys=[_phonetic_key(token) for token in prepared.tokens],
+        char_count=len(prepared.text),
+        words=words,
+        phoneme_codes=[encode_word(word) for word in words]
+    )
+
+def _as_expected(expected: Union[str, ExpectedLine]) -> ExpectedLine:
+    return expected if isinstance(expected, ExpectedLine) else prepare_expected(expected)
+
+def score_accuracy(
+    recognized_tokens: List[str],
+    expected_tokens: List[str],
+    expected_counts: Optional[Counter] = None
+) -> float:
+    """
+    단어 다중집합(Counter) 교집합으로 정확도 계산 (0-100)
+
+    같은 단어는 인식된 횟수만큼만 일치로 센다. 구두점 토큰은 세지 않는다
+    (STT 결과에는 문장 부호가 없을 수 있으므로).
+    expected_counts 는 예상 문장의 단어 다중집합이다.
+    """
+    expected_words = _words(expected_tokens)
+    total_words = len(expected_words)
+    if total_words == 0:
+        return 0.0
+
+    if expected_counts is None:
+        expected_counts = Counter(expected_words)
+    matching_words = sum((expected_counts & Counter(_words(recognized_tokens))).values())
+    return min(100.0, (matching_words / total_words) * 100)
+
+def find_missed_words(
+    recognized_tokens: List[str],
+    expected_tokens: List[str],
+    expected_keys: Optional[List[str]] = None
+) -> List[str]:
+    """
+    단어 단위 정렬로 예상 문장에서 빠졌거나 다르게 말한 단어 찾기
+
+    다르게 인식된 단어라도 발음 키가 같으면(예: right / write, there / their) 틀린 것으로 보지 않는다.
+    """
+    if expected_keys is None:
+        expected_keys = [_phonetic_key(token) for token in expected_tokens]
+
+    matcher = SequenceMatcher(None, expected_tokens, recognized_tokens, autojunk=False)
+    missed = []
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag not in ("delete", "replace"):
+            continue
+        recognized_keys = {_phonetic_key(token) for token in recognized_tokens[j1:j2]}
+        for index in range(i1, i2):
+            token = expected_tokens[index]
+            # 구두점 토큰은 피드백 대상에서 제외
+            if not _is_word(token) or expected_keys[index] in recognized_keys:
+                continue
+            missed.append(token)
+    return missed
+
+def score_pronunciation(
+    recognized_tokens: List[str],
+    expected_tokens: List[str],
+    expected_codes: Optional[List[str]] = None
+) -> Tuple[float, List[WordScore]]:
+    """
+    음소 단위 발음 점수 (0-100) 와 단어별 점수
+
+    expected_codes 는 구두점을 제외한 예상 단어의 인코딩된 음소 열이다.
+    """
+    return score_words(_words(recognized_tokens), _words(expected_tokens), expected_codes)
+
+def score_fluency(recognized_word_count: int, expected_word_count: int) -> float:
+    """
+    단어 수 비율 기반 유창성 점수 (0-100)
+    """
+    # 길이 비율 계산
+    if expected_word_count == 0:
+        ratio = 0
+    else:
+        ratio = recognized_word_count / expected_word_count
+
+    # 적절한 범위 내에 있으면 높은 점수, 그렇지 않으면 낮은 점수
+    if 0.8 <= ratio <= 1.2:
+        fluency_score = 80.0 + (20.0 * (1 - abs(1 - ratio)))
+    else:
+        fluency_score = 60.0 * (1 - min(1, abs(ratio - 1)))
+
+    return max(0.0, min(100.0, fluency_score))
+
+def score_prepared(
+    recognized: TokenizedText,
+    expected: ExpectedLine,
+    fluency_metrics: Optional[FluencyMetrics] = None
+) -> ScoreResult:
+    """
+    토큰화된 텍스트로 정확도/발음/유창성 점수 계산
+
+    fluency_metrics 가 주어지면 유창성은 단어 수 비율과 오디오 지표(발화 속도, 쉼)를
+    함께 반영한다.
+    """
+    expected_text = expected.prepared
+    accuracy = score_accuracy(recognized.tokens, expected_text.tokens, expected.word_counts)
+    pronunciation, word_scores = score_pronunciation(
+        recognized.tokens, expected_text.tokens, expected.phoneme_codes
+    )
+    fluency = score_fluency(recognized.word_count, expected_text.word_count)
+    if fluency_metrics is not None:
+        fluency = (
+            fluency * (1 - AUDIO_FLUENCY_WEIGHT)
+            + score_audio_fluency(fluency_metrics) * AUDIO_FLUENCY_WEIGHT
+        )
+    overall = (
+        accuracy * ACCURACY_WEIGHT
+        + pronunciation * PRONUNCIATION_WEIGHT
+        + fluency * FLUENCY_WEIGHT
+    )
+    return ScoreResult(
+        accuracy=accuracy,
+        pronunciation=pronunciation,
+        fluency=fluency,
+        overall_score=overall,
+        missed_words=find_missed_words(recognized.tokens, expected_text.tokens, expected.phonetic_keys),
+        word_scores=word_scores,
+        fluency_metrics=fluency_metrics
+    )
+
+def score_pair(
+    recognized_text: str,
+    expected: Union[str, ExpectedLine],
+    fluency_metrics: Optional[FluencyMetrics] = None
+) -> ScoreResult:
+    """
+    인식된 텍스트와 예상 텍스트 한 쌍 채점 (각 텍스트는 한 번만 토큰화)
+    """
+    return score_prepared(prepare_text(recognized_text), _as_expected(expected), fluency_metrics)
+
+def score_batch(pairs: Iterable[Tuple[str, Union[str, ExpectedLine]]]) -> List[ScoreResult]:
+    """
+    여러 (인식된 텍스트, 예상 텍스트) 쌍을 한 번에 채점
+
+    같은 문장은 배치 안에서 한 번만 토큰화하므로, 같은 대사에 대한
+    여러 학생의 시도를 다시 채점할 때 효율적이다.
+    """
+    recognized_cache: Dict[str, TokenizedText] = {}
+    expected_cache: Dict[str, ExpectedLine] = {}
+
+    def prepare_recognized(text: str) -> TokenizedText:
+        if text not in recognized_cache:
+            recognized_cache[text] = prepare_text(text)
+        return recognized_cache[text]
+
+    def prepare_expected_cached(expected: Union[str, ExpectedLine]) -> ExpectedLine:
+        if isinstance(expected, ExpectedLine):
+            return expected
+        if expected not in expected_cache:
+            expected_cache[expected] = prepare_expected(expected)
+        return expected_cache[expected]
+
+    return [
+        score_prepared(prepare_recognized(recognized), prepare_expected_cached(expected))
+        for recognized, expected in pairs
+    ]
+
+class ExpectedLineIndex:
+    """
+    대화 id 별 예상 문장 채점 자료 캐시
+
+    레슨을 불러올 때 미리 만들어 두고, 평가 시에는 원문이 바뀌지 않았으면
+    그대로 사용한다 (없으면 그 자리에서 만들어 저장). 대화가 수정/삭제되면
+    해당 항목을 삭제한다.
+    """
+
+    def __init__(self):
+        self._lines: Dict[str, ExpectedLine] = {}
+        self._lock = threading.Lock()
+
+    def put(self, dialogue_id, text: str) -> ExpectedLine:
+        line = prepare_expected(text)
+        with self._lock:
+            self._lines[str(dialogue_id)] = line
+        return line
+
+    def get(self, dialogue_id, text: str) -> ExpectedLine:
+        """
+        캐시된 자료 반환 (없거나 원문이 바뀌었으면 새로 생성)
+        """
+        line = self._lines.get(str(dialogue_id))
+        if line is not None and line.source == text:
+            return line
+        return self.put(dialogue_id, text)
+
+    def build(self, dialogues: Iterable) -> None:
+        """
+        여러 대화의 채점 자료를 미리 생성 (이미 최신이면 건너뜀)
+        """
+        for dialogue in dialogues:
+            self.get(dialogue.id, dialogue.student_line)
+
+    def invalidate(self, dialogue_id) -> None:
+        with self._lock:
+            self._lines.pop(str(dialogue_id), None)
+
+    def __len__(self) -> int:
+        return len(self._lines)
+
+# 프로세스 전체에서 공유하는 예상 문장 인덱스
+expected_line_index = ExpectedLineIndex()
+
+@event.listens_for(Dialogue, "after_update")
+@event.listens_for(Dialogue, "after_delete")
+def _invalidate_changed_dialogue(mapper, connection, target: Dialogue):
+    # 수정/삭제된 대사의 채점 자료가 남아 있지 않도록 삭제 (다음 평가 시 새로 생성)
+    expected_line_index.invalidate(target.id)
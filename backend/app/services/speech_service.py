@@ -1,32 +1,77 @@
 import os
 import json
-from google.cloud import speech_v1p1beta1 as speech
-from google.cloud import translate_v2 as translate
+import asyncio
+from typing import AsyncIterator, List, Optional, Tuple, Union
 from app.config.settings import settings
-from app.schemas.lesson import SpeechEvaluationResponse
+from app.schemas.lesson import SpeechEvaluationResponse, WordPronunciation, FluencyMetricsResponse
+from app.core.concurrency import ConcurrencyLimiter
+from app.services.stt_backends import get_stt_backend
+from app.services.audio_io import AudioSource, read_audio, read_audio_async
+from app.services.scoring_service import (
+    ExpectedLine,
+    prepare_text,
+    prepare_expected,
+    score_pair,
+    score_accuracy,
+    score_pronunciation,
+    score_fluency,
+    find_missed_words,
+    AUDIO_FLUENCY_WEIGHT
+)
+from app.services.pronunciation_service import WordScore
+from app.services.fluency_service import analyze_fluency, score_audio_fluency
 
-# 발음 비교 도구 (필요시 추가 설치 필요)
-import jellyfish  # 문자열 유사도 측정
-import nltk
-from nltk.tokenize import word_tokenize
+# 동시 STT 요청 제한 (초과 대기 요청은 503 으로 거절)
+stt_limiter = ConcurrencyLimiter(settings.STT_MAX_CONCURRENCY, settings.STT_MAX_WAITING)
 
-# nltk 리소스 다운로드
-nltk.download('punkt', quiet=True)
-
-def evaluate_speech(audio_file_path: str, expected_text: str) -> SpeechEvaluationResponse:
+def evaluate_speech(audio: AudioSource, expected_text: Union[str, ExpectedLine]) -> SpeechEvaluationResponse:
     """
     사용자 음성을 평가하여 점수와 피드백 제공
     
     Args:
-        audio_file_path: 사용자 음성 파일 경로
-        expected_text: 예상되는 정확한 텍스트
+        audio: 사용자 음성 (파일 경로, 메모리 버퍼 또는 파일 객체)
+        expected_text: 예상되는 정확한 텍스트 (또는 미리 계산된 채점 자료)
         
     Returns:
         평가 결과 (정확도, 발음, 유창성, 전체 점수, 피드백)
     """
+    # 오디오는 한 번만 읽어 STT 와 유창성 분석에 함께 사용
+    content = read_audio(audio)
+    
     # STT로 음성을 텍스트로 변환
-    recognized_text = speech_to_text(audio_file_path)
+    recognized_text = speech_to_text(content)
+    
+    return score_speech(recognized_text, expected_text, content)
+
+async def evaluate_speech_async(
+    audio: AudioSource,
+    expected_text: Union[str, ExpectedLine]
+) -> SpeechEvaluationResponse:
+    """
+    evaluate_speech 의 비동기 버전
+
+    STT 는 비동기 클라이언트로 호출하고, 점수 계산은 executor 에서 실행하여
+    이벤트 루프를 막지 않는다.
+    """
+    content = await read_audio_async(audio)
+    recognized_text = await speech_to_text_async(content)
+    
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, score_speech, recognized_text, expected_text, content)
+
+def score_speech(
+    recognized_text: str,
+    expected_text: Union[str, ExpectedLine],
+    audio: Optional[bytes] = None,
+    raw_pcm: bool = False
+) -> SpeechEvaluationResponse:
+    """
+    인식된 텍스트를 예상 텍스트와 비교하여 점수와 피드백 계산
     
+    expected_text 로 ExpectedLine 을 넘기면 예상 문장은 다시 토큰화하지 않는다.
+    audio 가 WAV(또는 raw_pcm=True 인 LINEAR16)이면 발화 속도와 쉼을 분석하여
+    유창성 점수에 반영하고, 그 밖의 형식은 텍스트 기반 점수만 사용한다.
+    """
     if not recognized_text:
         return SpeechEvaluationResponse(
             accuracy=0.0,
@@ -36,142 +81,131 @@ def evaluate_speech(audio_file_path: str, expected_text: str) -> SpeechEvaluatio
             feedback="음성을 인식할 수 없습니다. 다시 시도해주세요."
         )
     
-    # 텍스트 정확도 평가
-    accuracy_score = calculate_accuracy(recognized_text, expected_text)
-    
-    # 발음 평가 (음절 단위로 비교)
-    pronunciation_score = calculate_pronunciation(recognized_text, expected_text)
+    if not isinstance(expected_text, ExpectedLine):
+        expected_text = prepare_expected(expected_text)
     
-    # 유창성 평가 (속도, 쉼 등)
-    fluency_score = calculate_fluency(recognized_text, expected_text)
+    # 오디오 유창성 지표 (발화 속도, 쉼)
+    fluency_metrics = None
+    if audio:
+        fluency_metrics = analyze_fluency(audio, len(recognized_text.split()), raw_pcm)
     
-    # 전체 점수 계산 (가중치 적용)
-    overall_score = (accuracy_score * 0.4) + (pronunciation_score * 0.4) + (fluency_score * 0.2)
+    # 정확도/발음/유창성 평가 (각 텍스트는 한 번만 토큰화)
+    result = score_pair(recognized_text, expected_text, fluency_metrics)
     
     # 피드백 생성
-    feedback = generate_feedback(accuracy_score, pronunciation_score, fluency_score, recognized_text, expected_text)
+    feedback = generate_feedback(
+        result.accuracy,
+        result.pronunciation,
+        result.fluency,
+        recognized_text,
+        expected_text,
+        missed_words=result.missed_words,
+        word_scores=result.word_scores
+    )
     
     return SpeechEvaluationResponse(
-        accuracy=accuracy_score,
-        pronunciation=pronunciation_score,
-        fluency=fluency_score,
-        overall_score=overall_score,
-        feedback=feedback
+        accuracy=result.accuracy,
+        pronunciation=result.pronunciation,
+        fluency=result.fluency,
+        overall_score=result.overall_score,
+        feedback=feedback,
+        word_scores=[WordPronunciation(**word_score._asdict()) for word_score in result.word_scores],
+        fluency_metrics=(
+            FluencyMetricsResponse(**result.fluency_metrics._asdict())
+            if result.fluency_metrics else None
+        )
     )
 
-def speech_to_text(audio_file_path: str) -> str:
+def speech_to_text(audio: AudioSource) -> str:
     """
-    Google STT API를 사용하여 음성을 텍스트로 변환
+    설정된 STT 백엔드(기본: Google STT API)를 사용하여 음성을 텍스트로 변환
     """
     try:
-        client = speech.SpeechClient()
-        
-        # 오디오 파일 읽기
-        with open(audio_file_path, "rb") as audio_file:
-            content = audio_file.read()
-        
-        audio = speech.RecognitionAudio(content=content)
-        
-        # STT 설정 (영어)
-        config = speech.RecognitionConfig(
-            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
-            sample_rate_hertz=16000,
-            language_code="en-US",
-            enable_automatic_punctuation=True,
-            model="video"  # 고품질 모델 사용
-        )
+        # 오디오 읽기 (메모리 버퍼면 그대로 사용)
+        content = read_audio(audio)
         
-        # 음성 인식 요청
-        response = client.recognize(config=config, audio=audio)
-        
-        # 결과 추출
-        transcripts = []
-        for result in response.results:
-            transcripts.append(result.alternatives[0].transcript)
-        
-        return " ".join(transcripts)
+        return get_stt_backend().recognize(content)
     
     except Exception as e:
         print(f"STT 오류: {e}")
         return ""
 
+async def speech_to_text_async(audio: AudioSource) -> str:
+    """
+    speech_to_text 의 비동기 버전 (동시 요청 수 제한 적용)
+    """
+    # 대기열이 가득 차면 ServiceBusyError(503) 를 그대로 전달
+    async with stt_limiter:
+        try:
+            content = await read_audio_async(audio)
+            
+            return await get_stt_backend().recognize_async(content)
+        
+        except Exception as e:
+            print(f"STT 오류: {e}")
+            return ""
+
+async def stream_speech_to_text(audio_chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bool]]:
+    """
+    오디오 조각을 받는 대로 스트리밍 STT 로 전달하고 인식 결과를 순서대로 반환
+
+    Args:
+        audio_chunks: LINEAR16(16kHz, mono) 오디오 조각
+        
+    Yields:
+        (인식된 텍스트, 최종 결과 여부)
+    """
+    async with stt_limiter:
+        async for transcript, is_final in get_stt_backend().stream(audio_chunks):
+            yield transcript, is_final
+
 def calculate_accuracy(recognized_text: str, expected_text: str) -> float:
     """
     인식된 텍스트와 예상 텍스트 간의 정확도 계산
     """
-    # 소문자 변환 및 공백 정규화
-    recognized = recognized_text.lower().strip()
-    expected = expected_text.lower().strip()
-    
-    # 토큰화 (단어 단위로 분리)
-    recognized_tokens = word_tokenize(recognized)
-    expected_tokens = word_tokenize(expected)
-    
-    # 정확히 일치하는 단어 수 계산
-    matching_words = 0
-    total_words = len(expected_tokens)
-    
-    for exp_word in expected_tokens:
-        if exp_word in recognized_tokens:
-            matching_words += 1
-            # 일치하는 단어는 한 번만 카운트하기 위해 제거
-            recognized_tokens.remove(exp_word)
-    
-    # 정확도 점수 계산 (0-100)
-    if total_words == 0:
-        return 0.0
-    
-    accuracy = (matching_words / total_words) * 100
-    return min(100.0, accuracy)  # 최대 100점
+    return score_accuracy(prepare_text(recognized_text).tokens, prepare_text(expected_text).tokens)
 
-def calculate_pronunciation(recognized_text: str, expected_text: str) -> float:
+def calculate_pronunciation(recognized_text: str, expected_text: str) -> Tuple[float, List[WordScore]]:
     """
-    발음 유사도 계산
+    음소 단위 발음 점수와 단어별 점수 계산
     """
-    # 소문자 변환
-    recognized = recognized_text.lower()
-    expected = expected_text.lower()
-    
-    # 레벤슈타인 거리 기반 유사도 계산
-    similarity = jellyfish.jaro_winkler_similarity(recognized, expected)
-    
-    # 유사도 점수를 0-100 범위로 변환
-    pronunciation_score = similarity * 100
-    
-    return pronunciation_score
+    return score_pronunciation(
+        prepare_text(recognized_text).tokens,
+        prepare_text(expected_text).tokens
+    )
 
-def calculate_fluency(recognized_text: str, expected_text: str) -> float:
+def calculate_fluency(recognized_text: str, expected_text: str, audio: Optional[bytes] = None) -> float:
     """
-    유창성 점수 계산 (단순화된 버전)
+    유창성 점수 계산
     
-    실제 구현에서는 음성 파일의 지속 시간, 쉼 등을 분석해야 함
+    audio 가 주어지면 음성 구간, 발화 속도, 쉼을 분석한 점수를 함께 반영한다.
     """
-    # 간단한 구현: 인식된 텍스트 길이와 예상 텍스트 길이 비교
-    recognized_len = len(recognized_text.split())
-    expected_len = len(expected_text.split())
-    
-    # 길이 비율 계산
-    if expected_len == 0:
-        ratio = 0
-    else:
-        ratio = recognized_len / expected_len
-    
-    # 적절한 범위 내에 있으면 높은 점수, 그렇지 않으면 낮은 점수
-    if 0.8 <= ratio <= 1.2:
-        fluency_score = 80.0 + (20.0 * (1 - abs(1 - ratio)))
-    else:
-        fluency_score = 60.0 * (1 - min(1, abs(ratio - 1)))
-    
-    return max(0.0, min(100.0, fluency_score))
+    word_count = len(recognized_text.split())
+    fluency = score_fluency(word_count, len(expected_text.split()))
+    metrics = analyze_fluency(audio, word_count) if audio else None
+    if metrics is None:
+        return fluency
+    return fluency * (1 - AUDIO_FLUENCY_WEIGHT) + score_audio_fluency(metrics) * AUDIO_FLUENCY_WEIGHT
 
 def generate_feedback(accuracy: float, pronunciation: float, fluency: float, 
-                      recognized_text: str, expected_text: str) -> str:
+                      recognized_text: str, expected_text: Union[str, ExpectedLine],
+                      missed_words: Optional[List[str]] = None,
+                      word_scores: Optional[List[WordScore]] = None) -> str:
     """
     평가 결과에 따른 맞춤형 피드백 생성
+    
+    missed_words 가 주어지면 (단어 정렬 결과) 다시 계산하지 않는다.
+    word_scores 가 주어지면 발음 점수가 낮은 단어를 짚어준다.
     """
     # 단어 단위로 분석하여 틀린 부분 식별
-    expected_words = expected_text.lower().split()
-    recognized_words = recognized_text.lower().split()
+    if missed_words is None:
+        if not isinstance(expected_text, ExpectedLine):
+            expected_text = prepare_expected(expected_text)
+        missed_words = find_missed_words(
+            prepare_text(recognized_text).tokens,
+            expected_text.prepared.tokens,
+            expected_text.phonetic_keys
+        )
     
     # 초등학생 친화적인 피드백 생성
     feedback = []
@@ -190,12 +224,19 @@ def generate_feedback(accuracy: float, pronunciation: float, fluency: float,
     
     # 세부 피드백
     if accuracy < 70:
-        missed_words = [word for word in expected_words if word not in recognized_words]
         if missed_words:
             feedback.append(f"'{', '.join(missed_words[:3])}' 단어를 연습해보세요.")
     
     if pronunciation < 70:
-        feedback.append("발음을 조금 더 또렷하게 해보세요.")
+        # 빠진 단어는 위에서 안내했으므로, 말했지만 발음이 다른 단어만 짚어줌
+        weak_words = [
+            word_score.word for word_score in (word_scores or [])
+            if word_score.heard is not None and word_score.score < settings.WEAK_WORD_THRESHOLD
+        ]
+        if weak_words:
+            feedback.append(f"'{', '.join(weak_words[:3])}' 발음을 조금 더 또렷하게 해보세요.")
+        else:
+            feedback.append("발음을 조금 더 또렷하게 해보세요.")
     
     if fluency < 70:
         feedback.append("조금 더 자연스럽게 말해보세요. 너무 빠르거나 느리지 않게요.")
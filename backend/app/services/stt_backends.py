@@ -0,0 +1,243 @@
+import io
+import json
+import wave
+import asyncio
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import AsyncIterator, List, Optional, Tuple
+
+from app.config.settings import settings
+from app.services.google_clients import speech_clients, speech_async_clients
+
+# STT 입력 오디오 샘플레이트 (LINEAR16, mono)
+SAMPLE_RATE = 16000
+
+class STTBackend(ABC):
+    """
+    STT 백엔드 인터페이스
+
+    recognize 만 구현하면 비동기/배치 호출은 스레드에서 실행되고,
+    스트리밍 호출은 녹음이 끝난 뒤 한 번에 인식한다.
+    """
+    name = "base"
+
+    def warmup(self):
+        """
+        서버 시작 시 모델 로딩 등 준비 작업
+        """
+        pass
+
+    @abstractmethod
+    def recognize(self, content: bytes) -> str:
+        """
+        오디오(WAV 또는 LINEAR16)를 텍스트로 변환
+        """
+
+    async def recognize_async(self, content: bytes) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.recognize, content)
+
+    def recognize_batch(self, contents: List[bytes]) -> List[str]:
+        """
+        여러 오디오를 한 번에 변환
+        """
+        return [self.recognize(content) for content in contents]
+
+    async def stream(self, audio_chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bool]]:
+        """
+        오디오 조각을 받는 대로 인식하여 (텍스트, 최종 결과 여부) 반환
+
+        스트리밍 인식을 지원하지 않는 백엔드는 조각을 모두 모은 뒤
+        recognize 로 한 번 변환하여 최종 결과 하나만 반환한다.
+        """
+        chunks = [chunk async for chunk in audio_chunks]
+        yield await self.recognize_async(b"".join(chunks)), True
+
+    def close(self):
+        pass
+
+class GoogleSTTBackend(STTBackend):
+    """
+    Google Cloud Speech-to-Text 백엔드
+    """
+    name = "google"
+
+    @staticmethod
+    def _recognition_config():
+        """
+        STT 설정 (영어)
+        """
+        from google.cloud import speech_v1p1beta1 as speech
+        return speech.RecognitionConfig(
+            encoding=speech.RecognitionConfig.AudioEncoding.LINEAR16,
+            sample_rate_hertz=SAMPLE_RATE,
+            language_code="en-US",
+            enable_automatic_punctuation=True,
+            model="video"  # 고품질 모델 사용
+        )
+
+    @staticmethod
+    def _join_transcripts(response) -> str:
+        """
+        인식 결과에서 텍스트 추출
+        """
+        transcripts = []
+        for result in response.results:
+            transcripts.append(result.alternatives[0].transcript)
+
+        return " ".join(transcripts)
+
+    def recognize(self, content: bytes) -> str:
+        from google.cloud import speech_v1p1beta1 as speech
+        audio = speech.RecognitionAudio(content=content)
+        config = self._recognition_config()
+
+        # 음성 인식 요청 (공유 클라이언트 사용)
+        response = speech_clients.run(
+            lambda client: client.recognize(
+                config=config,
+                audio=audio,
+                timeout=settings.STT_TIMEOUT_SECONDS
+            )
+        )
+        return self._join_transcripts(response)
+
+    async def recognize_async(self, content: bytes) -> str:
+        from google.cloud import speech_v1p1beta1 as speech
+        audio = speech.RecognitionAudio(content=content)
+        config = self._recognition_config()
+
+        response = await speech_async_clients.run_async(
+            lambda client: client.recognize(
+                config=config,
+                audio=audio,
+                timeout=settings.STT_TIMEOUT_SECONDS
+            )
+        )
+        return self._join_transcripts(response)
+
+    async def stream(self, audio_chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bool]]:
+        from google.cloud import speech_v1p1beta1 as speech
+
+        # 중간 결과 포함, 발화가 끝나면 바로 최종 결과 반환
+        streaming_config = speech.StreamingRecognitionConfig(
+            config=self._recognition_config(),
+            interim_results=True,
+            single_utterance=True
+        )
+
+        async def requests():
+            # 첫 요청은 설정, 이후 요청은 오디오
+            yield speech.StreamingRecognizeRequest(streaming_config=streaming_config)
+            async for chunk in audio_chunks:
+                yield speech.StreamingRecognizeRequest(audio_content=chunk)
+
+        client = speech_async_clients.get()
+        responses = await client.streaming_recognize(
+            requests=requests(),
+            timeout=settings.STT_TIMEOUT_SECONDS
+        )
+        async for response in responses:
+            for result in response.results:
+                if not result.alternatives:
+                    continue
+                yield result.alternatives[0].transcript, result.is_final
+
+class VoskSTTBackend(STTBackend):
+    """
+    Vosk 오프라인 STT 백엔드
+
+    모델은 서버 시작 시 한 번만 로드해 메모리에 유지하고,
+    인식 요청은 전용 워커 풀에서 처리한다.
+    """
+    name = "vosk"
+
+    def __init__(self, model_path: str, workers: int):
+        self.model_path = model_path
+        self.workers = workers
+        self._model = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stt")
+
+    def warmup(self):
+        self._get_model()
+
+    def _get_model(self):
+        if self._model is not None:
+            return self._model
+        with self._lock:
+            if self._model is None:
+                from vosk import Model, SetLogLevel
+                SetLogLevel(-1)
+                print(f"로컬 STT 모델 로딩: {self.model_path}")
+                self._model = Model(self.model_path)
+        return self._model
+
+    @staticmethod
+    def _to_pcm(content: bytes) -> Tuple[bytes, int]:
+        """
+        WAV 헤더가 있으면 제거하고 (PCM 데이터, 샘플레이트) 반환
+        """
+        if content[:4] != b"RIFF":
+            return content, SAMPLE_RATE
+        with wave.open(io.BytesIO(content), "rb") as wav:
+            return wav.readframes(wav.getnframes()), wav.getframerate()
+
+    def _new_recognizer(self, sample_rate: int = SAMPLE_RATE):
+        from vosk import KaldiRecognizer
+        return KaldiRecognizer(self._get_model(), sample_rate)
+
+    def recognize(self, content: bytes) -> str:
+        pcm, sample_rate = self._to_pcm(content)
+        recognizer = self._new_recognizer(sample_rate)
+        recognizer.AcceptWaveform(pcm)
+        return json.loads(recognizer.FinalResult()).get("text", "")
+
+    async def recognize_async(self, content: bytes) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.recognize, content)
+
+    def recognize_batch(self, contents: List[bytes]) -> List[str]:
+        # 워커 풀에서 병렬로 디코딩
+        return list(self._executor.map(self.recognize, contents))
+
+    async def stream(self, audio_chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, bool]]:
+        loop = asyncio.get_running_loop()
+        recognizer = await loop.run_in_executor(self._executor, self._new_recognizer)
+
+        async for chunk in audio_chunks:
+            is_final = await loop.run_in_executor(self._executor, recognizer.AcceptWaveform, chunk)
+            if is_final:
+                text = json.loads(recognizer.Result()).get("text", "")
+                # 발화가 끝나면 바로 최종 결과 반환 (Google 의 single_utterance 와 동일)
+                if text:
+                    yield text, True
+                    return
+                continue
+            partial = json.loads(recognizer.PartialResult()).get("partial", "")
+            if partial:
+                yield partial, False
+
+        yield json.loads(recognizer.FinalResult()).get("text", ""), True
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+_backend: Optional[STTBackend] = None
+_backend_lock = threading.Lock()
+
+def get_stt_backend() -> STTBackend:
+    """
+    설정(STT_BACKEND)에 따른 STT 백엔드 (프로세스당 하나)
+    """
+    global _backend
+    if _backend is not None:
+        return _backend
+    with _backend_lock:
+        if _backend is None:
+            if settings.STT_BACKEND == "vosk":
+                _backend = VoskSTTBackend(settings.STT_LOCAL_MODEL_PATH, settings.STT_LOCAL_WORKERS)
+            else:
+                _backend = GoogleSTTBackend()
+    return _backend
@@ -0,0 +1,135 @@
+import calendar
+import threading
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config.settings import settings
+from app.db.models import RevokedToken
+
+FAMILY_PREFIX = "fam:"
+USER_PREFIX = "user:"
+
+def family_key(family: str) -> str:
+    return f"{FAMILY_PREFIX}{family}"
+
+def user_key(user_id) -> str:
+    return f"{USER_PREFIX}{user_id}"
+
+def _timestamp(value: datetime) -> int:
+    # DB 에는 UTC 기준 naive datetime 으로 저장
+    return calendar.timegm(value.timetuple())
+
+class RevocationStore:
+    """
+    리프레시 토큰 폐기 목록
+
+    사용된 토큰의 jti, 폐기된 토큰 패밀리(fam:<id>), 로그아웃한 사용자(user:<id>)를
+    revoked_tokens 테이블에 저장한다. 갱신 요청마다 같은 트랜잭션에서 패밀리/사용자
+    키를 기본 키로 조회하고(행 두 개 이하) jti 를 삽입하므로, 다른 워커에서 폐기한
+    토큰도 바로 거부된다. 만료된 행은 sweep_seconds 마다 batch_size 개씩 삭제한다.
+    """
+
+    def __init__(self, sweep_seconds: float, batch_size: int):
+        self.sweep_seconds = sweep_seconds
+        self.batch_size = batch_size
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.checks = 0
+        self.revoked_hits = 0
+        self.reuse_detected = 0
+        self.swept = 0
+
+    def revoke(self, db: Session, key: str, expires_at: datetime):
+        """
+        패밀리/사용자 폐기 (커밋은 호출한 쪽에서)
+        """
+        db.merge(RevokedToken(key=key, revoked_at=datetime.utcnow(), expires_at=expires_at))
+
+    def claim(self, db: Session, jti: str, expires_at: datetime) -> bool:
+        """
+        토큰 사용 처리 (이미 사용된 토큰이면 False)
+        """
+        db.add(RevokedToken(key=jti, revoked_at=datetime.utcnow(), expires_at=expires_at))
+        try:
+            db.commit()
+        except IntegrityError:
+            db.rollback()
+            self.reuse_detected += 1
+            return False
+        return True
+
+    def is_revoked(self, db: Session, payload: dict) -> bool:
+        """
+        토큰의 패밀리 또는 사용자가 폐기되었는지 확인 (claim 과 같은 트랜잭션에서 호출)
+        """
+        self.checks += 1
+        keys = [family_key(payload["fam"]), user_key(payload["sub"])]
+        for row in db.query(RevokedToken).filter(RevokedToken.key.in_(keys)):
+            # 사용자 폐기는 그 이전에 발급된 토큰에만 적용 (같은 초에 다시 로그인한 토큰은 유효)
+            if row.key.startswith(USER_PREFIX) and payload.get("iat", 0) >= _timestamp(row.revoked_at):
+                continue
+            self.revoked_hits += 1
+            return True
+        return False
+
+    def sweep(self) -> int:
+        """
+        만료된 행을 batch_size 개씩 삭제 (긴 잠금 없이 조금씩)
+        """
+        from app.db.session import SessionLocal
+
+        deleted = 0
+        db = SessionLocal()
+        try:
+            while not self._stop.is_set():
+                keys = [
+                    key for (key,) in db.query(RevokedToken.key)
+                    .filter(RevokedToken.expires_at <= datetime.utcnow())
+                    .limit(self.batch_size)
+                ]
+                if not keys:
+                    break
+                db.query(RevokedToken).filter(RevokedToken.key.in_(keys)).delete(synchronize_session=False)
+                db.commit()
+                deleted += len(keys)
+                if len(keys) < self.batch_size:
+                    break
+        finally:
+            db.close()
+        self.swept += deleted
+        return deleted
+
+    def _run(self):
+        while not self._stop.wait(self.sweep_seconds):
+            try:
+                self.sweep()
+            except Exception as e:
+                print(f"토큰 폐기 목록 정리 오류: {e}")
+
+    def start(self):
+        """
+        만료된 행 정리 스레드 시작
+        """
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="token-revocation", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def stats(self) -> dict:
+        return {
+            "checks": self.checks,
+            "revoked_hits": self.revoked_hits,
+            "reuse_detected": self.reuse_detected,
+            "swept": self.swept,
+        }
+
+# 프로세스 전체에서 공유하는 리프레시 토큰 폐기 목록
+revocation_store = RevocationStore(
+    sweep_seconds=settings.REVOCATION_SWEEP_SECONDS,
+    batch_size=settings.REVOCATION_SWEEP_BATCH
+)
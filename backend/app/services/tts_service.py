@@ -1,60 +1,164 @@
 import os
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Iterator, List, Optional
 from google.cloud import texttospeech
-import uuid
 from app.config.settings import settings
+from app.services.audio_cache import AudioCache, make_cache_key
+from app.services.google_clients import tts_clients
 
 # 오디오 파일 저장 경로
-AUDIO_DIR = "audio_files"
+AUDIO_DIR = settings.AUDIO_DIR
 os.makedirs(AUDIO_DIR, exist_ok=True)
 
+# 콘텐츠 주소 기반 오디오 캐시 (같은 텍스트/음성 설정은 한 번만 합성)
+audio_cache = AudioCache(AUDIO_DIR, settings.TTS_CACHE_MAX_BYTES)
+
+# 문장 단위 스트리밍 합성용 스레드 풀
+_stream_executor = ThreadPoolExecutor(max_workers=settings.TTS_STREAM_WORKERS)
+
+# 문장 경계 (마침표/물음표/느낌표 뒤 공백)
+_SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+")
+
+# 감정별 음성 설정
+VOICE_SETTINGS = {
+    "happy": {
+        "name": "en-US-Neural2-F",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
+        "pitch": 2.0,
+        "speaking_rate": 1.1
+    },
+    "excited": {
+        "name": "en-US-Neural2-F",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
+        "pitch": 4.0,
+        "speaking_rate": 1.2
+    },
+    "calm": {
+        "name": "en-US-Neural2-D",
+        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
+        "pitch": 0.0,
+        "speaking_rate": 0.9
+    },
+    "friendly": {
+        "name": "en-US-Neural2-F",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
+        "pitch": 1.0,
+        "speaking_rate": 1.0
+    },
+    "sad": {
+        "name": "en-US-Neural2-D",
+        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
+        "pitch": -2.0,
+        "speaking_rate": 0.8
+    },
+    "angry": {
+        "name": "en-US-Neural2-D",
+        "ssml_gender": texttospeech.SsmlVoiceGender.MALE,
+        "pitch": 1.0,
+        "speaking_rate": 1.1
+    },
+    "surprised": {
+        "name": "en-US-Neural2-F",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
+        "pitch": 3.0,
+        "speaking_rate": 1.3
+    },
+    "encouraging": {
+        "name": "en-US-Neural2-F",
+        "ssml_gender": texttospeech.SsmlVoiceGender.FEMALE,
+        "pitch": 1.0,
+        "speaking_rate": 1.0
+    }
+}
+
+def get_tts_cache_key(text: str, speed: float = 1.0, language_code: str = "en-US") -> str:
+    """
+    기본(중성) 음성 TTS 의 캐시 키
+    """
+    return make_cache_key(
+        text,
+        voice="NEUTRAL",
+        speed=speed,
+        language_code=language_code,
+        encoding="MP3"
+    )
+
+def get_emotion_cache_key(
+    text: str,
+    emotion: str = "friendly",
+    speed: float = 1.0,
+    use_ssml: bool = False,
+    language_code: str = "en-US"
+) -> str:
+    """
+    감정 음성 TTS 의 캐시 키
+    """
+    voice_config = VOICE_SETTINGS.get(emotion, VOICE_SETTINGS["friendly"])
+    return make_cache_key(
+        text,
+        voice=voice_config["name"],
+        speed=voice_config["speaking_rate"] * speed,
+        language_code=language_code,
+        encoding="MP3",
+        pitch=voice_config["pitch"],
+        ssml=use_ssml
+    )
+
+def to_audio_url(file_path: str) -> str:
+    """
+    캐시 파일 경로를 정적 오디오 URL 로 변환 (pinned/ 하위 디렉토리 포함)
+    """
+    relative = os.path.relpath(file_path, AUDIO_DIR)
+    return f"/audio/{relative.replace(os.sep, '/')}"
+
 def get_tts_audio(text: str, speed: float = 1.0, language_code: str = "en-US") -> str:
     """
     Google Cloud TTS API를 사용하여 음성 파일 생성
-    
+
     Args:
         text: 음성으로 변환할 텍스트
         speed: 음성 속도 조절 (기본 1.0, 작을수록 느림)
         language_code: 언어 코드
-        
+
     Returns:
-        생성된 오디오 파일 경로
+        생성된 오디오 파일 경로 (같은 입력이면 캐시된 파일을 재사용)
     """
-    try:
-        # 클라이언트 초기화
-        client = texttospeech.TextToSpeechClient()
-        
+    key = get_tts_cache_key(text, speed=speed, language_code=language_code)
+
+    def synthesize() -> bytes:
         # 입력 텍스트 설정
         synthesis_input = texttospeech.SynthesisInput(text=text)
-        
+
         # 음성 설정
         voice = texttospeech.VoiceSelectionParams(
             language_code=language_code,
             ssml_gender=texttospeech.SsmlVoiceGender.NEUTRAL
         )
-        
+
         # 오디오 설정
         audio_config = texttospeech.AudioConfig(
             audio_encoding=texttospeech.AudioEncoding.MP3,
             speaking_rate=speed  # 속도 조절
         )
-        
-        # TTS 요청 및 응답 생성
-        response = client.synthesize_speech(
-            input=synthesis_input, 
-            voice=voice, 
+
+        # TTS 요청 및 응답 생성 (공유 클라이언트 사용)
+        response = tts_clients.run(lambda client: client.synthesize_speech(
+            input=synthesis_input,
+            voice=voice,
             audio_config=audio_config
-        )
-        
-        # 파일명 생성 및 저장
-        filename = f"{uuid.uuid4()}.mp3"
-        file_path = os.path.join(AUDIO_DIR, filename)
-        
-        with open(file_path, "wb") as out:
-            out.write(response.audio_content)
-        
+        ))
+        return response.audio_content
+
+    try:
+        # 캐시에 없을 때만 합성 후 저장
+        file_path = audio_cache.get_or_create(key, synthesize)
+        if file_path is None:
+            return None
+
         # 상대 경로 반환
-        return f"/audio/{filename}"
-    
+        return to_audio_url(file_path)
+
     except Exception as e:
         # 오류 처리 - 실제 환경에서는 로깅 추가
         print(f"TTS 오류: {e}")
@@ -65,4 +169,147 @@ def get_slow_tts_audio(text: str, language_code: str = "en-US") -> str:
     """
     느린 속도로 TTS 오디오 생성 (초등학생용)
     """
-    return get_tts_audio(text, speed=0.7, language_code=language_code)
\ No newline at end of file
+    return get_tts_audio(text, speed=0.7, language_code=language_code)
+
+def synthesize_with_emotion(
+    text: str,
+    emotion: str = "friendly",
+    speed: float = 1.0,
+    use_ssml: bool = False,
+    language_code: str = "en-US"
+) -> bytes:
+    """
+    감정 설정을 적용하여 Google Cloud TTS 합성 (캐시 사용 안 함)
+    """
+    # 감정 설정 가져오기 (기본값: friendly)
+    voice_config = VOICE_SETTINGS.get(emotion, VOICE_SETTINGS["friendly"])
+
+    # 음성 설정
+    voice = texttospeech.VoiceSelectionParams(
+        language_code=language_code,
+        name=voice_config["name"],
+        ssml_gender=voice_config["ssml_gender"]
+    )
+
+    # 오디오 설정
+    audio_config = texttospeech.AudioConfig(
+        audio_encoding=texttospeech.AudioEncoding.MP3,
+        pitch=voice_config["pitch"],
+        speaking_rate=voice_config["speaking_rate"] * speed,
+        effects_profile_id=["telephony-class-application"]
+    )
+
+    # 입력 텍스트 설정 (SSML 또는 일반 텍스트)
+    if use_ssml:
+        synthesis_input = texttospeech.SynthesisInput(ssml=text)
+    else:
+        synthesis_input = texttospeech.SynthesisInput(text=text)
+
+    # TTS 요청 (공유 클라이언트 사용)
+    response = tts_clients.run(lambda client: client.synthesize_speech(
+        input=synthesis_input,
+        voice=voice,
+        audio_config=audio_config
+    ))
+
+    return response.audio_content
+
+def get_emotion_tts_audio(
+    text: str,
+    emotion: str = "friendly",
+    speed: float = 1.0,
+    use_ssml: bool = False,
+    language_code: str = "en-US"
+) -> Optional[str]:
+    """
+    감정 음성 파일 경로 조회 (캐시에 없으면 합성 후 저장)
+    """
+    key = get_emotion_cache_key(text, emotion, speed, use_ssml, language_code)
+    return audio_cache.get_or_create(
+        key,
+        lambda: synthesize_with_emotion(text, emotion, speed, use_ssml, language_code)
+    )
+
+def get_emotion_tts_bytes(
+    text: str,
+    emotion: str = "friendly",
+    speed: float = 1.0,
+    use_ssml: bool = False,
+    language_code: str = "en-US"
+) -> Optional[bytes]:
+    """
+    감정 음성 오디오 데이터 조회 (캐시에 없으면 합성 후 저장)
+    """
+    key = get_emotion_cache_key(text, emotion, speed, use_ssml, language_code)
+    return audio_cache.get_or_create_bytes(
+        key,
+        lambda: synthesize_with_emotion(text, emotion, speed, use_ssml, language_code)
+    )
+
+def split_sentences(text: str) -> List[str]:
+    """
+    텍스트를 문장 단위로 분리
+    """
+    return [sentence.strip() for sentence in _SENTENCE_BOUNDARY.split(text) if sentence.strip()]
+
+class SentenceSegmenter:
+    """
+    생성 중인 텍스트에서 완성된 문장을 잘라내는 분할기
+
+    토큰을 feed 로 넣으면 문장 경계가 나타날 때마다 완성된 문장을 반환하고,
+    생성이 끝나면 flush 로 남은 부분을 반환한다.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, token: str) -> List[str]:
+        self._buffer += token
+        parts = _SENTENCE_BOUNDARY.split(self._buffer)
+        # 마지막 조각은 아직 끝나지 않은 문장
+        self._buffer = parts.pop()
+        return [part.strip() for part in parts if part.strip()]
+
+    def flush(self) -> List[str]:
+        rest, self._buffer = self._buffer.strip(), ""
+        return [rest] if rest else []
+
+def submit_synthesis(fn: Callable[..., Optional[bytes]], *args) -> Future:
+    """
+    문장 단위 합성 스레드 풀에 작업 제출 (동시 합성 요청 수 제한)
+    """
+    return _stream_executor.submit(fn, *args)
+
+def stream_emotion_tts(
+    text: str,
+    emotion: str = "friendly",
+    use_ssml: bool = False,
+    speed: float = 1.0
+) -> Iterator[bytes]:
+    """
+    문장 단위로 감정 음성을 합성하여 순서대로 반환
+
+    모든 문장을 동시에 합성 요청하고 완료되는 대로 앞 문장부터 내보내므로
+    첫 오디오는 첫 문장의 합성 시간만큼만 기다리면 된다.
+    MP3 프레임은 이어 붙여도 재생되므로 조각을 그대로 스트리밍할 수 있다.
+    """
+    # SSML 은 문장 단위로 자르면 태그가 깨지므로 한 번에 합성
+    segments = [text] if use_ssml else split_sentences(text)
+
+    futures = [
+        _stream_executor.submit(get_emotion_tts_bytes, segment, emotion, speed, use_ssml)
+        for segment in segments
+    ]
+    try:
+        for segment, future in zip(segments, futures):
+            try:
+                audio_content = future.result()
+            except Exception as e:
+                print(f"TTS 스트리밍 오류 ({segment}): {e}")
+                continue
+            if audio_content:
+                yield audio_content
+    finally:
+        # 클라이언트 연결이 끊긴 경우 남은 합성 요청 취소
+        for future in futures:
+            future.cancel()
@@ -0,0 +1,138 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, NamedTuple, Optional, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, make_transient_to_detached
+
+from app.config.settings import settings
+from app.db.models import User
+
+class CachedUser(NamedTuple):
+    user: User  # 세션에 속하지 않은(detached) 사용자 복사본
+    expires_at: float
+
+def token_key(token: str) -> str:
+    """
+    캐시 키 (토큰 원문 대신 해시 사용)
+    """
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+def _detached_copy(user: User) -> User:
+    """
+    컬럼 값만 복사한 detached 사용자 (요청 세션과 공유하지 않음)
+    """
+    copy = User(**{column.key: getattr(user, column.key) for column in User.__table__.columns})
+    make_transient_to_detached(copy)
+    return copy
+
+class UserCache:
+    """
+    검증된 토큰 -> 활성 사용자 캐시
+
+    같은 토큰으로 오는 요청은 JWT 디코딩과 사용자 조회 쿼리 없이 캐시된
+    사용자를 현재 세션에 merge(load=False) 해서 사용한다. 항목은 TTL 과
+    토큰 만료 시각 중 빠른 쪽에 만료되고, 로그아웃하거나 사용자 정보가
+    바뀌면(비활성화 등) 해당 사용자의 항목을 모두 삭제한다.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, CachedUser]" = OrderedDict()
+        self._by_user: Dict[int, Set[str]] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, db: Session, token: str) -> Optional[User]:
+        """
+        캐시된 사용자를 현재 세션에 연결하여 반환 (없으면 None)
+        """
+        if self.ttl_seconds <= 0:
+            return None
+        key = token_key(token)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.expires_at <= now:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        # load=False: DB 조회 없이 세션에 연결
+        return db.merge(entry.user, load=False)
+
+    def put(self, token: str, user: User, token_expires_at: Optional[float] = None):
+        """
+        사용자 저장 (token_expires_at: 토큰 만료 시각, UNIX 시간)
+        """
+        if self.ttl_seconds <= 0:
+            return
+        ttl = self.ttl_seconds
+        if token_expires_at is not None:
+            ttl = min(ttl, token_expires_at - time.time())
+        if ttl <= 0:
+            return
+
+        key = token_key(token)
+        entry = CachedUser(_detached_copy(user), time.monotonic() + ttl)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = entry
+            self._by_user.setdefault(entry.user.id, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        keys = self._by_user.get(entry.user.id)
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self._by_user[entry.user.id]
+
+    def invalidate_user(self, user_id: int):
+        """
+        해당 사용자의 캐시 항목 모두 삭제 (로그아웃, 비활성화 등)
+        """
+        with self._lock:
+            keys = self._by_user.pop(user_id, set())
+            for key in keys:
+                self._entries.pop(key, None)
+            if keys:
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_user.clear()
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+        }
+
+# 인증 의존성(get_current_user)에서 공유하는 사용자 캐시
+user_cache = UserCache(
+    max_entries=settings.AUTH_USER_CACHE_MAX_ENTRIES,
+    ttl_seconds=settings.AUTH_USER_CACHE_TTL_SECONDS
+)
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_changed_user(mapper, connection, target: User):
+    # 비활성화/삭제된 사용자가 캐시로 계속 인증되지 않도록 삭제
+    user_cache.invalidate_user(target.id)
@@ -0,0 +1,4 @@
+import os
+
+# 테스트는 MySQL 없이 SQLite 로 실행 (.env 보다 환경 변수가 우선)
+os.environ.setdefault("DATABASE_URL", "sqlite://")
@@ -0,0 +1,211 @@
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.api.AI_model_DS import FALLBACK_REPLY, EnglishTeacher, UpstreamError
+from app.core.circuit_breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+class StubDeepSeek:
+    """
+    DeepSeek chat completions API 를 흉내 내는 로컬 서버
+
+    responses 에 (상태 코드, 지연 시간) 을 넣어두면 요청마다 차례로 사용하고,
+    다 쓰면 마지막 값을 반복한다.
+    """
+
+    def __init__(self):
+        self.responses = [(200, 0.0)]
+        self.requests = 0
+        self.connections = set()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                payload = json.loads(self.rfile.read(length))
+                stub.connections.add(self.client_address)
+                index = min(stub.requests, len(stub.responses) - 1)
+                stub.requests += 1
+                status, delay = stub.responses[index]
+                time.sleep(delay)
+
+                if payload.get("stream") and status == 200:
+                    # 서버 전송 이벤트로 단어마다 한 조각씩 전송
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Connection", "close")
+                    self.end_headers()
+                    for word in payload["messages"][-1]["content"].split():
+                        chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    self.close_connection = True
+                    return
+
+                body = json.dumps({
+                    "choices": [{"message": {"content": f"echo: {payload['messages'][-1]['content']}"}}]
+                }).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/v1/chat/completions"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+@pytest.fixture
+def stub():
+    server = StubDeepSeek()
+    yield server
+    server.close()
+
+def make_teacher(stub, **kwargs) -> EnglishTeacher:
+    options = dict(
+        api_url=stub.url,
+        connect_timeout=1.0,
+        read_timeout=0.5,
+        max_retries=2,
+        backoff_base=0.01,
+        circuit_breaker=CircuitBreaker("stub", failure_threshold=2, reset_seconds=60)
+    )
+    options.update(kwargs)
+    return EnglishTeacher("test-key", "system", **options)
+
+def test_reuses_connection(stub):
+    teacher = make_teacher(stub)
+    assert teacher.generate_response("hello") == "echo: hello"
+    assert teacher.generate_response("again") == "echo: again"
+    # keep-alive 로 같은 연결을 재사용
+    assert len(stub.connections) == 1
+    teacher.close()
+
+def test_retries_server_errors(stub):
+    stub.responses = [(503, 0.0), (500, 0.0), (200, 0.0)]
+    teacher = make_teacher(stub)
+    assert teacher.complete("hello") == "echo: hello"
+    assert stub.requests == 3
+    teacher.close()
+
+def test_does_not_retry_client_errors(stub):
+    stub.responses = [(400, 0.0)]
+    teacher = make_teacher(stub)
+    with pytest.raises(UpstreamError):
+        teacher.complete("hello")
+    assert stub.requests == 1
+    teacher.close()
+
+def test_read_timeout_returns_fallback(stub):
+    stub.responses = [(200, 2.0)]
+    teacher = make_teacher(stub, max_retries=0)
+    started = time.monotonic()
+    assert teacher.generate_response("hello") == FALLBACK_REPLY
+    assert time.monotonic() - started < 1.5
+    teacher.close()
+
+def test_circuit_opens_and_fails_fast(stub):
+    stub.responses = [(503, 0.0)]
+    teacher = make_teacher(stub, max_retries=0)
+    for _ in range(2):
+        assert teacher.generate_response("hello") == FALLBACK_REPLY
+    requests_before = stub.requests
+
+    with pytest.raises(CircuitOpenError):
+        teacher.complete("hello")
+    assert teacher.generate_response("hello") == FALLBACK_REPLY
+    # 차단 중에는 서버로 요청을 보내지 않음
+    assert stub.requests == requests_before
+    teacher.close()
+
+def test_async_client(stub):
+    import asyncio
+
+    stub.responses = [(502, 0.0), (200, 0.0)]
+    teacher = make_teacher(stub)
+
+    async def run():
+        try:
+            return await teacher.complete_async("hello")
+        finally:
+            await teacher._get_async_client().aclose()
+
+    assert asyncio.run(run()) == "echo: hello"
+    assert stub.requests == 2
+
+def test_half_open_trial_expires():
+    breaker = CircuitBreaker("trial", failure_threshold=1, reset_seconds=0.05, trial_timeout=0.05)
+    breaker.record_failure()
+    time.sleep(0.06)
+    assert breaker.allow()  # 시험 요청
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow()
+
+    # 시험 요청 결과가 기록되지 않으면 다시 차단된 뒤 새 시험 요청을 허용
+    time.sleep(0.06)
+    assert not breaker.allow()
+    assert breaker.state == OPEN
+    time.sleep(0.06)
+    assert breaker.allow()
+
+def test_stream_completes_and_closes_circuit(stub):
+    teacher = make_teacher(stub, max_retries=0)
+    teacher.circuit_breaker.record_failure()
+    teacher.circuit_breaker.record_failure()
+    teacher.circuit_breaker.reset_seconds = 0.0
+
+    assert "".join(teacher.stream_response("hello there")) == "hello there "
+    assert teacher.circuit_breaker.state == CLOSED
+    teacher.close()
+
+def test_abandoned_stream_releases_trial(stub):
+    teacher = make_teacher(stub, max_retries=0)
+    teacher.circuit_breaker.record_failure()
+    teacher.circuit_breaker.record_failure()
+    teacher.circuit_breaker.reset_seconds = 60.0
+    teacher.circuit_breaker._opened_at -= 60.0
+
+    # 시험 요청인 스트림을 중간에 닫으면 (클라이언트 연결 끊김) 실패로 세지 않고 자리만 반환
+    stream = teacher.stream_response("one two three")
+    assert next(stream) == "one "
+    stream.close()
+    assert teacher.circuit_breaker.state == OPEN
+    assert teacher.circuit_breaker.failures == 2
+
+    # 차단 시간을 다시 기다리지 않고 다음 시험 요청을 받음
+    assert teacher.complete("hello") == "echo: hello"
+    assert teacher.circuit_breaker.state == CLOSED
+    teacher.close()
+
+def test_cancelled_streams_keep_circuit_closed(stub):
+    teacher = make_teacher(stub, max_retries=0)
+
+    # 탭 닫기 등으로 취소된 스트림이 여러 번 있어도 회로는 열리지 않음
+    for _ in range(teacher.circuit_breaker.failure_threshold + 1):
+        cancel = threading.Event()
+        stream = teacher.stream_response("one two three", cancel=cancel)
+        assert next(stream) == "one "
+        cancel.set()
+        assert list(stream) == []
+
+        stream = teacher.stream_response("one two three")
+        next(stream)
+        stream.close()
+
+    assert teacher.circuit_breaker.state == CLOSED
+    assert teacher.circuit_breaker.failures == 0
+    teacher.close()
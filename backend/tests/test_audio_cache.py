@@ -0,0 +1,76 @@
+import os
+
+from app.services.audio_cache import AudioCache, make_cache_key
+
+def key(text: str) -> str:
+    return make_cache_key(text, voice="v", speed=1.0, language_code="en-US", encoding="MP3")
+
+def test_lru_eviction_removes_oldest(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    first, second, third = key("a"), key("b"), key("c")
+    cache.put(first, b"x" * 10)
+    cache.put(second, b"x" * 10)
+    cache.put(third, b"x" * 10)
+
+    assert not cache.contains(first)
+    assert cache.contains(second) and cache.contains(third)
+
+def test_pinned_file_survives_eviction(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    pinned = key("lesson line")
+    cache.put(pinned, b"p" * 10)
+    path = cache.pin(pinned)
+    assert path == os.path.join(cache.pinned_directory, cache.filename(pinned))
+
+    for text in ("a", "b", "c", "d"):
+        cache.put(key(text), b"x" * 10)
+
+    assert os.path.exists(path)
+    assert cache.get_path(pinned) == path
+    assert cache.get_bytes(pinned) == b"p" * 10
+    assert cache.stats()["pinned"] == 1
+
+def test_pinned_files_restored_after_restart(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    pinned = key("lesson line")
+    cache.put(pinned, b"p" * 10)
+    path = cache.pin(pinned)
+
+    restarted = AudioCache(str(tmp_path), max_bytes=10)
+    for text in ("a", "b", "c"):
+        restarted.put(key(text), b"x" * 10)
+
+    assert restarted.get_path(pinned) == path
+    assert os.path.exists(path)
+
+def test_pin_unknown_key_returns_none(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    assert cache.pin(key("missing")) is None
+
+def test_get_or_create_bytes_synthesizes_once(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=100)
+    calls = []
+
+    def synthesize() -> bytes:
+        calls.append(1)
+        return b"audio"
+
+    assert cache.get_or_create_bytes(key("a"), synthesize) == b"audio"
+    assert cache.get_or_create_bytes(key("a"), synthesize) == b"audio"
+    assert len(calls) == 1
+
+def test_unpin_returns_file_to_lru(tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=20)
+    pinned = key("old line")
+    cache.put(pinned, b"p" * 10)
+    cache.pin(pinned)
+
+    assert cache.unpin(pinned)
+    assert cache.pinned_keys() == set()
+    assert cache.get_bytes(pinned) == b"p" * 10
+
+    # 고정 해제된 파일은 다시 삭제 대상
+    for text in ("a", "b"):
+        cache.put(key(text), b"x" * 10)
+    assert not cache.contains(pinned)
+    assert not cache.unpin(pinned)
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.api.deps import get_db
+from app.api.routes import auth
+from app.core import security
+from app.core.exceptions import ServiceBusyError
+from app.db.models import Base, User
+from app.services.auth_service import create_user_tokens
+from app.services.user_cache import user_cache
+
+@pytest.fixture
+def client():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine)
+
+    db = TestingSession()
+    db.add(User(id=1, name="tester", email="tester@example.com", hashed_password="x"))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        session = TestingSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    app = FastAPI()
+    app.include_router(auth.router, prefix="/auth")
+    app.dependency_overrides[get_db] = override_get_db
+    user_cache.clear()
+    yield TestClient(app)
+    user_cache.clear()
+    engine.dispose()
+
+def refresh(client, token: str):
+    return client.post("/auth/refresh", json={"refresh_token": token})
+
+def test_dummy_verify_always_fails():
+    assert security.dummy_verify_password("password") == (False, None)
+
+def test_timed_out_hash_keeps_slot_until_worker_finishes(monkeypatch):
+    pool = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    monkeypatch.setattr(security, "_get_hash_pool", lambda: pool)
+    monkeypatch.setattr(security.settings, "PASSWORD_HASH_TIMEOUT_SECONDS", 0.05)
+
+    async def scenario():
+        with pytest.raises(ServiceBusyError):
+            await security._run_in_hash_pool(release.wait, 5)
+        # 응답은 끝났지만 작업은 아직 해싱 중이므로 자리를 계속 차지
+        assert security.password_limiter.stats()["active"] == 1
+
+        release.set()
+        for _ in range(100):
+            if security.password_limiter.stats()["active"] == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert security.password_limiter.stats()["active"] == 0
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        pool.shutdown(wait=True)
+
+def test_refresh_rotates_and_rejects_reuse(client):
+    _, first = create_user_tokens(1)
+
+    response = refresh(client, first)
+    assert response.status_code == 200
+    second = response.json()["refresh_token"]
+    assert second != first
+
+    # 이미 사용한 토큰을 다시 쓰면 거부되고 패밀리 전체가 폐기됨
+    assert refresh(client, first).status_code == 401
+    assert refresh(client, second).status_code == 401
+
+    # 다른 로그인(다른 패밀리)은 영향 없음
+    _, other = create_user_tokens(1)
+    assert refresh(client, other).status_code == 200
+
+def test_logout_revokes_earlier_refresh_tokens(client):
+    access, refresh_token = create_user_tokens(1)
+    # 폐기 시각은 초 단위로 비교하므로 발급과 로그아웃 사이에 1초 이상 둠
+    time.sleep(1.1)
+
+    response = client.post("/auth/logout", headers={"Authorization": f"Bearer {access}"})
+    assert response.status_code == 200
+    assert refresh(client, refresh_token).status_code == 401
+
+    # 로그아웃 이후 새로 로그인한 토큰은 사용 가능
+    _, after_logout = create_user_tokens(1)
+    assert refresh(client, after_logout).status_code == 200
+
+def test_access_token_cannot_refresh(client):
+    access, _ = create_user_tokens(1)
+    assert refresh(client, access).status_code == 401
@@ -0,0 +1,27 @@
+import threading
+
+from sqlalchemy import text
+from sqlalchemy.pool import StaticPool
+
+from app.db.session import create_db_engine
+
+def test_in_memory_db_is_shared_across_threads():
+    engine = create_db_engine("sqlite://")
+    assert isinstance(engine.pool, StaticPool)
+
+    with engine.begin() as connection:
+        connection.execute(text("CREATE TABLE items (id INTEGER PRIMARY KEY)"))
+        connection.execute(text("INSERT INTO items (id) VALUES (1)"))
+
+    # 요청 스레드 풀에서도 같은 DB(같은 테이블)를 봄
+    counts = []
+
+    def count_items():
+        with engine.connect() as connection:
+            counts.append(connection.execute(text("SELECT COUNT(*) FROM items")).scalar())
+
+    worker = threading.Thread(target=count_items)
+    worker.start()
+    worker.join()
+    assert counts == [1]
+    engine.dispose()
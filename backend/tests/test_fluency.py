@@ -0,0 +1,67 @@
+import io
+import os
+import wave
+
+import numpy as np
+import pytest
+
+from app.services.fluency_service import analyze_fluency, decode_wav, score_audio_fluency
+from app.services.speech_service import score_speech
+
+SAMPLE_RATE = 16000
+
+def pcm(segments) -> bytes:
+    """
+    (초, 음성 여부) 구간으로 LINEAR16 오디오 생성 (음성은 220Hz 사인파, 무음은 약한 잡음)
+    """
+    rng = np.random.default_rng(0)
+    parts = []
+    for seconds, voiced in segments:
+        n = int(seconds * SAMPLE_RATE)
+        if voiced:
+            t = np.arange(n) / SAMPLE_RATE
+            parts.append(0.5 * np.sin(2 * np.pi * 220 * t))
+        else:
+            parts.append(0.001 * rng.standard_normal(n))
+    samples = np.concatenate(parts)
+    return (samples * 32767).astype("<i2").tobytes()
+
+def wav(frames: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as out:
+        out.setnchannels(1)
+        out.setsampwidth(2)
+        out.setframerate(SAMPLE_RATE)
+        out.writeframes(frames)
+    return buffer.getvalue()
+
+SPEECH = [(0.3, False), (1.0, True), (1.0, False), (1.0, True), (0.3, False)]
+
+def test_wav_speech_and_pause_detected():
+    metrics = analyze_fluency(wav(pcm(SPEECH)), word_count=4)
+    assert metrics is not None
+    assert metrics.pause_count == 1
+    assert metrics.long_pause_count == 1
+    assert abs(metrics.speech_duration - 2.0) < 0.1
+    assert abs(metrics.longest_pause - 1.0) < 0.1
+    assert abs(metrics.speech_rate - 4 / 3.0) < 0.1
+    assert 0 <= score_audio_fluency(metrics) <= 100
+
+def test_raw_pcm_only_with_flag():
+    frames = pcm(SPEECH)
+    assert analyze_fluency(frames, word_count=4) is None
+    metrics = analyze_fluency(frames, word_count=4, raw_pcm=True)
+    assert metrics is not None and metrics.pause_count == 1
+
+def test_non_wav_upload_is_rejected():
+    # webm 등 WAV 가 아닌 업로드를 PCM 으로 읽어 가짜 지표를 만들지 않음
+    assert analyze_fluency(os.urandom(32000), word_count=5) is None
+    webm = b"\x1a\x45\xdf\xa3" + os.urandom(32000)
+    assert analyze_fluency(webm, word_count=5) is None
+    with pytest.raises(ValueError):
+        decode_wav(webm)
+
+def test_score_speech_falls_back_to_text_fluency_for_non_wav():
+    result = score_speech("hello there", "hello there", os.urandom(32000))
+    assert result.fluency_metrics is None
+    assert result.fluency == score_speech("hello there", "hello there").fluency
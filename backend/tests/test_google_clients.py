@@ -0,0 +1,35 @@
+from app.services.google_clients import ClientPool
+
+class FakeTransport:
+    def __init__(self):
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+class FakeClient:
+    def __init__(self):
+        self.transport = FakeTransport()
+
+def test_reset_does_not_close_client_in_use():
+    pool = ClientPool("test", FakeClient, size=1)
+    in_use = pool.get()
+
+    pool.reset(0, in_use)
+
+    # 다른 스레드가 아직 사용 중일 수 있으므로 닫지 않고 슬롯만 교체
+    assert not in_use.transport.closed
+    assert pool.get() is not in_use
+    assert pool.reconnects == 1
+
+def test_reset_keeps_client_replaced_by_another_thread():
+    pool = ClientPool("test", FakeClient, size=1)
+    stale = pool.get()
+    pool.reset(0, stale)
+    fresh = pool.get()
+
+    # 같은 오류를 늦게 보고한 스레드가 새 클라이언트를 버리지 않음
+    pool.reset(0, stale)
+
+    assert pool.get() is fresh
+    assert pool.reconnects == 1
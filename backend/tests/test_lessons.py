@@ -0,0 +1,139 @@
+import pytest
+from fastapi import FastAPI, WebSocketDisconnect, status
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# 레슨 라우터가 사용하는 외부 TTS 패키지
+pytest.importorskip("gtts")
+pytest.importorskip("google.cloud.texttospeech")
+
+import os
+
+from app.api.deps import get_current_user, get_db
+from app.api.routes import lessons
+from app.core.security import create_access_token
+from app.db.models import Base, Dialogue, Lesson, User
+from app.schemas.lesson import SpeechEvaluationResponse
+from app.services.audio_cache import AudioCache
+from app.services.audio_io import read_audio
+
+@pytest.fixture
+def client(monkeypatch):
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    TestingSession = sessionmaker(bind=engine)
+
+    db = TestingSession()
+    db.add(User(id=1, name="tester", email="tester@example.com", hashed_password="x"))
+    db.add(Lesson(id=1, title="Greetings", teacher_character="teacher"))
+    db.add(Dialogue(id=7, lesson_id=1, teacher_line="Hi!", student_line="Hello there", sequence=1))
+    db.commit()
+    db.close()
+
+    def override_get_db():
+        session = TestingSession()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    async def fake_stream(audio_chunks):
+        async for _ in audio_chunks:
+            pass
+        yield "hello", False
+        yield "hello there", True
+
+    def fake_score(recognized_text, expected_text, audio=None, raw_pcm=False):
+        # WebSocket 으로 받은 오디오는 헤더 없는 LINEAR16
+        assert raw_pcm
+        return SpeechEvaluationResponse(
+            accuracy=100, pronunciation=100, fluency=100, overall_score=100,
+            feedback=recognized_text
+        )
+
+    monkeypatch.setattr(lessons, "stream_speech_to_text", fake_stream)
+    monkeypatch.setattr(lessons, "score_speech", fake_score)
+
+    app = FastAPI()
+    app.include_router(lessons.router, prefix="/lessons")
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user] = lambda: User(id=1, name="tester", email="tester@example.com")
+    test_client = TestClient(app)
+    test_client.session_factory = TestingSession
+    yield test_client
+    engine.dispose()
+
+def test_evaluate_stream_finds_dialogue(client):
+    token = create_access_token(1)
+    with client.websocket_connect(f"/lessons/1/evaluate/stream?dialogue_id=7&token={token}") as ws:
+        ws.send_bytes(b"\x00\x00" * 160)
+        ws.send_text("end")
+        assert ws.receive_json() == {"type": "interim", "transcript": "hello"}
+        assert ws.receive_json() == {"type": "final", "transcript": "hello there"}
+        result = ws.receive_json()
+    assert result["type"] == "result"
+    assert result["feedback"] == "hello there"
+
+def test_evaluate_stream_rejects_unknown_dialogue(client):
+    token = create_access_token(1)
+    with client.websocket_connect(f"/lessons/1/evaluate/stream?dialogue_id=999&token={token}") as ws:
+        with pytest.raises(WebSocketDisconnect) as closed:
+            ws.receive_json()
+    assert closed.value.code == status.WS_1008_POLICY_VIOLATION
+
+def test_lesson_audio_records_pinned_path(client, monkeypatch, tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10)
+    key = lessons.get_tts_cache_key("Hi!")
+
+    def fake_tts(text, speed=1.0):
+        return lessons.to_audio_url(cache.put(key, b"a" * 10))
+
+    monkeypatch.setattr(lessons, "audio_cache", cache)
+    monkeypatch.setattr(lessons, "get_tts_audio", fake_tts)
+    monkeypatch.setattr(lessons, "to_audio_url", lambda path: "/audio/" + os.path.relpath(path, tmp_path))
+
+    response = client.get("/lessons/tts/1/7")
+    assert response.status_code == 200
+    assert response.json()["audio_url"] == f"/audio/pinned/{cache.filename(key)}"
+
+    # 기록된 경로는 다른 오디오가 저장되어도 삭제되지 않음
+    cache.put("f" * 64, b"b" * 10)
+    assert os.path.exists(cache.path(key))
+    db = client.session_factory()
+    assert db.get(Dialogue, 7).audio_file == f"/audio/pinned/{cache.filename(key)}"
+    db.close()
+
+def test_evaluate_finds_dialogue(client, monkeypatch):
+    received = {}
+
+    async def fake_evaluate(audio_source, expected):
+        received["audio"] = read_audio(audio_source)
+        received["expected"] = expected
+        return SpeechEvaluationResponse(
+            accuracy=90, pronunciation=90, fluency=90, overall_score=90, feedback="good"
+        )
+
+    monkeypatch.setattr(lessons, "evaluate_speech_async", fake_evaluate)
+
+    response = client.post(
+        "/lessons/1/evaluate",
+        data={"dialogue_id": "7"},
+        files={"audio": ("speech.wav", b"RIFF-audio", "audio/wav")}
+    )
+    assert response.status_code == 200
+    assert response.json()["overall_score"] == 90
+    assert received["audio"] == b"RIFF-audio"
+    expected = received["expected"]
+    assert getattr(expected, "source", expected) == "Hello there"
+
+def test_evaluate_unknown_dialogue_returns_404(client):
+    response = client.post(
+        "/lessons/1/evaluate",
+        data={"dialogue_id": "999"},
+        files={"audio": ("speech.wav", b"RIFF-audio", "audio/wav")}
+    )
+    assert response.status_code == 404
@@ -0,0 +1,87 @@
+import time
+
+import pytest
+
+from app.api.AI_model_DS import FALLBACK_REPLY
+from app.core.circuit_breaker import CircuitOpenError
+from app.core.exceptions import ServiceBusyError
+from app.services import llm_router as router_module
+from app.services.llm_router import ChatBackend, LLMRouter
+
+class FakeBackend(ChatBackend):
+    """
+    지연 시간과 실패 여부를 정할 수 있는 테스트용 백엔드
+    """
+
+    def __init__(self, name: str, reply: str = "", delay: float = 0.0, fail: bool = False,
+                 remote: bool = True, loading: bool = False):
+        self.name = name
+        self.reply = reply or name
+        self.delay = delay
+        self.fail = fail
+        self.remote = remote
+        self.loading = loading
+        self.calls = 0
+
+    def is_available(self) -> bool:
+        return not self.loading
+
+    def is_loading(self) -> bool:
+        return self.loading
+
+    def prompt_version(self) -> str:
+        return "test"
+
+    def complete(self, text, history=None) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.name} failed")
+        return self.reply
+
+@pytest.fixture
+def make_router(monkeypatch):
+    routers = []
+
+    def make(*backends: FakeBackend) -> LLMRouter:
+        registry = {backend.name: (lambda backend=backend: backend) for backend in backends}
+        monkeypatch.setattr(router_module, "BACKENDS", registry)
+        router = LLMRouter([backend.name for backend in backends])
+        routers.append(router)
+        return router
+
+    yield make
+    for router in routers:
+        router.close()
+
+def test_falls_back_to_next_backend(make_router):
+    router = make_router(FakeBackend("primary", fail=True), FakeBackend("secondary"))
+    assert router.complete("hi") == "secondary"
+    assert router.fallbacks == 1
+
+def test_hedges_slow_backend(make_router, monkeypatch):
+    monkeypatch.setattr(router_module.settings, "CHAT_HEDGE_DEFAULT_DELAY", 0.05)
+    router = make_router(FakeBackend("slow", delay=1.0), FakeBackend("fast"))
+    started = time.monotonic()
+    assert router.complete("hi") == "fast"
+    assert time.monotonic() - started < 0.5
+    assert router.hedge_wins == 1
+
+def test_open_circuit_is_not_reported_as_busy(make_router):
+    backend = FakeBackend("remote")
+    router = make_router(backend)
+    for _ in range(router.routes[0].breaker.failure_threshold):
+        router.routes[0].breaker.record_failure()
+
+    # 원격 장애는 503 이 아니라 기본 응답으로 대체되어야 함
+    with pytest.raises(CircuitOpenError):
+        router.complete("hi")
+    assert list(router.select_stream().stream("hi")) == [FALLBACK_REPLY]
+    assert backend.calls == 0
+
+def test_loading_local_model_is_busy(make_router):
+    router = make_router(FakeBackend("local", remote=False, loading=True))
+    with pytest.raises(ServiceBusyError):
+        router.complete("hi")
+    with pytest.raises(ServiceBusyError):
+        router.select_stream()
@@ -0,0 +1,42 @@
+from sqlalchemy import create_engine, inspect
+from sqlalchemy.pool import StaticPool
+
+from app.db.migrations import (
+    downgrade_refresh_token_revocation,
+    legacy_refresh_tokens,
+    upgrade_refresh_token_revocation,
+)
+from app.db.models import Base, RevokedToken
+
+def make_legacy_engine():
+    # refresh_tokens 테이블을 쓰던 이전 스키마
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    tables = [table for name, table in Base.metadata.tables.items() if name != RevokedToken.__tablename__]
+    Base.metadata.create_all(bind=engine, tables=tables)
+    downgrade_refresh_token_revocation(engine)
+    return engine
+
+def test_upgrade_replaces_refresh_tokens():
+    engine = make_legacy_engine()
+    assert inspect(engine).has_table(legacy_refresh_tokens.name)
+
+    result = upgrade_refresh_token_revocation(engine)
+    assert result == {"revoked_tokens_created": True, "refresh_tokens_dropped": True}
+    assert inspect(engine).has_table(RevokedToken.__tablename__)
+    assert not inspect(engine).has_table(legacy_refresh_tokens.name)
+
+    # 다시 실행해도 변화 없음
+    assert upgrade_refresh_token_revocation(engine) == {
+        "revoked_tokens_created": False,
+        "refresh_tokens_dropped": False,
+    }
+    engine.dispose()
+
+def test_downgrade_restores_refresh_tokens():
+    engine = make_legacy_engine()
+    upgrade_refresh_token_revocation(engine)
+
+    downgrade_refresh_token_revocation(engine)
+    assert inspect(engine).has_table(legacy_refresh_tokens.name)
+    assert not inspect(engine).has_table(RevokedToken.__tablename__)
+    engine.dispose()
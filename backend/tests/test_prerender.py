@@ -0,0 +1,66 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+# 사전 렌더링은 Google TTS 클라이언트를 사용하는 tts_service 에 의존
+pytest.importorskip("google.cloud.texttospeech")
+
+from app.db.models import Base, Dialogue, Lesson
+from app.services import prerender_service
+from app.services.audio_cache import AudioCache
+
+@pytest.fixture
+def db():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Lesson(id=1, title="Greetings", teacher_character="teacher"))
+    session.add(Dialogue(id=7, lesson_id=1, teacher_line="Hi!", student_line="Hello", sequence=1))
+    session.commit()
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def cache(monkeypatch, tmp_path):
+    cache = AudioCache(str(tmp_path), max_bytes=10 * 1024)
+
+    def render(key):
+        return lambda *args, **kwargs: cache.put(key, b"audio")
+
+    monkeypatch.setattr(prerender_service, "audio_cache", cache)
+    monkeypatch.setattr(
+        prerender_service, "get_tts_audio",
+        lambda text, speed=1.0: render(prerender_service.get_tts_cache_key(text, speed=speed))()
+    )
+    monkeypatch.setattr(
+        prerender_service, "get_emotion_tts_audio",
+        lambda text, emotion, speed: render(
+            prerender_service.get_emotion_cache_key(text, emotion=emotion, speed=speed)
+        )()
+    )
+    monkeypatch.setattr(prerender_service, "to_audio_url", lambda path: path)
+    return cache
+
+def test_prerender_pins_every_variant(db, cache):
+    speeds, emotions = [1.0, 0.7], ["friendly", "excited"]
+    stats = prerender_service.prerender_lessons(db, speeds=speeds, emotions=emotions, max_workers=1)
+
+    assert stats["rendered"] == 6 and stats["failed"] == 0
+    assert cache.pinned_keys() == set(prerender_service._variant_keys("Hi!", speeds, emotions))
+    assert db.get(Dialogue, 7).audio_file == cache.path(prerender_service.get_tts_cache_key("Hi!"))
+
+def test_changed_line_releases_old_pins(db, cache):
+    prerender_service.prerender_lessons(db, speeds=[1.0], emotions=["friendly"], max_workers=1)
+    old_keys = cache.pinned_keys()
+
+    db.get(Dialogue, 7).teacher_line = "Hello!"
+    db.commit()
+    stats = prerender_service.prerender_lessons(db, speeds=[1.0], emotions=["friendly"], max_workers=1)
+
+    assert stats["released"] == len(old_keys)
+    assert cache.pinned_keys().isdisjoint(old_keys)
+    assert cache.pinned_keys() == set(prerender_service._variant_keys("Hello!", [1.0], ["friendly"]))
@@ -0,0 +1,55 @@
+import pytest
+
+from app.services import pronunciation_service
+from app.services.pronunciation_service import (
+    encode_phonemes,
+    phoneme_similarity,
+    score_words,
+    word_to_phonemes,
+)
+
+@pytest.fixture
+def dictionary(monkeypatch):
+    # CMU 사전 설치 여부와 관계없이 같은 결과가 나오도록 작은 사전 사용
+    monkeypatch.setattr(pronunciation_service, "_dictionary", {
+        "hello": ("HH", "AH", "L", "OW"),
+        "yellow": ("Y", "EH", "L", "OW"),
+        "there": ("DH", "EH", "R"),
+    })
+
+def test_dictionary_lookup_and_fallback(dictionary):
+    assert word_to_phonemes("Hello") == ("HH", "AH", "L", "OW")
+    # 사전에 없는 단어는 metaphone 근사
+    assert word_to_phonemes("zzqx") != ()
+
+def test_encode_phonemes_one_code_per_phoneme(dictionary):
+    hello = encode_phonemes(word_to_phonemes("hello"))
+    yellow = encode_phonemes(word_to_phonemes("yellow"))
+    assert len(hello) == 4
+    # 같은 음소는 같은 코드
+    assert hello[2:] == yellow[2:]
+
+def test_phoneme_similarity_bounds():
+    assert phoneme_similarity("", "") == 1.0
+    assert phoneme_similarity("abcd", "abcd") == 1.0
+    assert phoneme_similarity("abcd", "xbcd") == 0.75
+
+def test_score_words_exact_match(dictionary):
+    score, word_scores = score_words(["hello", "there"], ["hello", "there"])
+    assert score == 100.0
+    assert [w.heard for w in word_scores] == ["hello", "there"]
+
+def test_score_words_partial_and_missing(dictionary):
+    score, word_scores = score_words(["yellow", "there"], ["hello", "there"])
+    hello, there = word_scores
+    assert hello.heard == "yellow" and hello.score == 50.0  # HH AH -> Y EH
+    assert there.score == 100.0
+    # 음소 수로 가중 평균 (4 음소 50점, 3 음소 100점)
+    assert score == pytest.approx((50.0 * 4 + 100.0 * 3) / 7)
+
+    score, word_scores = score_words(["there"], ["hello", "there"])
+    assert word_scores[0].score == 0.0 and word_scores[0].heard is None
+    assert score == pytest.approx(100.0 * 3 / 7)
+
+def test_score_words_empty_expected():
+    assert score_words(["hello"], []) == (0.0, [])
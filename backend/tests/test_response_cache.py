@@ -0,0 +1,36 @@
+from app.services.response_cache import ResponseCache
+
+def make_cache(similarity: float = 0.0) -> ResponseCache:
+    return ResponseCache(max_entries=100, ttl_seconds=60, similarity_threshold=similarity)
+
+def test_exact_match_by_default():
+    cache = make_cache()
+    cache.put("What is apple in English?", "v1", "apple reply")
+    assert cache.get("what is apple in english", "v1") == "apple reply"
+    assert cache.get("What is an apple in English?", "v1") is None
+
+def test_different_content_word_is_not_similar():
+    cache = make_cache(similarity=0.5)
+    cache.put("Can you tell me how to say apple in English please?", "v1", "apple reply")
+    # 긴 질문에서 내용어 하나만 달라도 다른 질문
+    assert cache.get("Can you tell me how to say grape in English please?", "v1") is None
+
+def test_similar_prompt_with_same_content_words():
+    cache = make_cache(similarity=0.5)
+    cache.put("How do you say apple in English?", "v1", "apple reply")
+    assert cache.get("How can I say apple in English?", "v1") == "apple reply"
+    assert cache.approximate_hits == 1
+
+def test_different_question_word_is_not_similar():
+    cache = make_cache(similarity=0.5)
+    cache.put("Why is apple red?", "v1", "why reply")
+    # 의문사가 다르면 다른 질문
+    assert cache.get("What is apple red?", "v1") is None
+    assert cache.get("How is apple red?", "v1") is None
+    assert cache.get("Why is the apple red?", "v1") == "why reply"
+
+def test_prompt_version_change_drops_entries():
+    cache = make_cache()
+    cache.put("hello", "v1", "reply")
+    assert cache.get("hello", "v2") is None
+    assert cache.stats()["entries"] == 0
@@ -0,0 +1,56 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import Base, Dialogue, Lesson
+from app.services.scoring_service import (
+    expected_line_index,
+    find_missed_words,
+    prepare_expected,
+    prepare_text,
+    score_pair,
+)
+
+def test_multi_sentence_tokens_keep_every_word():
+    # 문장 중간의 마침표가 단어에 붙어 단어가 빠지면 안 됨
+    assert prepare_text("Hello. How are you?").tokens == ["hello", ".", "how", "are", "you", "?"]
+    assert prepare_text("I like it. It is red!").tokens == ["i", "like", "it", ".", "it", "is", "red", "!"]
+
+def test_multi_sentence_expected_words():
+    expected = prepare_expected("Hello. How are you?")
+    assert expected.words == ["hello", "how", "are", "you"]
+
+def test_multi_sentence_missed_word_is_reported():
+    pytest.importorskip("jellyfish")
+
+    result = score_pair("Goodbye how are you", "Hello. How are you?")
+    assert "hello" in result.missed_words
+    assert result.pronunciation < 100
+
+def test_homophones_are_not_reported_as_missed():
+    assert find_missed_words(["write", "there"], ["right", "there"]) == []
+    assert find_missed_words(["i", "see", "their", "house"], ["i", "see", "there", "house"]) == []
+
+def test_punctuation_does_not_count_as_words():
+    result = score_pair("hello there how are you", "Hello there. How are you?")
+    assert result.accuracy == 100.0
+
+def test_dialogue_update_invalidates_expected_line():
+    engine = create_engine("sqlite://", poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    db = sessionmaker(bind=engine)()
+    db.add(Lesson(id=1, title="Greetings", teacher_character="teacher"))
+    dialogue = Dialogue(id=7, lesson_id=1, teacher_line="Hi!", student_line="Hello there")
+    db.add(dialogue)
+    db.commit()
+
+    assert expected_line_index.get(7, "Hello there").source == "Hello there"
+    dialogue.student_line = "Good morning"
+    db.commit()
+    assert "7" not in expected_line_index._lines
+
+    # 평가 시 캐시에 없으면 바로 생성
+    assert expected_line_index.get(7, dialogue.student_line).words == ["good", "morning"]
+    db.close()
+    engine.dispose()
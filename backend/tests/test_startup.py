@@ -0,0 +1,57 @@
+import json
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# speech_service import 시 로드되면 안 되는 모듈 (첫 평가 요청 때 로드)
+HEAVY_MODULES = [
+    "nltk",
+    "jellyfish",
+    "numpy",
+    "cmudict",
+    "vosk",
+    "google.cloud.speech_v1p1beta1",
+    "google.cloud.translate_v2",
+]
+
+# 워커 시작이 느려지지 않도록 하는 import 시간 상한 (초)
+IMPORT_BUDGET_SECONDS = 2.0
+
+def _import_in_subprocess(module: str) -> dict:
+    """
+    새 인터프리터에서 모듈을 import 하고 걸린 시간과 로드된 무거운 모듈 반환
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        f"import {module}\n"
+        "elapsed = time.perf_counter() - start\n"
+        f"heavy = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+        "print(json.dumps({'elapsed': elapsed, 'heavy': heavy}))\n"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        timeout=60,
+        check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+def test_speech_service_import_is_lazy():
+    result = _import_in_subprocess("app.services.speech_service")
+    assert result["heavy"] == []
+
+def test_speech_service_import_time():
+    result = _import_in_subprocess("app.services.speech_service")
+    print(f"speech_service import: {result['elapsed'] * 1000:.1f}ms")
+    assert result["elapsed"] < IMPORT_BUDGET_SECONDS
+
+def test_scoring_needs_no_downloaded_resources():
+    # punkt 등 nltk 데이터 없이도 토큰화가 동작해야 함
+    from app.services.scoring_service import prepare_text
+
+    assert prepare_text("I don't like apples.").tokens == ["i", "do", "n't", "like", "apples", "."]
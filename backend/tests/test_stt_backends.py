@@ -0,0 +1,32 @@
+import asyncio
+
+import pytest
+
+from app.services.stt_backends import STTBackend
+
+class EchoBackend(STTBackend):
+    name = "echo"
+
+    def __init__(self):
+        self.calls = []
+
+    def recognize(self, content: bytes) -> str:
+        self.calls.append(content)
+        return content.decode()
+
+async def chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+def test_backend_requires_recognize():
+    with pytest.raises(TypeError):
+        STTBackend()
+
+def test_default_stream_recognizes_once_at_end():
+    backend = EchoBackend()
+
+    async def collect():
+        return [result async for result in backend.stream(chunks(b"hello ", b"there"))]
+
+    assert asyncio.run(collect()) == [("hello there", True)]
+    assert backend.calls == [b"hello there"]
@@ -0,0 +1,79 @@
+import calendar
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app.db.models import Base
+from app.services.token_revocation import RevocationStore, family_key, user_key
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine(
+        "sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool
+    )
+    Base.metadata.create_all(bind=engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+def make_store() -> RevocationStore:
+    return RevocationStore(sweep_seconds=600, batch_size=10)
+
+def payload(fam: str = "f1", jti: str = "j1", sub: str = "1", iat: int = 0) -> dict:
+    return {"fam": fam, "jti": jti, "sub": sub, "iat": iat}
+
+def expires() -> datetime:
+    return datetime.utcnow() + timedelta(days=1)
+
+def test_family_revoked_on_another_worker_is_rejected(session_factory):
+    worker_a, worker_b = make_store(), make_store()
+
+    db = session_factory()
+    worker_a.revoke(db, family_key("f1"), expires())
+    db.commit()
+    db.close()
+
+    # 다른 워커(다른 인스턴스)에서도 바로 거부
+    db = session_factory()
+    assert worker_b.is_revoked(db, payload(fam="f1"))
+    assert not worker_b.is_revoked(db, payload(fam="f2"))
+    db.close()
+
+def test_token_can_be_claimed_once(session_factory):
+    store = make_store()
+    db = session_factory()
+    assert store.claim(db, "j1", expires())
+    assert not store.claim(db, "j1", expires())
+    assert store.reuse_detected == 1
+    db.close()
+
+def test_logout_revokes_only_older_tokens(session_factory):
+    store = make_store()
+    db = session_factory()
+    store.revoke(db, user_key(1), expires())
+    db.commit()
+    revoked_at = calendar.timegm(datetime.utcnow().timetuple())
+
+    assert store.is_revoked(db, payload(iat=revoked_at - 5))
+    # 로그아웃과 같은 초에 다시 로그인해 받은 토큰은 유효
+    assert not store.is_revoked(db, payload(iat=revoked_at))
+    db.close()
+
+def test_sweep_deletes_expired_rows(session_factory, monkeypatch):
+    import app.db.session as db_session
+
+    monkeypatch.setattr(db_session, "SessionLocal", session_factory)
+    store = make_store()
+    db = session_factory()
+    for i in range(25):
+        store.revoke(db, family_key(f"old{i}"), datetime.utcnow() - timedelta(seconds=1))
+    store.revoke(db, family_key("live"), expires())
+    db.commit()
+    db.close()
+
+    assert store.sweep() == 25
+    db = session_factory()
+    assert store.is_revoked(db, payload(fam="live"))
+    db.close()